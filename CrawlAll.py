@@ -19,6 +19,8 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
 }
 TARGET_USERS = ["李宗恩", "andy"]
+SITE_TIMEZONE = "America/Los_Angeles"  # 站点显示时间所用时区
+SITE_UTC_OFFSET_HOURS = -8             # 系统缺少时区数据库时的回退偏移
 
 # 进度文件，用于记录当前页码和页内文章序号（均从1开始）
 PROGRESS_FILE = "progress.txt"
@@ -149,6 +151,34 @@ def get_page_title(page_url):
     return title_tag.text.strip() if title_tag else "未知标题"
 
 
+def get_site_timezone():
+    """
+    返回站点时区对象；若系统缺少 IANA 时区数据，回退为固定偏移
+    """
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(SITE_TIMEZONE)
+    except Exception:
+        return datetime.timezone(datetime.timedelta(hours=SITE_UTC_OFFSET_HOURS))
+
+
+def time_text_to_iso(time_text):
+    """
+    把 "YYYY年MM月DD日 HH:MM" 格式的站点本地时间转换为带时区的 ISO 8601 字符串，无法解析时返回 ""
+    """
+    if not time_text:
+        return ""
+    match = re.search(r'(\d{4})年(\d{1,2})月(\d{1,2})日\s*(\d{1,2}):(\d{2})', time_text)
+    if not match:
+        return ""
+    try:
+        dt = datetime.datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)),
+                               int(match.group(4)), int(match.group(5)), tzinfo=get_site_timezone())
+    except ValueError:
+        return ""
+    return dt.isoformat()
+
+
 def generate_unique_id(article_url, index):
     """
     生成唯一的ID，结合文章URL和评论索引
@@ -202,6 +232,7 @@ def parse_comment(comment, article_url, level=0, selected_color="white", index=0
         "id": comment_id,
         "author": comment_user,
         "time": time_text,
+        "time_iso": time_text_to_iso(time_text),
         "content": comment_text,
         "level": level,
         "highlight": highlight,
@@ -251,6 +282,7 @@ def save_to_json_file(article_url, article_title, article_content, comments_data
         "title": article_title,
         "content": article_content,
         "article_time": article_time,
+        "article_time_iso": time_text_to_iso(article_time),
         "comments": comments_datatest,
         "page": page,
         "order": order
@@ -263,13 +295,20 @@ def save_to_json_file(article_url, article_title, article_content, comments_data
     with open(filename, "w", encoding="utf-8") as f:
         json.dump(out, f, ensure_ascii=False, indent=2)
     print(f"保存《{article_title}》评论数据到 {filename}")
+    return filename
 
 
-def crawl():
+def crawl(progress=None):
     """
     爬取评论并将数据保存为 JSON 文件，每页最多处理 10 篇文章。
     支持断点续爬，进度记录包含当前页和页内文章序号。
+    progress(current, total, message, nbytes) 为可选的进度回调（见 jobs.py）：
+    总篇数事先未知，total 为 None；取消任务时回调抛出 JobCancelled，下次从进度记录处继续。
+    返回标题或正文获取失败（以占位内容保存）的链接列表，全部成功时为空。
     """
+    failed = []
+    crawled = 0
+    nbytes = 0
     start_page, start_order = get_last_progress()
     current_page = start_page
     articles_per_page = 10
@@ -289,13 +328,19 @@ def crawl():
             initial_order = 1
 
         for idx, link in enumerate(article_links, start=initial_order):
+            if progress:
+                progress(crawled + 1, None, f"第 {current_page} 页 第 {idx} 篇", nbytes)
             article_title = get_article_title(link)
             article_content = get_article_content(link)
             print(f"📌 爬取 第 {current_page} 页 第 {idx} 篇: {link} | {article_title}")
             comments_datatest = get_comments(link)
-            save_to_json_file(link, article_title, article_content, comments_datatest, current_page, idx)
+            if article_title == "未知标题" or article_content == "未知内容":
+                failed.append(link)
+            filename = save_to_json_file(link, article_title, article_content, comments_datatest, current_page, idx)
             # 每成功处理一篇文章，更新进度记录（下一篇序号为 idx+1）
             save_progress(current_page, idx + 1)
+            crawled += 1
+            nbytes += os.path.getsize(filename)
             time.sleep(2)
 
         # 当前页处理完成，重置页内文章序号，并记录进度
@@ -308,12 +353,16 @@ def crawl():
     fixed_folder = os.path.join("datatest", "fixed")
     if not os.path.exists(fixed_folder):
         os.makedirs(fixed_folder)
-    for page_url in PAGE_URLS:
+    for i, page_url in enumerate(PAGE_URLS, start=1):
+        if progress:
+            progress(i, len(PAGE_URLS), f"固定页面：{page_url}", nbytes)
         print(f"📌 爬取固定页面: {page_url}")
         page_title = get_page_title(page_url)
         article_content = get_article_content(page_url)
         print(f"📌 页面标题: {page_title}")
         comments_datatest = get_comments(page_url)
+        if page_title == "未知标题" or article_content == "未知内容":
+            failed.append(page_url)
         file_id = generate_unique_id(page_url, 0)
         article_time = get_article_time(page_url)
         filename = os.path.join(fixed_folder, f"{file_id}.json")
@@ -322,6 +371,7 @@ def crawl():
             "title": page_title,
             "content": article_content,
             "article_time": article_time,
+            "article_time_iso": time_text_to_iso(article_time),
             "comments": comments_datatest,
             "fixed": True
         }
@@ -329,7 +379,11 @@ def crawl():
             json.dump(out, f, ensure_ascii=False, indent=2)
         print(f"保存固定页面《{page_title}》到 {filename}")
         time.sleep(2)
-    print("\n✅ 爬取完成，评论数据已保存到 datatest 目录中。")
+    if failed:
+        print(f"❌ 爬取结束，{len(failed)} 篇文章的标题或正文获取失败（已保存占位内容）：{', '.join(failed)}")
+    else:
+        print("\n✅ 爬取完成，评论数据已保存到 datatest 目录中。")
+    return failed
 
 
 if __name__ == "__main__":
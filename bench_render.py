@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+评论 HTML 渲染基准测试：
+在合成的超深问答楼层（每条评论只有一条回复）和宽楼层上测量 generator.render_comments_html 的耗时，
+并与旧版递归字符串拼接实现比较输出是否逐字节一致。
+
+用法：python bench_render.py [深度1 深度2 ...]
+"""
+
+import sys
+import time
+
+import generator
+
+DEFAULT_DEPTHS = [500, 2000, 5000, 20000]
+LEGACY_MAX_DEPTH = 500  # 旧版递归实现受递归深度限制，只在该深度以内做对比
+
+
+def make_deep_thread(depth):
+    """
+    构造一条深度为 depth 的单链回复楼层（一问一答交替）
+    """
+    root = None
+    for i in reversed(range(depth)):
+        author = "李宗恩" if i % 2 else "读者"
+        root = {
+            "author": author,
+            "time": f"2025年01月{i % 28 + 1:02d}日 12:{i % 60:02d}",
+            "content": f"<p>第 {i} 楼：阳气不足怎么调理？</p>",
+            "highlight": author == "李宗恩",
+            "children": [root] if root else []
+        }
+    return [root]
+
+
+def make_wide_thread(count):
+    """
+    构造 count 条顶层评论，每条带两条回复
+    """
+    return [
+        {
+            "author": "读者",
+            "time": "2025年01月01日 12:00",
+            "content": f"<p>提问 {i}</p>",
+            "highlight": False,
+            "children": [
+                {"author": "andy", "time": "2025年01月01日 13:00", "content": "<p>回答</p>",
+                 "highlight": True, "children": []},
+                {"author": "读者", "time": "2025年01月01日 14:00", "content": "<p>谢谢</p>",
+                 "highlight": False, "children": []},
+            ]
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_parse_comment(comment, article_url, level=0, index=0):
+    """
+    旧版实现（递归 + 字符串累加），仅用于校验输出一致并作为耗时对照
+    """
+    children = comment.get('children', [])
+    highlight_class = "highlight" if comment.get('highlight', False) else "reply"
+    comment_id = generator.generate_unique_id(article_url, index)
+    index = index + 1
+    html = f'<div class="comment {highlight_class}" id="{comment_id}" onclick="removeHighlight(this)">'
+    html += f'<div class="author">{comment["author"]}</div>'
+    html += f'<div class="time">{comment["time"]}</div>'
+    html += f'<div class="comment-text">{comment["content"]}</div>'
+    if children:
+        replies_html = ""
+        for child in children:
+            child_html, index = legacy_parse_comment(child, article_url, level + 1, index)
+            replies_html += child_html
+        if replies_html:
+            html += f'<div class="replies">{replies_html}</div>'
+    html += '</div>'
+    return html, index
+
+
+def legacy_render(comments, article_url):
+    parts = []
+    index = 0
+    for comment in comments:
+        comment_html, index = legacy_parse_comment(comment, article_url, index=index)
+        parts.append(comment_html)
+    return "\n".join(parts)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(depths):
+    article_url = "https://andylee.pro/wp/?p=1"
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), LEGACY_MAX_DEPTH * 3))
+    print(f"{'楼层':<14}{'评论数':>8}{'输出KB':>10}{'新实现ms':>12}{'旧实现ms':>12}  一致")
+    cases = [(f"深度 {d}", make_deep_thread(d)) for d in depths]
+    cases.append(("宽楼层", make_wide_thread(1000)))
+    ok = True
+    for name, comments in cases:
+        count = sum(1 for _ in generator.iter_comments(comments))
+        html, new_ms = timed(generator.render_comments_html, comments, article_url)
+        if name.startswith("深度") and count > LEGACY_MAX_DEPTH:
+            legacy_ms, same = "-", "-"
+        else:
+            legacy_html, legacy_ms = timed(legacy_render, comments, article_url)
+            same = "是" if legacy_html == html else "否"
+            ok = ok and legacy_html == html
+            legacy_ms = f"{legacy_ms:.1f}"
+        print(f"{name:<14}{count:>8}{len(html.encode('utf-8')) / 1024:>10.1f}{new_ms:>12.1f}{legacy_ms:>12}  {same}")
+    return ok
+
+
+if __name__ == "__main__":
+    depths = [int(arg) for arg in sys.argv[1:]] or DEFAULT_DEPTHS
+    sys.exit(0 if run(depths) else 1)
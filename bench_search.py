@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+边输入边搜索基准测试：
+用 node 运行页面中的搜索引擎（generator.SEARCH_WORKER_JS），等二元字组索引建好后，
+模拟读者逐字输入关键词（每输入一个字搜索一次），统计每次搜索（含生成第一页结果）的耗时。
+桌面耗时乘以 MOBILE_SLOWDOWN 估算手机耗时，超过 LATENCY_BUDGET_MS 时以状态码 1 退出。
+
+用法：python bench_search.py [data目录]
+不指定 data 目录时使用合成语料（SYNTHETIC_ARTICLES 篇文章，每篇 SYNTHETIC_COMMENTS 条评论）
+"""
+
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import generator
+
+SYNTHETIC_ARTICLES = 600
+SYNTHETIC_COMMENTS = 60
+QUERY_COUNT = 30           # 每种搜索类型模拟输入的关键词个数
+LATENCY_BUDGET_MS = 50     # 每次按键的耗时上限（手机）
+MOBILE_SLOWDOWN = 4        # 中端手机相对桌面 node 的估计减速倍数
+SEARCH_TYPES = ["comment", "author", "article"]
+WORDS = ["阳气", "不足", "怎么", "调理", "头发", "脾胃", "湿气", "睡眠", "经络", "艾灸", "手脚冰凉", "失眠",
+         "请问", "老师", "谢谢", "孩子", "咳嗽", "月经", "上火", "肝气", "郁结", "中药", "饮食", "运动"]
+AUTHORS = ["李宗恩", "andy", "读者", "小明", "张三", "王医生", "清风", "明月"]
+
+DRIVER_JS = r"""
+const fs = require('fs');
+const vm = require('vm');
+const [corpusFile, engineFile, queriesFile] = process.argv.slice(2);
+const ctx = {console, setTimeout, clearTimeout};
+vm.createContext(ctx);
+vm.runInContext(fs.readFileSync(corpusFile, 'utf8') + '\nthis.searchCorpus = searchCorpus;', ctx);
+vm.runInContext(fs.readFileSync(engineFile, 'utf8') + '\nthis.createSearchEngine = createSearchEngine;', ctx);
+const queries = JSON.parse(fs.readFileSync(queriesFile, 'utf8'));
+let last = null;
+let indexMs = null;
+const engine = ctx.createSearchEngine(msg => {
+  if (msg.type === 'indexed') indexMs = msg.ms;
+  else last = msg;
+});
+engine.handle({type: 'init', foldMap: {}, specialAuthors: ['李宗恩', 'andy']});
+(function waitIndexed() {
+  if (indexMs === null) return setTimeout(waitIndexed, 5);
+  const timings = {};
+  let id = 0;
+  for (const [searchType, keyword] of queries) {
+    (timings[searchType] = timings[searchType] || []);
+    for (let n = 1; n <= keyword.length; n++) {
+      last = null;
+      const start = process.hrtime.bigint();
+      engine.handle({type: 'search', id: ++id, keyword: keyword.slice(0, n), searchType,
+                     view: {page: 1, perPage: 20, sort: 'default', special: false}});
+      const ms = Number(process.hrtime.bigint() - start) / 1e6;
+      if (!last || !last.done) throw new Error('搜索未同步完成：' + keyword.slice(0, n));
+      timings[searchType].push(ms);
+    }
+  }
+  console.log(JSON.stringify({indexMs, timings}));
+})();
+"""
+
+
+def synthetic_corpus(rng):
+    """
+    合成语料：评论由常见词随机拼成
+    """
+    def sentence(count):
+        return "，".join(rng.choice(WORDS) for _ in range(count))
+
+    corpus = []
+    for a in range(SYNTHETIC_ARTICLES):
+        url = f"https://andylee.pro/wp/?p={a}"
+        comments = [{"author": rng.choice(AUTHORS), "time": "2025年01月01日 12:00",
+                     "content": f"<p>{sentence(rng.randint(3, 30))}</p>", "children": []}
+                    for _ in range(SYNTHETIC_COMMENTS)]
+        corpus.append(generator.build_search_entry(url, sentence(3), "2025年01月01日", sentence(3),
+                                                   f"<p>{sentence(200)}</p>", comments))
+    return corpus
+
+
+def site_corpus(data_folder):
+    return [generator.build_search_entry(a["article_url"], a["title"], a.get("article_time", ""), a["title"],
+                                         a.get("content", ""), a.get("comments", []))
+            for a in generator.read_and_sort_data(data_folder)]
+
+
+def pick_queries(corpus, rng):
+    """
+    从语料中随机截取关键词（保证能搜到结果），作者搜索用作者名
+    """
+    comments = [c for entry in corpus for c in entry["comments"] if len(c[4]) >= 6]
+    queries = []
+    for _ in range(QUERY_COUNT):
+        text = rng.choice(comments)[4]
+        start = rng.randrange(len(text) - 5)
+        queries.append(["comment", text[start:start + rng.randint(2, 6)]])
+        queries.append(["author", rng.choice(comments)[1]])
+        text = rng.choice(corpus)["content"] or "阳气不足"
+        start = rng.randrange(max(1, len(text) - 5))
+        queries.append(["article", text[start:start + rng.randint(2, 6)]])
+    return queries
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def run(data_folder=None):
+    if shutil.which("node") is None:
+        print("❌ 未找到 node，无法运行搜索基准测试")
+        return False
+    rng = random.Random(0)
+    corpus = site_corpus(data_folder) if data_folder else synthetic_corpus(rng)
+    queries = pick_queries(corpus, rng)
+    with tempfile.TemporaryDirectory() as tmp:
+        files = {"corpus.js": "const searchCorpus = " + json.dumps(corpus, ensure_ascii=False) + ";",
+                 "engine.js": generator.SEARCH_WORKER_JS,
+                 "queries.json": json.dumps(queries, ensure_ascii=False),
+                 "driver.js": DRIVER_JS}
+        for name, text in files.items():
+            with open(os.path.join(tmp, name), "w", encoding="utf-8") as f:
+                f.write(text)
+        output = subprocess.run(["node"] + [os.path.join(tmp, name) for name in
+                                            ("driver.js", "corpus.js", "engine.js", "queries.json")],
+                                capture_output=True, text=True, check=True).stdout
+    result = json.loads(output)
+    comment_count = sum(len(entry["comments"]) for entry in corpus)
+    print(f"语料：{len(corpus)} 篇文章，{comment_count} 条评论；索引建立 {result['indexMs']} ms（后台分批）")
+    print(f"{'搜索类型':<10}{'按键数':>8}{'p50 ms':>10}{'p95 ms':>10}{'最大 ms':>10}{'手机估计 ms':>14}")
+    ok = True
+    for search_type in SEARCH_TYPES:
+        timings = result["timings"][search_type]
+        worst = max(timings)
+        mobile = worst * MOBILE_SLOWDOWN
+        ok = ok and mobile <= LATENCY_BUDGET_MS
+        print(f"{search_type:<10}{len(timings):>8}{percentile(timings, 50):>10.2f}"
+              f"{percentile(timings, 95):>10.2f}{worst:>10.2f}{mobile:>14.1f}")
+    print(("✅ " if ok else "❌ ") + f"每次按键耗时上限 {LATENCY_BUDGET_MS} ms（桌面耗时 × {MOBILE_SLOWDOWN}）")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if run(sys.argv[1] if len(sys.argv) > 1 else None) else 1)
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+命令行入口（无需图形界面，适合服务器和定时任务）：
+
+    python cli.py crawl [--reset]        全量爬取评论（CrawlAll.py）
+    python cli.py update [--generate]    增量更新最新文章和留言（crawler.py）
+    python cli.py generate [...]         根据 data 目录生成网页（参数与 generator.py 相同）
+    python cli.py serve [--port 8000]    提供生成的网页（预压缩、ETag、Range、缓存头）
+    python cli.py loadtest [--url ...]   对网页服务器做简单压测（不指定 --url 时临时启动内置服务器）
+    python cli.py api [--port 8001]      本地 JSON 查询接口（文章、评论、作者、搜索）
+    python cli.py index                  增量更新全文索引 search.db（crawler 更新后会自动执行）
+    python cli.py search 关键词           在全文索引中搜索评论或文章
+    python cli.py send --config x.json   把已生成的网页（压缩包）或新内容摘要发邮件
+
+各子命令只在执行时才导入所需模块（requests、bs4、opencc 等），查看帮助等简单命令不加载它们。
+加 --json 时运行日志改写到标准错误，结束后在标准输出打印一行 JSON 摘要。
+退出码：0 成功，1 执行失败（crawl / update 中有步骤或文章失败时也是 1），2 参数错误，130 被 Ctrl+C 中断。
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+DATA_DIR = "data"
+
+
+def count_data_files(data_folder):
+    count = 0
+    for _, _, files in os.walk(data_folder):
+        count += sum(1 for name in files if name.endswith(".json"))
+    return count
+
+
+def run_crawl(args):
+    import shutil
+    import CrawlAll
+    if args.reset:
+        # 与管理控制台一致：删除旧数据和进度文件后从头爬取
+        if os.path.exists("datatest"):
+            shutil.rmtree("datatest")
+        if os.path.exists(CrawlAll.PROGRESS_FILE):
+            os.remove(CrawlAll.PROGRESS_FILE)
+        print("✅ 历史数据已删除，开始重新爬取")
+    failures = CrawlAll.crawl()
+    return {"articles": count_data_files("datatest"), "failures": failures}
+
+
+def run_update(args):
+    import crawler
+    failures = crawler.main_update()
+    summary = {"articles": count_data_files(DATA_DIR), "failures": failures}
+    if args.generate:
+        summary["generate"] = run_generate(args)
+    return summary
+
+
+def run_generate(args):
+    import generator
+    argv = ["--jobs", str(args.jobs)]
+    if args.multipage:
+        argv.append("--multipage")
+    if args.site_url:
+        argv += ["--site-url", args.site_url]
+    if args.fetch_media:
+        argv.append("--fetch-media")
+    if args.perf_beacon:
+        argv += ["--perf-beacon", args.perf_beacon]
+    if getattr(args, "watch", False):
+        argv.append("--watch")
+    generator.main(argv)
+    summary = {}
+    if os.path.exists(generator.SIZE_REPORT_FILE):
+        with open(generator.SIZE_REPORT_FILE, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        summary.update(articles=len(report["articles"]), total_raw=report["total_raw"],
+                       total_gzip=report["total_gzip"], total_br=report["total_br"])
+    if os.path.exists(generator.CHANGED_FILES_FILE):
+        with open(generator.CHANGED_FILES_FILE, "r", encoding="utf-8") as f:
+            summary["changed_files"] = sum(1 for line in f if line.strip())
+    return summary
+
+
+def run_serve(args):
+    import static_server
+    static_server.serve(args.directory, args.host, args.port, quiet=args.quiet)
+
+
+def run_api(args):
+    import query_api
+    query_api.serve(args.data_dir, args.host, args.port, quiet=args.quiet, db_path=args.db)
+
+
+def run_index(args):
+    import search_index
+    if args.rebuild and os.path.exists(args.db):
+        os.remove(args.db)
+    index = search_index.SearchIndex(args.db)
+    summary = index.sync(args.data_dir)
+    summary.update(index.counts())
+    print(f"✅ 全文索引共 {summary['articles']} 篇文章，{summary['comments']} 条评论（{args.db}）")
+    return summary
+
+
+def run_search(args):
+    import search_index
+    index = search_index.SearchIndex(args.db)
+    if not args.no_sync:
+        index.sync(args.data_dir)
+    start = time.perf_counter()
+    total, results = index.search(args.query, args.type, args.limit, 0, args.sort)
+    ms = (time.perf_counter() - start) * 1000
+    print(f"共 {total} 条结果（{ms:.1f} ms）")
+    for result in results:
+        where = result["article"]["title"] if args.type == "comment" else result["title"]
+        author = f"{result['author']} " if args.type == "comment" else ""
+        print(f"· [{where}] {author}{result['time']}：{result['snippet']}")
+    return {"total": total, "ms": round(ms, 2), "results": results}
+
+
+def run_loadtest(args):
+    import threading
+    import static_server
+    paths = args.path or static_server.site_paths(args.directory)
+    if not paths:
+        raise ValueError("没有可请求的路径：请用 --path 指定，或先在 --directory 中生成网页")
+    httpd = None
+    url = args.url
+    if not url:
+        # 临时在随机端口启动内置服务器，压测结束后关闭
+        httpd = static_server.make_server(args.directory, "127.0.0.1", 0, quiet=True)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{httpd.server_address[1]}/"
+    print(f"压测 {url}：{len(paths)} 个路径，并发 {args.concurrency}，共 {args.requests} 次请求")
+    try:
+        result = static_server.load_test(url, paths, args.concurrency, args.requests,
+                                         "identity" if args.identity else "br, gzip", args.revalidate)
+    finally:
+        if httpd:
+            httpd.shutdown()
+            httpd.server_close()
+    static_server.print_load_test(result)
+    return result
+
+
+def run_send(args):
+    import mailer
+    cfg = {}
+    if args.config:
+        with open(args.config, "r", encoding="utf-8") as f:
+            cfg.update(json.load(f))
+    for field in mailer.CONFIG_FIELDS:
+        value = getattr(args, field, None)
+        if value:
+            cfg[field] = value
+    # 密码优先从环境变量读取，避免出现在命令行历史和进程列表中
+    cfg["password"] = os.environ.get("SMTP_PASSWORD", cfg.get("password", ""))
+    cfg["port"] = str(cfg.get("port", ""))
+    errors = mailer.validate_config(cfg)
+    if errors:
+        raise ValueError("邮件配置有误：" + "".join(errors))
+    return mailer.deliver(cfg, force=args.force, data_folder=DATA_DIR)
+
+
+def add_generate_arguments(parser):
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="并行渲染文章的进程数，默认 1（串行），0 表示使用全部 CPU 核心")
+    parser.add_argument("--multipage", action="store_true", help="另外导出静态多页面站点及站点地图")
+    parser.add_argument("--site-url", default="", help="站点地图中使用的站点根地址")
+    parser.add_argument("--fetch-media", action="store_true", help="生成前先把文章中引用的图片下载到本地缓存")
+    parser.add_argument("--perf-beacon", default="", help="页面性能统计的上报地址，默认不上报")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="阳气诊所 命令行工具")
+    parser.add_argument("--json", action="store_true", help="结束后在标准输出打印一行 JSON 摘要（日志改写到标准错误）")
+    sub = parser.add_subparsers(dest="command", metavar="命令")
+    sub.required = True
+
+    p = sub.add_parser("crawl", help="全量爬取评论（默认从上次进度继续）")
+    p.add_argument("--reset", action="store_true", help="删除已爬取的数据和进度，从头爬取")
+    p.set_defaults(func=run_crawl)
+
+    p = sub.add_parser("update", help="增量更新最新文章和留言")
+    p.add_argument("--generate", action="store_true", help="更新后接着生成网页")
+    add_generate_arguments(p)
+    p.set_defaults(func=run_update)
+
+    p = sub.add_parser("generate", help="根据 data 目录生成网页")
+    add_generate_arguments(p)
+    p.add_argument("--watch", action="store_true", help="监视模式：data 目录有变化时自动重新生成")
+    p.set_defaults(func=run_generate)
+
+    p = sub.add_parser("serve", help="在本地预览生成的网页")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--directory", default=".", help="网页所在目录，默认当前目录")
+    p.add_argument("--quiet", action="store_true", help="不打印访问日志")
+    p.set_defaults(func=run_serve)
+
+    p = sub.add_parser("api", help="本地 JSON 查询接口（直接读取 data 目录）")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8001)
+    p.add_argument("--data-dir", default=DATA_DIR, help="数据目录，默认 data")
+    p.add_argument("--db", default="search.db", help="全文索引文件，默认 search.db")
+    p.add_argument("--quiet", action="store_true", help="不打印访问日志")
+    p.set_defaults(func=run_api)
+
+    p = sub.add_parser("index", help="增量更新全文索引")
+    p.add_argument("--data-dir", default=DATA_DIR, help="数据目录，默认 data")
+    p.add_argument("--db", default="search.db", help="全文索引文件，默认 search.db")
+    p.add_argument("--rebuild", action="store_true", help="删除旧索引后重建")
+    p.set_defaults(func=run_index)
+
+    p = sub.add_parser("search", help="在全文索引中搜索（支持简繁互搜，多个关键词用空格分隔）")
+    p.add_argument("query")
+    p.add_argument("--type", choices=["comment", "article"], default="comment")
+    p.add_argument("--sort", choices=["rank", "recent"], default="rank", help="rank：相关度（默认）；recent：最新")
+    p.add_argument("--limit", type=int, default=10)
+    p.add_argument("--data-dir", default=DATA_DIR, help="数据目录，默认 data")
+    p.add_argument("--db", default="search.db", help="全文索引文件，默认 search.db")
+    p.add_argument("--no-sync", action="store_true", help="搜索前不检查 data 目录的变化")
+    p.set_defaults(func=run_search)
+
+    p = sub.add_parser("loadtest", help="对网页服务器做简单压测")
+    p.add_argument("--url", help="服务器地址，默认在随机端口临时启动内置服务器")
+    p.add_argument("--directory", default=".", help="网页所在目录（默认请求其构建清单中的全部文件）")
+    p.add_argument("--path", action="append", help="要请求的路径（可重复），如 / 或 /sw.js")
+    p.add_argument("-c", "--concurrency", type=int, default=16, help="并发连接数，默认 16")
+    p.add_argument("-n", "--requests", type=int, default=2000, help="总请求数，默认 2000")
+    p.add_argument("--revalidate", action="store_true", help="带 If-None-Match 重新验证（测试 304）")
+    p.add_argument("--identity", action="store_true", help="不接受压缩（测试未压缩文件的发送）")
+    p.set_defaults(func=run_loadtest)
+
+    p = sub.add_parser("send", help="把已生成的网页或新内容摘要发邮件（密码请用环境变量 SMTP_PASSWORD）")
+    p.add_argument("--config", help="JSON 配置文件，字段与管理控制台的邮件配置相同")
+    p.add_argument("--smtp-server", dest="smtp_server")
+    p.add_argument("--port")
+    p.add_argument("--sender")
+    p.add_argument("--recipient", help="收件人，多个用逗号分隔（共用一个 SMTP 连接）")
+    p.add_argument("--file", default="index.html", help="已生成的 index.html，发送记录保存在同目录")
+    p.add_argument("--subject")
+    p.add_argument("--mode", choices=["site", "digest"],
+                   help="site：网页压缩包（默认）；digest：上次发送以来的新文章和站长答疑摘要")
+    p.add_argument("--security", choices=["auto", "starttls", "ssl", "none"],
+                   help="auto（默认）：465 端口用 SSL，其余用 STARTTLS；none：不加密不登录，用于本地测试服务器")
+    p.add_argument("--force", action="store_true", help="内容没有变化也发送")
+    p.set_defaults(func=run_send)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return EXIT_OK if e.code == 0 else EXIT_USAGE
+
+    summary = {"command": args.command, "ok": False}
+    start = time.perf_counter()
+    log = sys.stderr if args.json else sys.stdout
+    try:
+        with contextlib.redirect_stdout(log):
+            summary.update(args.func(args) or {})
+        # 爬取 / 更新中记录日志后继续执行的失败列在 summary["failures"] 中，同样以失败退出
+        summary["ok"] = not summary.get("failures")
+        exit_code = EXIT_OK if summary["ok"] else EXIT_FAILED
+        if not summary["ok"]:
+            print(f"❌ {args.command} 未全部成功: {'、'.join(summary['failures'])}", file=sys.stderr)
+    except KeyboardInterrupt:
+        print("已中断", file=log)
+        summary["ok"] = args.command in ("serve", "api")
+        exit_code = EXIT_OK if summary["ok"] else EXIT_INTERRUPTED
+    except Exception as e:
+        print(f"❌ {args.command} 失败: {e}", file=sys.stderr)
+        summary["error"] = str(e)
+        exit_code = EXIT_FAILED
+    summary["exit_code"] = exit_code
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False))
+    return exit_code
+
+
+if __name__ == "__main__":
+    if getattr(sys, "frozen", False):
+        # 打包为 exe 后，并行渲染（-j）的子进程需要此调用；直接运行脚本时不必导入 multiprocessing
+        import multiprocessing
+        multiprocessing.freeze_support()
+    sys.exit(main())
@@ -10,6 +10,8 @@ import requests
 from bs4 import BeautifulSoup
 import datetime  # 用于解析发布时间
 
+import jobs
+
 # =================== 配置项 ===================
 BASE_URL = "https://andylee.pro/wp/"
 DATA_DIR = "data"       # 数据存储目录
@@ -18,6 +20,8 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
 }
 TARGET_USERS = ["李宗恩", "andy"]  # 针对特定评论作者做高亮处理
+SITE_TIMEZONE = "America/Los_Angeles"  # 站点显示时间所用时区（文章 ISO 时间为 -08:00/-07:00）
+SITE_UTC_OFFSET_HOURS = -8             # 系统缺少时区数据库时的回退偏移
 
 # =================== 基础爬虫函数 ===================
 
@@ -186,6 +190,35 @@ def get_comments(article_url, selected_color="white", retries=5):
             print(f"✅ 请求文章评论成功, 共获取 {len(results)} 条评论")
     return results
 
+# ------------------- 以下为时间处理相关 -------------------
+
+def get_site_timezone():
+    """
+    返回站点时区对象；若系统缺少 IANA 时区数据（如未安装 tzdata 的 Windows），回退为固定偏移
+    """
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(SITE_TIMEZONE)
+    except Exception:
+        return datetime.timezone(datetime.timedelta(hours=SITE_UTC_OFFSET_HOURS))
+
+def time_text_to_iso(time_text):
+    """
+    把 "YYYY年MM月DD日 HH:MM" 格式的站点本地时间转换为带时区的 ISO 8601 字符串，
+    例如 "2025-01-29T16:49:00-08:00"；无法解析时返回 ""。
+    """
+    if not time_text:
+        return ""
+    match = re.search(r'(\d{4})年(\d{1,2})月(\d{1,2})日\s*(\d{1,2}):(\d{2})', time_text)
+    if not match:
+        return ""
+    try:
+        dt = datetime.datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)),
+                               int(match.group(4)), int(match.group(5)), tzinfo=get_site_timezone())
+    except ValueError:
+        return ""
+    return dt.isoformat()
+
 # ------------------- 以下为评论解析相关 -------------------
 
 def generate_unique_id(article_url, index):
@@ -240,6 +273,7 @@ def parse_comment(comment, article_url, level=0, selected_color="white", index=0
         "id": comment_id,
         "author": comment_user,
         "time": time_text,
+        "time_iso": time_text_to_iso(time_text),
         "content": comment_text,
         "level": level,
         "highlight": highlight,
@@ -371,12 +405,16 @@ def get_current_website_articles(max_pages=1):
         links.extend(page_links)
     return links
 
-def fetch_new_articles(new_urls):
+def fetch_new_articles(new_urls, progress=None):
     """
-    针对每个新的文章 URL，爬取标题、正文、发布时间和评论，返回文章数据列表
+    针对每个新的文章 URL，爬取标题、正文、发布时间和评论，返回文章数据列表。
+    progress(current, total, message, nbytes) 为可选的进度回调（见 jobs.py），取消任务时会抛出 JobCancelled
     """
     new_articles = []
-    for url in new_urls:
+    nbytes = 0
+    for i, url in enumerate(new_urls, start=1):
+        if progress:
+            progress(i, len(new_urls), f"爬取新文章：{url}", nbytes)
         print(f"爬取新文章：{url}")
         title = get_article_title(url)
         content = get_article_content(url)
@@ -387,20 +425,23 @@ def fetch_new_articles(new_urls):
             "title": title,
             "content": content,
             "article_time": article_time,
+            "article_time_iso": time_text_to_iso(article_time),
             "comments": comments,  # 如果请求成功但无评论，则 comments 为 []（有效结果）
             "timestamp": time.time()
         }
         new_articles.append(article_data)
+        nbytes += len(json.dumps(article_data, ensure_ascii=False).encode("utf-8"))
         time.sleep(2)
     return new_articles
 
-def update_new_articles():
+def update_new_articles(progress=None):
     """
     检查网站最新文章与本地 data/page 第一篇是否一致，
     若有新文章则新文章始终插入在最前面，原文章后移，
     且只有当 n 篇新文章全部都成功爬取到有效标题、正文、发布时间和评论
     （即标题不为 “未知标题”，内容不为 “未知内容”，发布时间不为空，且评论数据不为 None；注意：如果文章本身无评论，返回 [] 是有效结果）时，
     才将 n 篇新文章合并原有文章后重新分配页码和顺序写入文件。
+    返回是否成功（没有新文章也算成功）
     """
     print("检查网站最新文章是否有更新……")
     # 对获取最新文章链接给予最多 5 次机会
@@ -415,7 +456,7 @@ def update_new_articles():
         time.sleep(5)
     if not website_links:
         print("❌ 5 次尝试后仍无法获取网站最新文章链接")
-        return
+        return False
 
     local_articles = load_all_local_articles()
     first_local_url = local_articles[0]["article_url"] if local_articles else None
@@ -428,7 +469,7 @@ def update_new_articles():
 
     if new_count == 0:
         print("✅ 本地数据已经是最新的，无需更新文章。")
-        return
+        return True
     else:
         print(f"✅ 检测到 {new_count} 篇新文章。")
         new_urls = website_links[0:new_count]
@@ -438,7 +479,7 @@ def update_new_articles():
     all_valid = False
     new_articles = []
     while attempt < 5:
-        new_articles = fetch_new_articles(new_urls)
+        new_articles = fetch_new_articles(new_urls, progress)
         # 仅当 get_comments 返回 None 才视为请求失败；若返回 [] 则认为文章本身无评论，是有效结果
         invalid_articles = [article for article in new_articles if article["title"] == "未知标题"
                             or article["content"] == "未知内容"
@@ -453,14 +494,18 @@ def update_new_articles():
             time.sleep(5)
     if not all_valid:
         print("❌ 5 次尝试后仍有文章爬取不成功，新文章不写入文件")
-        return
+        return False
 
     # 如果重新爬取后全部成功，则打印成功标志
     print("✅ 新文章全部爬取成功！")
 
     # 全部 n 篇新文章均爬取成功，合并新文章和旧文章，并重新分配页码后写入文件
+    # 重写文件前最后一次检查取消；重写过程中不再检查，避免 data 目录只写了一半
+    if progress:
+        progress(message="重新分配并保存文章…")
     merged_articles = new_articles + local_articles
     reassign_and_save_articles(merged_articles)
+    return True
 
 # =================== 近期留言更新（按文章标题和发布时间匹配） ===================
 
@@ -471,7 +516,7 @@ def get_recent_comment_articles_collection(retries=5):
     假设近期评论区域在 <aside id="recent-comments-5"> 内，
     每个评论项在 <li class="recentcomments"> 中，
     且文章链接在该 li 中的第二个 <a> 标签内（如果存在多个 <a> 标签，否则为第一个）。
-    给予最多 retries 次机会
+    给予最多 retries 次机会，全部失败时返回 None
     """
     url = BASE_URL  # 以首页为例
     attempt = 0
@@ -486,7 +531,7 @@ def get_recent_comment_articles_collection(retries=5):
             print(f"❌ 获取近期评论区域出错：{e}, 尝试第 {attempt} 次")
             if attempt == retries:
                 print("❌ 5 次尝试后仍无法获取近期评论区域")
-                return {}
+                return None
             time.sleep(2)
     soup = BeautifulSoup(response.text, "html.parser")
     recent_comments = soup.find("aside", id="recent-comments-5")
@@ -510,7 +555,7 @@ def get_recent_comment_articles_collection(retries=5):
             title_to_link[title] = link
     return title_to_link
 
-def update_recent_comments_by_title():
+def update_recent_comments_by_title(progress=None):
     """
     对于近期留言中涉及的文章，
     先爬取整个近期评论区域得到【标题, 链接】集合，
@@ -518,17 +563,24 @@ def update_recent_comments_by_title():
     如果找到则重新爬取该文章的数据（包括标题、正文、发布时间和评论），
     只有当爬取到的数据有效时才更新，否则保留原数据。
     如果爬取到的文章发布时间为空，则退回到用文章 URL 进行匹配。
+    返回是否成功：近期评论区域获取失败或有文章保存失败时返回 False
     """
     print("开始检查近期留言更新（按文章标题和发布时间匹配）……")
     title_to_url = get_recent_comment_articles_collection()
+    if title_to_url is None:
+        return False
     if not title_to_url:
         print("近期留言未获取到有效的文章数据。")
-        return
+        return True
 
     local_articles = load_all_local_articles()  # data/page 下的文章
     fixed_articles = load_fixed_articles()        # data/fixed 下的文章
     updated = 0
-    for title, url in title_to_url.items():
+    failed = 0
+    nbytes = 0
+    for i, (title, url) in enumerate(title_to_url.items(), start=1):
+        if progress:
+            progress(i, len(title_to_url), f"检查近期留言：{title}", nbytes)
         # 先获取网页上最新的发布时间，用于匹配
         new_article_time = get_article_time(url, old_time="")
         match_found = None
@@ -577,6 +629,7 @@ def update_recent_comments_by_title():
             new_time = get_article_time(url, old_time=match_found.get("article_time"))
             if new_time:
                 match_found["article_time"] = new_time
+                match_found["article_time_iso"] = time_text_to_iso(new_time)
             else:
                 print(f"❌ 发布时间爬取失败，保留原有发布时间")
             new_comments = get_comments(url)
@@ -590,25 +643,57 @@ def update_recent_comments_by_title():
                     json.dump(match_found, f, ensure_ascii=False, indent=2)
                 print(f"✅ 更新完成：{location} - {match_found['title']}")
                 updated += 1
+                nbytes += os.path.getsize(match_found["filename"])
             except Exception as e:
                 print(f"❌ 保存更新失败（标题：{match_found['title']}）：{e}")
+                failed += 1
             time.sleep(2)
         else:
             print(f"❌ 未在本地数据中找到匹配文章（标题及发布时间不匹配）：{title}")
     print(f"✅ 近期留言按标题和发布时间匹配更新完成，共更新 {updated} 篇文章。")
+    return failed == 0
+
+# =================== 搜索索引 ===================
+
+def update_search_index(progress=None):
+    """
+    把本次更新的文章同步到服务端全文索引（search_index.py，只处理有变化的文件）。
+    索引只用于查询接口，更新失败不影响数据本身（只记录日志并返回 False）
+    """
+    try:
+        import search_index
+        search_index.sync_index(DATA_DIR, progress=progress)
+    except jobs.JobCancelled:
+        raise
+    except Exception as e:
+        print(f"❌ 更新搜索索引失败: {e}")
+        return False
+    return True
 
 # =================== 主更新流程 ===================
 
-def main_update():
+def main_update(progress=None):
     """
     主流程：
     1. 检查网站是否有新文章，如有则更新文章并重新分配页码与顺序；
     2. 检查近期留言中涉及的文章，按文章标题和发布时间匹配更新其数据；
-    3. 打印更新完成提示。
-    """
-    update_new_articles()
-    update_recent_comments_by_title()
-    print("✅ 所有更新完成！")
+    3. 增量更新服务端全文索引；
+    4. 打印更新完成提示。
+    progress 为可选的进度回调，会传给每一步。
+    每一步失败时只记录日志、继续下一步，返回失败的步骤名称列表（全部成功时为空）
+    """
+    failed = []
+    if not update_new_articles(progress):
+        failed.append("新文章")
+    if not update_recent_comments_by_title(progress):
+        failed.append("近期留言")
+    if not update_search_index(progress):
+        failed.append("搜索索引")
+    if failed:
+        print(f"❌ 更新结束，以下步骤失败：{'、'.join(failed)}")
+    else:
+        print("✅ 所有更新完成！")
+    return failed
 
 if __name__ == "__main__":
     main_update()
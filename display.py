@@ -4,11 +4,7 @@
 import sys
 import os
 import shutil
-import threading
-import smtplib
-import re
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
+import multiprocessing
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget,
@@ -26,9 +22,8 @@ from apscheduler.jobstores.memory import MemoryJobStore
 import CrawlAll      # 旧的全量爬虫
 import crawler       # 新的增量更新爬虫（crawler.py）
 import generator     # 网页生成模块
-
-# 简单邮箱格式校验正则
-EMAIL_REGEX = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+import mailer        # 发送网页邮件
+import jobs          # 后台任务队列（写数据的任务依次执行）
 
 
 class EmailConfigDialog(QDialog):
@@ -75,18 +70,23 @@ class EmailConfigDialog(QDialog):
         self.sender_edit    = make_line_edit("如 sender@example.com", "发件人邮箱地址，例如 yourname@qq.com")
         self.password_edit  = make_line_edit("邮箱授权码/密码",        "邮箱 SMTP 授权码或登录密码")
         self.password_edit.setEchoMode(QLineEdit.Password)
-        self.recipient_edit = make_line_edit("如 receiver@example.com","收件人邮箱地址")
+        self.recipient_edit = make_line_edit("如 receiver@example.com","收件人邮箱地址，多个收件人用逗号分隔")
         self.interval_edit  = make_line_edit("分钟，例如 60",         "发送间隔，单位分钟(1-10080)")
         self.interval_edit.setValidator(QIntValidator(1, 10080, self))
         self.file_edit      = make_line_edit("如 index.html 或 /path/to/index.html",
                                              "要发送的文件路径，确保文件存在")
         self.subject_edit   = make_line_edit("如 自动发送网页",       "邮件主题")
+        self.mode_combo = QComboBox()
+        self.mode_combo.setFont(font)
+        self.mode_combo.addItem("网页压缩包（内容有变化时才发送）", "site")
+        self.mode_combo.addItem("摘要（只含上次发送以来的新文章和站长答疑）", "digest")
 
         layout.addRow("SMTP 服务器:",    self.smtp_edit)
         layout.addRow("端口:",           self.port_edit)
         layout.addRow("发件人 Email:",   self.sender_edit)
         layout.addRow("密码:",           self.password_edit)
         layout.addRow("收件人 Email:",   self.recipient_edit)
+        layout.addRow("发送内容:",       self.mode_combo)
         layout.addRow("发送间隔 (分钟):", self.interval_edit)
         layout.addRow("文件路径:",       self.file_edit)
         layout.addRow("邮件主题:",       self.subject_edit)
@@ -119,23 +119,9 @@ class EmailConfigDialog(QDialog):
 
     def on_accept(self):
         cfg = self.get_config()
-        errors = []
-        if not cfg['smtp_server']:
-            errors.append("SMTP 服务器不能为空。")
-        if not cfg['port'].isdigit():
-            errors.append("端口必须为数字。")
-        if not EMAIL_REGEX.match(cfg['sender']):
-            errors.append("发件人邮箱格式不正确。")
-        if not cfg['password']:
-            errors.append("SMTP 授权码/密码不能为空。")
-        if not EMAIL_REGEX.match(cfg['recipient']):
-            errors.append("收件人邮箱格式不正确。")
+        errors = mailer.validate_config(cfg)
         if not cfg['interval'].isdigit():
             errors.append("发送间隔必须为数字。")
-        if not cfg['file'] or not os.path.exists(cfg['file']):
-            errors.append("文件路径不存在或为空。")
-        if not cfg['subject']:
-            errors.append("邮件主题不能为空。")
         if errors:
             QMessageBox.critical(self, "输入错误", "\n".join(errors), QMessageBox.Ok)
             return
@@ -150,7 +136,8 @@ class EmailConfigDialog(QDialog):
             'recipient':   self.recipient_edit.text().strip(),
             'interval':    self.interval_edit.text().strip(),
             'file':        self.file_edit.text().strip(),
-            'subject':     self.subject_edit.text().strip()
+            'subject':     self.subject_edit.text().strip(),
+            'mode':        self.mode_combo.currentData()
         }
 
 
@@ -195,6 +182,7 @@ class MainWindow(QMainWindow):
             ("🔄 更新最新留言并生成网页", self.update_and_generate),
             ("⏰ 启动定时每天12点更新",  self.start_schedule),
             ("📧 配置定时发送网页邮件",  self.open_email_config),
+            ("⏹ 取消当前任务",         self.cancel_jobs),
         ]
         for text, handler in buttons:
             btn = QPushButton(text)
@@ -210,6 +198,19 @@ class MainWindow(QMainWindow):
         )
         self.scheduler.start()
         self.scheduled = False
+        # 按钮和定时任务都只往队列里提交任务，由同一个工作线程依次执行；进度事件显示在 status_label
+        self.jobs = jobs.JobManager(listener=self.on_job_event)
+
+    def on_job_event(self, event):
+        # 在工作线程中调用，通过信号转到界面线程更新状态栏
+        text = jobs.describe_event(event)
+        if event["state"] == jobs.DONE and event["name"] == "email" and event["result"]:
+            text += "：" + mailer.describe_summary(event["result"])
+        self.status_updated.emit(text)
+
+    def cancel_jobs(self):
+        if not self.jobs.cancel():
+            self.status_updated.emit("状态：当前没有正在运行或排队的任务")
 
     def crawl_comments(self):
         msg = QMessageBox(self)
@@ -227,51 +228,40 @@ class MainWindow(QMainWindow):
         reply = msg.exec_()
         reset = (reply == QMessageBox.Yes)
 
-        def task(do_reset):
-            if do_reset:
-                self.status_updated.emit("状态：正在删除旧数据…")
-                try:
-                    if os.path.exists("datatest"):
-                        shutil.rmtree("datatest")
-                    prog_file = getattr(CrawlAll, "PROGRESS_FILE", "progress.txt")
-                    if os.path.exists(prog_file):
-                        os.remove(prog_file)
-                    self.status_updated.emit("状态：✔ 历史数据已删除，开始重新爬取")
-                except Exception as e:
-                    self.status_updated.emit(f"状态：✖ 删除失败: {e}")
+        def task(progress):
+            if reset:
+                progress(message="正在删除旧数据…")
+                if os.path.exists("datatest"):
+                    shutil.rmtree("datatest")
+                prog_file = getattr(CrawlAll, "PROGRESS_FILE", "progress.txt")
+                if os.path.exists(prog_file):
+                    os.remove(prog_file)
+                progress(message="历史数据已删除，开始重新爬取")
             else:
-                self.status_updated.emit("状态：从上次进度继续爬取…")
+                progress(message="从上次进度继续爬取…")
+            failures = CrawlAll.crawl(progress)
+            if failures:
+                raise RuntimeError(f"{len(failures)} 篇文章的标题或正文获取失败，详见日志")
 
-            try:
-                CrawlAll.crawl()
-                self.status_updated.emit("状态：✔ 评论爬取完成")
-            except Exception as e:
-                self.status_updated.emit(f"状态：✖ 爬取失败: {e}")
-
-        threading.Thread(target=task, args=(reset,), daemon=True).start()
+        self.jobs.submit("crawl", task, "爬取评论")
 
     def generate_html(self):
-        def task():
-            self.status_updated.emit("状态：正在根据本地 data 生成网页…")
-            try:
-                generator.main()
-                self.status_updated.emit("状态：✔ 网页生成完成")
-            except Exception as e:
-                self.status_updated.emit(f"状态：✖ 生成失败: {e}")
-        threading.Thread(target=task, daemon=True).start()
+        def task(progress):
+            progress(message="根据本地 data 生成网页…")
+            generator.main()
+        self.jobs.submit("generate", task, "生成网页")
 
     def update_and_generate(self):
-        def task():
-            self.status_updated.emit("状态：正在更新最新留言并生成网页…")
-            try:
-                # 调用 crawler.py 中的主更新流程
-                crawler.main_update()
-                # 然后再生成最新的网页
-                generator.main()
-                self.status_updated.emit("状态：✔ 更新并生成完成")
-            except Exception as e:
-                self.status_updated.emit(f"状态：✖ 更新失败: {e}")
-        threading.Thread(target=task, daemon=True).start()
+        # 定时任务也调用此方法：上一次更新还在排队时不会重复加入
+        def task(progress):
+            # 调用 crawler.py 中的主更新流程
+            failures = crawler.main_update(progress)
+            # 然后再生成最新的网页（部分步骤失败时仍按现有数据生成，再把任务标为失败）
+            progress(message="生成网页…")
+            generator.main()
+            if failures:
+                raise RuntimeError(f"以下步骤失败：{'、'.join(failures)}（网页已按现有数据生成）")
+        self.jobs.submit("update", task, "更新最新留言并生成网页")
 
     def start_schedule(self):
         if self.scheduled:
@@ -299,28 +289,16 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "设置完成", f"每 {cfg['interval']} 分钟发送一次邮件。", QMessageBox.Ok)
 
     def send_email_job(self, cfg):
-        generator.main()
-        filepath = cfg.get('file', 'index.html')
-        try:
-            msg = MIMEMultipart()
-            msg['Subject'] = cfg['subject']
-            msg['From']    = cfg['sender']
-            msg['To']      = cfg['recipient']
-            with open(filepath, 'rb') as f:
-                part = MIMEApplication(f.read(), _subtype='html')
-                part.add_header('Content-Disposition', 'attachment', filename=os.path.basename(filepath))
-                msg.attach(part)
-            smtp = smtplib.SMTP(cfg['smtp_server'], int(cfg['port']))
-            smtp.starttls()
-            smtp.login(cfg['sender'], cfg['password'])
-            smtp.send_message(msg)
-            smtp.quit()
-            self.status_updated.emit("状态：✔ 邮件发送成功")
-        except Exception as e:
-            self.status_updated.emit(f"状态：✖ 邮件发送失败: {e}")
+        # 只发送已生成的网页，不重新生成；放进任务队列，避免读到更新任务写了一半的文件
+        def task(progress):
+            progress(message="检查内容是否有变化…")
+            return mailer.deliver(cfg)
+        self.jobs.submit("email", task, "发送邮件")
 
 
 if __name__ == '__main__':
+    # 打包为 exe 后，生成网页的并行渲染子进程需要此调用
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     app.setFont(QFont('Arial', 16))
     app.setStyleSheet("""
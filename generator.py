@@ -1,34 +1,93 @@
 import os
+import sys
 import json
 import hashlib
 import re
+import html as html_lib
+import datetime
+import gzip
+import math
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse, parse_qs
+from xml.sax.saxutils import escape as xml_escape
+
+from site_layout import ASSETS_DIR, BUILD_MANIFEST_FILE
+from media_cache import MEDIA_DIR, cache_media, load_media_index, localize_article, media_files, relocate_media_html
+
+try:
+    import brotli  # 可选依赖：pip install brotli，用于生成 .br 预压缩文件
+except ImportError:
+    brotli = None
+
+try:
+    import opencc  # 可选依赖：pip install opencc，用于生成时预先做简繁转换
+except ImportError:
+    opencc = None
+
+SITE_TIMEZONE = "America/Los_Angeles"  # 站点显示时间所用时区，与 crawler.py 保持一致
+SITE_UTC_OFFSET_HOURS = -8             # 系统缺少时区数据库时的回退偏移
+ASSET_HASH_LENGTH = 10                 # 资源文件名中内容哈希的长度
+SIZE_REPORT_FILE = "size-report.json"  # 每次生成的体积报告（与 index.html 同目录）
+SIZE_REPORT_TOP = 10                   # 控制台中列出体积最大的文章数
+# 页面语言选项 -> OpenCC 配置（与原先页面中 opencc-js 的 cn->tw、tw->cn 一致）
+LANGUAGE_CONFIGS = {"traditional": "s2tw", "simplified": "tw2s"}
+FOLD_VARIANT_CONFIGS = ("s2t", "s2tw", "s2hk")  # 搜索时把这些繁体写法折叠回简体
+RENDER_CHUNKS_PER_JOB = 4              # 并行渲染时每个进程平均分到的任务块数（块越多负载越均衡）
+MULTIPAGE_ARTICLES_DIR = "articles"    # 多页面导出：每篇文章一个 HTML
+MULTIPAGE_LIST_DIR = "list"            # 多页面导出：文章列表分页
+MULTIPAGE_ARTICLES_PER_PAGE = 10       # 与单页应用中 articlesPerPage 保持一致
+SITEMAP_FILE = "sitemap.xml"
+ARTICLE_SHARD_SIZE = 20                # 每个文章数据分片包含的文章数
+ANSWER_SHARD_SIZE = 100                # 站长答疑索引每个分片包含的回复数
+SERVICE_WORKER_FILE = "sw.js"          # Service Worker：必须与 index.html 同目录、不带哈希，服务器应禁止缓存该文件
+CHANGED_FILES_FILE = "changed-files.txt"     # 与上次生成相比有变化的文件（可用于 rsync --files-from）
+WATCH_POLL_INTERVAL = 1.0              # 监视模式下扫描 data 目录的间隔（秒）
+WATCH_DEBOUNCE = 2.0                   # 最后一次改动后再等待多久才重新生成（秒），把批量写入合并为一次
+# 影响单篇文章渲染结果的字段；这些字段不变时监视模式直接复用上次渲染的结果（page/order 变化不需要重新渲染）
+RENDER_FIELDS = ("article_url", "title", "content", "article_time", "article_time_iso", "comments")
+
+
+# 列出 data 文件夹下各子文件夹中的 JSON 文件，返回 [(子文件夹名, 文件路径)]（按名称排序，保证每次生成结果一致）
+def list_data_files(data_folder):
+    files = []
+    for folder_name in sorted(os.listdir(data_folder)):
+        folder_path = os.path.join(data_folder, folder_name)
+        if os.path.isdir(folder_path):
+            for filename in sorted(os.listdir(folder_path)):
+                if filename.endswith(".json"):
+                    files.append((folder_name, os.path.join(folder_path, filename)))
+    return files
+
+
+# 读取单个 JSON 文件；fixed 文件夹中的固定页面没有页码时排在最后
+def load_article(folder_name, path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if folder_name == "fixed" and "page" not in data:
+        data["page"] = 9999
+    return data
+
+
+# 固定页面的 page/order 相同，再按固定页面编号（page_id）和链接排序，使顺序稳定
+def sort_articles(articles):
+    articles.sort(key=lambda x: (x.get("page", 9999), x.get("order", 9999),
+                                 fixed_page_number(x.get("article_url", "")), x.get("article_url", "")))
+    return articles
 
 
 # 读取数据并排序
 def read_and_sort_data(data_folder):
-    articles = []
-    # 遍历 data 文件夹下所有子文件夹
-    for folder_name in os.listdir(data_folder):
-        folder_path = os.path.join(data_folder, folder_name)
-        if os.path.isdir(folder_path):
-            # 针对 fixed 文件夹，读取其中所有 JSON 文件（该文件夹内无子文件夹）
-            if folder_name == "fixed":
-                for filename in os.listdir(folder_path):
-                    if filename.endswith(".json"):
-                        with open(os.path.join(folder_path, filename), 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            if "page" not in data:
-                                data["page"] = 9999
-                            articles.append(data)
-            else:
-                # 其他子文件夹，例如 "page"
-                for filename in os.listdir(folder_path):
-                    if filename.endswith(".json"):
-                        with open(os.path.join(folder_path, filename), 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            articles.append(data)
-    articles.sort(key=lambda x: (x.get("page", 9999), x.get("order", 9999)))
-    return articles
+    articles = [load_article(folder_name, path) for folder_name, path in list_data_files(data_folder)]
+    return sort_articles(articles)
+
+
+# 固定页面链接中的 page_id（如 ?page_id=18 -> 18），没有时返回 0
+def fixed_page_number(article_url):
+    value = parse_qs(urlparse(article_url).query).get("page_id", [""])[0]
+    return int(value) if value.isdigit() else 0
 
 
 # 生成评论唯一ID
@@ -36,94 +95,911 @@ def generate_unique_id(article_url, index):
     return hashlib.md5(f"{article_url}-{index}".encode("utf-8")).hexdigest()
 
 
-# 解析评论并返回 HTML（递归处理回复评论）
-def parse_comment(comment, article_url, level=0, selected_color="var(--background-color)", index=0):
-    author = comment['author']
-    time_str = comment['time']
-    content = comment['content']
-    highlight = comment.get('highlight', False)
-    children = comment.get('children', [])
-
-    if highlight:
-        highlight_class = "highlight"
-        bg_color = "#fff5cc"
-    else:
-        highlight_class = "reply"
-        bg_color = selected_color
-
-    current_index = index
-    comment_id = generate_unique_id(article_url, current_index)
-    index = current_index + 1
-
-    html = f'<div class="comment {highlight_class}" style="background-color:{bg_color}" id="{comment_id}" onclick="removeHighlight(this)">'
-    html += f'<div class="author">{author}</div>'
-    html += f'<div class="time">{time_str}</div>'
-    html += f'<div class="comment-text">{content}</div>'
-
-    if children:
-        replies_html = ""
-        for child in children:
-            child_html, index = parse_comment(child, article_url, level + 1, selected_color, index)
-            replies_html += child_html
-        if replies_html:
-            html += f'<div class="replies">{replies_html}</div>'
-    html += '</div>'
-    return html, index
-
-
-# 生成完整 HTML 页面
-def generate_html(articles, result_file="index.html"):
-    articles_data = []
+# 站点时区（缺少 IANA 时区数据时回退为固定偏移）
+def get_site_timezone():
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(SITE_TIMEZONE)
+    except Exception:
+        return datetime.timezone(datetime.timedelta(hours=SITE_UTC_OFFSET_HOURS))
+
+
+# 把时间转换为毫秒时间戳：优先使用爬虫保存的带时区 ISO 时间，旧数据回退解析 "YYYY年MM月DD日 HH:MM"
+def to_epoch_ms(time_iso, time_text=""):
+    if time_iso:
+        try:
+            return int(datetime.datetime.fromisoformat(time_iso).timestamp() * 1000)
+        except ValueError:
+            pass
+    match = re.search(r'(\d{4})年(\d{1,2})月(\d{1,2})日\s*(\d{1,2}):(\d{2})', time_text or "")
+    if not match:
+        return 0
+    try:
+        dt = datetime.datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)),
+                               int(match.group(4)), int(match.group(5)), tzinfo=get_site_timezone())
+    except ValueError:
+        return 0
+    return int(dt.timestamp() * 1000)
+
+
+# 按先序遍历评论树（与 parse_comment 生成评论 ID 的顺序一致）
+def iter_comments(comments):
+    stack = list(reversed(comments))
+    while stack:
+        comment = stack.pop()
+        yield comment
+        stack.extend(reversed(comment.get('children', [])))
+
+
+# 把评论 HTML 转成纯文本（用于预览）
+def html_to_text(fragment):
+    text = re.sub(r'<[^>]+>', ' ', fragment or "")
+    return re.sub(r'\s+', ' ', html_lib.unescape(text)).strip()
+
+
+# 单篇文章的搜索数据：标题、发布时间、标题栏与正文的纯文本，以及每条评论的 [ID, 作者, 时间, 时间戳, 纯文本]。
+# 由搜索 Worker 使用（评论顺序与评论 ID 一致），页面本身不需要加载
+def build_search_entry(article_url, article_title, article_time, header_html, article_content, comments):
+    return {
+        "title": article_title,
+        "time": article_time,
+        "header": html_to_text(header_html),
+        "content": html_to_text(article_content),
+        "comments": [
+            [generate_unique_id(article_url, index), comment["author"], comment["time"],
+             to_epoch_ms(comment.get("time_iso"), comment["time"]), html_to_text(comment["content"])]
+            for index, comment in enumerate(iter_comments(comments or []))
+        ],
+    }
+
+
+# 站长答疑索引：每条高亮评论（crawler 按 TARGET_USERS 标记的李宗恩 / andy 回复）连同它所回复的评论，
+# 条目为 [评论ID, 文章链接, 作者, 时间, 时间戳, 纯文本, 被回复的评论]，被回复的评论为 [ID, 作者, 时间, 纯文本]，
+# 直接评论文章时为 None。按回复时间从旧到新排序，新的回复总是排在最后
+def build_answer_index(articles):
+    answers = []
     for article in articles:
         article_url = article["article_url"]
-        article_title = article["title"]
-        # 文章内容：如果没有 content 字段则提示加载失败
-        article_content = article.get("content", "文章内容加载失败")
-        # 文章发布时间：从数据字段 "article_time" 中提取（如果没有则显示“未知时间”）
-        article_time = article.get("article_time", "未知时间")
-        comments = article.get("comments", [])
-        all_comments_html = []
+        stack = [(comment, None) for comment in reversed(article.get("comments") or [])]
         index = 0
-        for comment in comments:
-            comment_html, index = parse_comment(comment, article_url, selected_color="var(--background-color)",
-                                                index=index)
-            all_comments_html.append(comment_html)
-        comments_html = "\n".join(all_comments_html)
-        # 生成文章部分 HTML，其中包含文章标题、发布时间、正文，
-        # 在正文和评论之间添加分界线和“评论内容”标题
-        full_html = (
-                f"<div class='article-header'>"
-                f"<h2>{article_title}</h2>"
-                f"<div class='article-time'>发布时间：{article_time}</div>"
-                f"<a href='{article_url}' class='origin-link' target='_blank'>🔗 查看文章原文</a>"
-                f"</div>"
-                f"<div class='article-content'>{article_content}</div>"
-                f"<div class='article-divider'><hr><h3>💬 评论内容</h3></div>"
-                + comments_html
+        # 与 iter_comments 相同的先序遍历，评论 ID 与页面中一致
+        while stack:
+            comment, parent = stack.pop()
+            comment_id = generate_unique_id(article_url, index)
+            index += 1
+            if comment.get("highlight"):
+                answers.append([comment_id, article_url, comment["author"], comment["time"],
+                                to_epoch_ms(comment.get("time_iso"), comment["time"]),
+                                html_to_text(comment["content"]), parent])
+            question = [comment_id, comment["author"], comment["time"], html_to_text(comment["content"])]
+            stack.extend((child, question) for child in reversed(comment.get("children", [])))
+    return sorted(answers, key=lambda a: (a[4] or 0, a[1], a[0]))
+
+
+# 把一组评论（含全部回复）的 HTML 依次追加到 out 列表中，返回最新的索引值。
+# 用显式栈做先序遍历：每段 HTML 只写入一次，耗时与评论数成线性关系，也不受递归深度限制。
+# 评论不带行内样式，背景色由 .comment.highlight / .comment.reply 的样式（CSS 变量）决定
+def render_comments(comments, article_url, out, index=0):
+    stack = [(False, comment) for comment in reversed(comments)]
+    while stack:
+        is_closing, item = stack.pop()
+        if is_closing:
+            out.append(item)
+            continue
+        comment = item
+        author = comment['author']
+        time_str = comment['time']
+        content = comment['content']
+        children = comment.get('children', [])
+        highlight_class = "highlight" if comment.get('highlight', False) else "reply"
+
+        comment_id = generate_unique_id(article_url, index)
+        index += 1
+
+        out.append(f'<div class="comment {highlight_class}" id="{comment_id}" onclick="removeHighlight(this)">')
+        out.append(f'<div class="author">{author}</div>')
+        out.append(f'<div class="time">{time_str}</div>')
+        out.append(f'<div class="comment-text">{content}</div>')
+
+        if children:
+            out.append('<div class="replies">')
+            # 子评论全部输出后再闭合 replies 与当前评论
+            stack.append((True, '</div></div>'))
+            stack.extend((False, child) for child in reversed(children))
+        else:
+            out.append('</div>')
+    return index
+
+
+# 解析评论并返回 HTML 和最新的索引值
+def parse_comment(comment, article_url, level=0, index=0):
+    out = []
+    index = render_comments([comment], article_url, out, index)
+    return "".join(out), index
+
+
+# 生成一篇文章全部评论的 HTML，顶层评论之间以换行分隔
+def render_comments_html(comments, article_url):
+    out = []
+    index = 0
+    for position, comment in enumerate(comments):
+        if position:
+            out.append("\n")
+        index = render_comments([comment], article_url, out, index)
+    return "".join(out)
+
+
+_converters = {}
+
+
+# 返回 OpenCC 转换函数（每个进程内按配置缓存）；未安装 opencc 时原样返回
+def make_converter(config):
+    if opencc is None:
+        return lambda text: text
+    if config not in _converters:
+        _converters[config] = opencc.OpenCC(config).convert
+    return _converters[config]
+
+
+# 只转换 HTML 中标签以外的文本，避免改动链接、属性等
+def convert_html_text(fragment, convert):
+    parts = re.split(r'(<[^>]*>)', fragment)
+    return "".join(part if part.startswith("<") else convert(part) for part in parts)
+
+
+# 生成逐字转换表，只保留转换前后不同的字
+def build_char_map(chars, convert):
+    ordered = sorted(chars)
+    converted = convert("\n".join(ordered)).split("\n")
+    if len(converted) != len(ordered):
+        converted = [convert(c) for c in ordered]
+    return {c: v for c, v in zip(ordered, converted) if v != c}
+
+
+# 收集文本中出现的全部非 ASCII 字符
+def collect_chars(texts):
+    chars = set()
+    for text in texts:
+        chars.update(text)
+    return {c for c in chars if ord(c) > 127}
+
+
+# 搜索用的“繁 -> 简”折叠表：覆盖语料中每个字的各种繁体写法（台湾、香港、标准繁体，
+# 以及按词转换得到的写法，如 头发 -> 頭髮），读者输入任意一种写法都能匹配到
+def build_fold_map(chars, language_shards):
+    variants = set(chars)
+    for shard in language_shards.values():
+        variants.update(collect_chars(shard["articles"]))
+    for config in FOLD_VARIANT_CONFIGS:
+        variants.update(v for v in build_char_map(chars, make_converter(config)).values() if len(v) == 1)
+    tw2s = make_converter("tw2s")
+    hk2s = make_converter("hk2s")
+    return build_char_map(variants, lambda text: hk2s(tw2s(text)))
+
+
+# 组装各语言数据：render_article 已预先转换好的文章/评论 HTML，加上界面短文本用的逐字转换表
+def build_language_shards(localized_articles, chars):
+    if opencc is None:
+        print("❌ 未安装 opencc，简体/繁体版本将与原文相同（pip install opencc）")
+    shards = {}
+    for lang, config in LANGUAGE_CONFIGS.items():
+        shards[lang] = {
+            "articles": [localized[lang] for localized in localized_articles],
+            "chars": build_char_map(chars, make_converter(config)),
+        }
+    return shards
+
+
+# 渲染单篇文章，返回 (页面数据, 体积统计, 各语言版本的 HTML, 搜索数据)。
+# 只依赖传入的文章数据，可以在子进程中并行执行
+def render_article(article):
+    article_url = article["article_url"]
+    article_title = article["title"]
+    # 文章内容：如果没有 content 字段则提示加载失败
+    article_content = article.get("content", "文章内容加载失败")
+    # 文章发布时间：从数据字段 "article_time" 中提取（如果没有则显示“未知时间”）
+    article_time = article.get("article_time", "未知时间")
+    comments = article.get("comments", [])
+    comments_html = render_comments_html(comments, article_url)
+    # 生成文章部分 HTML，其中包含文章标题、发布时间、正文，
+    # 在正文和评论之间添加分界线和“评论内容”标题
+    header_html = (
+            f"<div class='article-header'>"
+            f"<h2>{article_title}</h2>"
+            f"<div class='article-time'>发布时间：{article_time}</div>"
+            f"<a href='{article_url}' class='origin-link' target='_blank'>🔗 查看文章原文</a>"
+            f"</div>"
+    )
+    full_html = (
+            header_html
+            + f"<div class='article-content'>{article_content}</div>"
+            + f"<div class='article-divider'><hr><h3>💬 评论内容</h3></div>"
+            + comments_html
+    )
+    article_data = {
+        "title": article_title,
+        "article_time": article_time,
+        "article_timestamp": to_epoch_ms(article.get("article_time_iso"), article_time),
+        "article_url": article_url,
+        "comments_html": full_html
+    }
+    size = {
+        "title": article_title,
+        "article_url": article_url,
+        "comment_count": sum(1 for _ in iter_comments(comments or [])),
+        "article_bytes": len(full_html.encode("utf-8")) - len(comments_html.encode("utf-8")),
+        "comments_bytes": len(comments_html.encode("utf-8")),
+        "gzip_bytes": len(gzip.compress(full_html.encode("utf-8"), compresslevel=9, mtime=0))
+    }
+    localized = {lang: convert_html_text(full_html, make_converter(config))
+                 for lang, config in LANGUAGE_CONFIGS.items()}
+    return article_data, size, localized, build_search_entry(article_url, article_title, article_time,
+                                                                 header_html, article_content, comments)
+
+
+def render_article_chunk(chunk):
+    return [render_article(article) for article in chunk]
+
+
+# 文章渲染缓存的键：只取影响渲染结果的字段
+def render_key(article):
+    fields = {name: article.get(name) for name in RENDER_FIELDS}
+    return hashlib.sha256(json.dumps(fields, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# 渲染全部文章。jobs > 1 时把文章切成若干块分给进程池，
+# executor.map 按提交顺序返回结果，因此输出与串行渲染逐字节一致。
+# 传入 cache（dict）时只渲染缓存中没有的文章，并把缓存清理为本次用到的文章
+def render_articles(articles, jobs=1, cache=None):
+    if cache is not None:
+        keys = [render_key(article) for article in articles]
+        missing = {}
+        for key, article in zip(keys, articles):
+            if key not in cache:
+                missing.setdefault(key, article)
+        for key, result in zip(missing, render_articles(list(missing.values()), jobs)):
+            cache[key] = result
+        for key in set(cache) - set(keys):
+            del cache[key]
+        if missing:
+            print(f"重新渲染 {len(missing)} 篇文章，复用 {len(articles) - len(missing)} 篇")
+        return [cache[key] for key in keys]
+    if jobs <= 1 or len(articles) < 2:
+        return [render_article(article) for article in articles]
+    chunk_size = max(1, math.ceil(len(articles) / (jobs * RENDER_CHUNKS_PER_JOB)))
+    chunks = [articles[i:i + chunk_size] for i in range(0, len(articles), chunk_size)]
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for chunk_results in executor.map(render_article_chunk, chunks):
+            results.extend(chunk_results)
+    return results
+
+
+# 生成完整 HTML 页面，jobs 为并行渲染的进程数；
+# multipage 为 True 时另外导出每篇文章一个 HTML 的静态多页面站点，site_url 用于站点地图中的绝对地址；
+# render_cache 为监视模式下跨多次生成保留的文章渲染缓存
+def generate_html(articles, result_file="index.html", jobs=1, multipage=False, site_url="", render_cache=None,
+                  perf_beacon=""):
+    # 图片改为引用本地缓存（media_cache.py 已下载的）并延迟加载，iframe 改为点击后加载
+    media_dir = os.path.join(os.path.dirname(result_file), MEDIA_DIR)
+    media_index = load_media_index(media_dir)
+    rendered = render_articles([localize_article(article, media_index) for article in articles], jobs, render_cache)
+    articles_data = [result[0] for result in rendered]
+    article_sizes = [result[1] for result in rendered]
+    search_corpus = [result[3] for result in rendered]
+
+    # 页面可能出现的全部字符：文章、评论（含搜索结果摘要）及页面界面文字
+    chars = collect_chars([INDEX_TEMPLATE, APP_JS, SEARCH_WORKER_JS]
+                          + [a["title"] + a["comments_html"] for a in articles_data])
+    language_shards = build_language_shards([result[2] for result in rendered], chars)
+    outputs = write_site(articles_data, search_corpus, build_answer_index(articles), language_shards,
+                         build_fold_map(chars, language_shards), result_file, perf_beacon)
+    multipage_files = []
+    if multipage:
+        multipage_files = write_multipage_site(articles, articles_data, outputs["css"],
+                                               os.path.dirname(result_file), site_url)
+    for path in list(outputs.values()) + multipage_files:
+        write_precompressed(path)
+    write_size_report(article_sizes, outputs,
+                      os.path.join(os.path.dirname(result_file), SIZE_REPORT_FILE), multipage_files)
+    write_build_manifest(list(outputs.values()) + multipage_files + media_files(media_index, media_dir),
+                         os.path.dirname(result_file))
+
+
+# 生成内容哈希（用于带哈希的静态资源文件名，内容不变则文件名不变，浏览器可长期缓存）
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:ASSET_HASH_LENGTH]
+
+
+# 压缩 CSS：去掉注释，合并空白，删除符号两侧多余空格
+def minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+# 保守地压缩 JS：只去掉缩进、空行、整行注释和行尾注释，保留换行，避免影响自动分号插入
+def minify_js(js):
+    lines = []
+    for line in js.split('\n'):
+        stripped = line.strip()
+        if not stripped or stripped.startswith('//'):
+            continue
+        if stripped.startswith('/*') and stripped.endswith('*/'):
+            continue
+        pos = stripped.find(' //')
+        if pos != -1:
+            code = stripped[:pos]
+            # 只有 // 之前的引号成对出现（不在字符串内）时才视为注释
+            if all(code.count(q) % 2 == 0 for q in ("'", '"', '`')):
+                stripped = code.rstrip()
+        lines.append(stripped)
+    return '\n'.join(lines) + '\n'
+
+
+# 文章在站点中的编号（?p= 或 ?page_id=，WordPress 中两者共用一个递增序列），无法识别时为 0
+def article_post_id(article_url):
+    query = parse_qs(urlparse(article_url).query)
+    for key in ("p", "page_id"):
+        value = query.get(key, [""])[0]
+        if value.isdigit():
+            return int(value)
+    return 0
+
+
+# 文章分片顺序：按文章编号从旧到新排序，第 position 篇属于第 position // ARTICLE_SHARD_SIZE 片。
+# 新文章只会进入最后一片，其余分片的内容（和文件名）只在其中文章有更新时才变化
+def article_shard_order(articles_data):
+    return sorted(range(len(articles_data)),
+                  key=lambda i: (article_post_id(articles_data[i]["article_url"]), articles_data[i]["article_url"]))
+
+
+# 把静态资源写入 asset_dir，文件名形如 app.1a2b3c4d5e.js，返回文件名
+def write_hashed_asset(asset_dir, stem, ext, text):
+    data = text.encode("utf-8")
+    filename = f"{stem}.{content_hash(data)}.{ext}"
+    path = os.path.join(asset_dir, filename)
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(data)
+    return filename
+
+
+# 删除旧版本的带哈希资源（连同其预压缩文件），只保留本次生成引用的文件
+def remove_stale_assets(asset_dir, keep):
+    pattern = re.compile(r'^([a-z0-9-]+\.[0-9a-f]{%d}\.(css|js))(\.gz|\.br)?$' % ASSET_HASH_LENGTH)
+    for filename in os.listdir(asset_dir):
+        m = pattern.match(filename)
+        if m and m.group(1) not in keep:
+            os.remove(os.path.join(asset_dir, filename))
+
+
+# 以最高压缩级别写出 .gz 和 .br 预压缩文件，供服务器按 Accept-Encoding 直接发送。
+# 带哈希的资源内容与文件名一一对应，已存在时跳过
+def write_precompressed(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    hashed = os.path.dirname(path).endswith(ASSETS_DIR)
+    gz_path = path + ".gz"
+    if not (hashed and os.path.exists(gz_path)):
+        with open(gz_path, "wb") as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is None:
+        return
+    br_path = path + ".br"
+    if not (hashed and os.path.exists(br_path)):
+        with open(br_path, "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+
+
+# 写出构建清单：每个输出文件（含 .gz/.br）的相对路径、SHA-256 和大小。
+# 与上一次的清单比较，把新增或变化的文件写入 changed-files.txt，部署时只需上传这些文件
+def write_build_manifest(paths, base_dir):
+    base_dir = base_dir or "."
+    manifest_file = os.path.join(base_dir, BUILD_MANIFEST_FILE)
+    previous = {}
+    if os.path.exists(manifest_file):
+        try:
+            with open(manifest_file, "r", encoding="utf-8") as f:
+                previous = json.load(f).get("files", {})
+        except (OSError, ValueError) as e:
+            print(f"❌ 读取上次构建清单失败: {e}")
+
+    files = {}
+    for path in paths:
+        for variant in (path, path + ".gz", path + ".br"):
+            if not os.path.exists(variant):
+                continue
+            with open(variant, "rb") as f:
+                data = f.read()
+            rel = os.path.relpath(variant, base_dir).replace(os.sep, "/")
+            files[rel] = {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data)}
+    files = dict(sorted(files.items()))
+
+    with open(manifest_file, "w", encoding="utf-8") as f:
+        json.dump({"files": files}, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    changed = [rel for rel, info in files.items() if previous.get(rel, {}).get("sha256") != info["sha256"]]
+    removed = [rel for rel in previous if rel not in files]
+    with open(os.path.join(base_dir, CHANGED_FILES_FILE), "w", encoding="utf-8") as f:
+        f.write("".join(rel + "\n" for rel in changed))
+    print(f"已生成构建清单：{manifest_file}（共 {len(files)} 个文件，变化 {len(changed)} 个，删除 {len(removed)} 个）")
+    return files
+
+
+# 统计文件原始 / gzip / brotli 体积
+def file_sizes(path):
+    sizes = {"raw": os.path.getsize(path)}
+    for ext, key in ((".gz", "gzip"), (".br", "br")):
+        if os.path.exists(path + ext):
+            sizes[key] = os.path.getsize(path + ext)
+    return sizes
+
+
+# 写出体积报告：按文章正文、评论、静态资源、搜索索引分类统计，
+# 列出体积最大的文章，并与上一次生成的报告对比，便于发现体积回归
+def write_size_report(article_sizes, outputs, report_file, multipage_files=()):
+    previous = None
+    if os.path.exists(report_file):
+        try:
+            with open(report_file, "r", encoding="utf-8") as f:
+                previous = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"❌ 读取上次体积报告失败: {e}")
+
+    files = {kind: dict(file_sizes(path), file=os.path.basename(path)) for kind, path in outputs.items()}
+    categories = {
+        "articles": sum(a["article_bytes"] for a in article_sizes),
+        "comments": sum(a["comments_bytes"] for a in article_sizes),
+        "assets": sum(files[kind]["raw"] for kind in ("page", "css", "js", "search-worker", "sw")),
+        "search_index": files["search"]["raw"],
+        "language_shards": sum(f["raw"] for kind, f in files.items() if kind.startswith("lang-")),
+        "article_shards": sum(f["raw"] for kind, f in files.items() if kind.startswith("articles-")),
+        "answer_index": sum(f["raw"] for kind, f in files.items() if kind.startswith("answers-")),
+        "multipage": sum(os.path.getsize(path) for path in multipage_files),
+    }
+    report = {
+        "generated_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "total_raw": sum(f["raw"] for f in files.values()),
+        "total_gzip": sum(f.get("gzip", 0) for f in files.values()),
+        "total_br": sum(f.get("br", 0) for f in files.values()),
+        "categories": categories,
+        "files": files,
+        "articles": sorted(article_sizes, key=lambda a: a["article_bytes"] + a["comments_bytes"], reverse=True),
+    }
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    def kb(n):
+        return f"{n / 1024:.1f}KB"
+
+    def delta(key, value):
+        if not previous or key not in previous:
+            return ""
+        diff = value - previous[key]
+        return f"（{'+' if diff >= 0 else '-'}{kb(abs(diff))}）"
+
+    print(f"📦 体积报告：原始 {kb(report['total_raw'])}{delta('total_raw', report['total_raw'])}，"
+          f"gzip {kb(report['total_gzip'])}{delta('total_gzip', report['total_gzip'])}，"
+          + (f"brotli {kb(report['total_br'])}" if brotli else "未安装 brotli，跳过 .br"))
+    print("   分类：" + "，".join(f"{name} {kb(size)}" for name, size in categories.items()))
+    for a in report["articles"][:SIZE_REPORT_TOP]:
+        print(f"   {kb(a['article_bytes'] + a['comments_bytes']):>10}  {a['comment_count']:>5} 条评论  {a['title']}")
+    print(f"已生成体积报告：{report_file}")
+
+
+# 写出整个站点：index.html + assets/ 下的样式、脚本和数据文件，以及 Service Worker。
+# 样式与脚本只在代码变化时才换文件名；文章 HTML 按语言分片，每日更新只会让有变化的分片和文章目录失效
+def write_site(articles_data, search_corpus, answers, language_shards, fold_map, result_file="index.html",
+               perf_beacon=""):
+    base_dir = os.path.dirname(result_file)
+    asset_dir = os.path.join(base_dir, ASSETS_DIR)
+    if not os.path.exists(asset_dir):
+        os.makedirs(asset_dir)
+
+    # 各语言的界面文字转换表单独成文件，只在读者切换语言时才加载
+    shard_files = {}
+    for lang, shard in language_shards.items():
+        shard_js = f"registerLanguageShard({json.dumps(lang)}, {json.dumps({'chars': shard['chars']}, ensure_ascii=False)});\n"
+        shard_files[lang] = write_hashed_asset(asset_dir, f"lang-{lang}", "js", shard_js)
+
+    # 文章 HTML 分片：每种语言一组，分片内按文章链接索引，打开文章时才加载所在分片
+    order = article_shard_order(articles_data)
+    shard_of = {i: position // ARTICLE_SHARD_SIZE for position, i in enumerate(order)}
+    versions = {"original": [a["comments_html"] for a in articles_data]}
+    versions.update((lang, shard["articles"]) for lang, shard in language_shards.items())
+    article_shard_files = {}
+    for lang, htmls in versions.items():
+        groups = [{} for _ in range(math.ceil(len(order) / ARTICLE_SHARD_SIZE))]
+        for i in order:
+            groups[shard_of[i]][articles_data[i]["article_url"]] = htmls[i]
+        article_shard_files[lang] = [
+            write_hashed_asset(asset_dir, f"articles-{lang}-{n}", "js",
+                               f"registerArticleShard({json.dumps(lang)}, {json.dumps(group, ensure_ascii=False)});\n")
+            for n, group in enumerate(groups)
+        ]
+    article_index = [{**{k: v for k, v in a.items() if k != "comments_html"}, "shard": shard_of[i]}
+                     for i, a in enumerate(articles_data)]
+
+    # 站长答疑索引：按时间从旧到新分片，每日新增的回复只会改变最后一片
+    answer_files = [
+        write_hashed_asset(asset_dir, f"answers-{n}", "js",
+                           f"registerAnswerShard({n}, "
+                           f"{json.dumps(answers[start:start + ANSWER_SHARD_SIZE], ensure_ascii=False)});\n")
+        for n, start in enumerate(range(0, len(answers), ANSWER_SHARD_SIZE))
+    ]
+
+    # 搜索数据和搜索 Worker 只在第一次搜索或查看最近评论时才加载
+    search_file = write_hashed_asset(asset_dir, "search", "js",
+                                     "const searchCorpus = " + json.dumps(search_corpus, ensure_ascii=False) + ";\n")
+    worker_file = write_hashed_asset(asset_dir, "search-worker", "js", minify_js(SEARCH_WORKER_JS))
+
+    data_js = (
+        "const articlesData = " + json.dumps(article_index, ensure_ascii=False) + ";\n"
+        "const articleShards = " + json.dumps({lang: [f"{ASSETS_DIR}/{name}" for name in names]
+                                               for lang, names in article_shard_files.items()}) + ";\n"
+        "const answerIndex = " + json.dumps({"count": len(answers), "shardSize": ANSWER_SHARD_SIZE,
+                                             "shards": [f"{ASSETS_DIR}/{name}" for name in answer_files]}) + ";\n"
+        f"const searchCorpusSrc = {json.dumps(f'{ASSETS_DIR}/{search_file}')};\n"
+        f"const searchWorkerSrc = {json.dumps(f'{ASSETS_DIR}/{worker_file}')};\n"
+        "const languageShards = "
+        + json.dumps({lang: f"{ASSETS_DIR}/{name}" for lang, name in shard_files.items()}) + ";\n"
+        "const foldMap = " + json.dumps(fold_map, ensure_ascii=False) + ";\n"
+    )
+    css_file = write_hashed_asset(asset_dir, "app", "css", minify_css(APP_CSS))
+    data_file = write_hashed_asset(asset_dir, "data", "js", data_js)
+    js_file = write_hashed_asset(asset_dir, "app", "js", minify_js(APP_JS))
+    all_shard_files = [name for names in article_shard_files.values() for name in names]
+    remove_stale_assets(asset_dir, {css_file, data_file, js_file, search_file, worker_file,
+                                    *shard_files.values(), *all_shard_files, *answer_files})
+
+    # Service Worker：安装时预缓存离线使用所需的文件（原文分片、搜索数据、语言转换表），
+    # 简繁分片在读者切换语言时才缓存；不在这两个列表中的旧文件激活后删除
+    precache = [css_file, js_file, data_file, search_file, worker_file, *shard_files.values(),
+                *article_shard_files["original"], *answer_files]
+    on_demand = [name for name in all_shard_files if name not in article_shard_files["original"]]
+    sw_js = ("const PRECACHE = " + json.dumps([f"{ASSETS_DIR}/{name}" for name in precache]) + ";\n"
+             "const ON_DEMAND = " + json.dumps([f"{ASSETS_DIR}/{name}" for name in on_demand]) + ";\n"
+             f"const CACHE_FIRST_DIRS = {json.dumps([ASSETS_DIR + '/', MEDIA_DIR + '/'])};\n"
+             + minify_js(SERVICE_WORKER_JS))
+    sw_path = write_text_file(os.path.join(base_dir, SERVICE_WORKER_FILE), sw_js)
+
+    html_content = INDEX_TEMPLATE.format(
+        build_id=content_hash(f"{css_file} {js_file} {data_file}".encode("utf-8")),
+        perf_beacon=html_lib.escape(perf_beacon),
+        css_href=f"{ASSETS_DIR}/{css_file}",
+        data_src=f"{ASSETS_DIR}/{data_file}",
+        js_src=f"{ASSETS_DIR}/{js_file}",
+    )
+    with open(result_file, "w", encoding="utf-8") as f:
+        f.write(html_content)
+    print(f"已生成文件：{result_file}（静态资源：{css_file}, {js_file}, {data_file}；"
+          f"文章分片 {len(all_shard_files)} 个）")
+    return {
+        "page": result_file,
+        "css": os.path.join(asset_dir, css_file),
+        "js": os.path.join(asset_dir, js_file),
+        "data": os.path.join(asset_dir, data_file),
+        "search": os.path.join(asset_dir, search_file),
+        "search-worker": os.path.join(asset_dir, worker_file),
+        "sw": sw_path,
+        **{f"lang-{lang}": os.path.join(asset_dir, name) for lang, name in shard_files.items()},
+        **{f"articles-{lang}-{n}": os.path.join(asset_dir, name)
+           for lang, names in article_shard_files.items() for n, name in enumerate(names)},
+        **{f"answers-{n}": os.path.join(asset_dir, name) for n, name in enumerate(answer_files)},
+    }
+
+
+# 文章静态页面的文件名：根据原文链接生成，文章增删后也保持不变，
+# 例如 ?p=123 -> p123.html，?page_id=11 -> page11.html
+def article_page_name(article_url):
+    query = parse_qs(urlparse(article_url).query)
+    for key, prefix in (("p", "p"), ("page_id", "page")):
+        value = query.get(key, [""])[0]
+        if value.isdigit():
+            return f"{prefix}{value}.html"
+    return hashlib.md5(article_url.encode("utf-8")).hexdigest()[:ASSET_HASH_LENGTH] + ".html"
+
+
+# 站点地图中的最后修改日期：优先用最近一次更新数据的时间，否则用发布时间
+def article_lastmod(article):
+    if article.get("timestamp"):
+        return datetime.datetime.fromtimestamp(article["timestamp"], datetime.timezone.utc).date().isoformat()
+    if article.get("article_time_iso"):
+        return article["article_time_iso"][:10]
+    return ""
+
+
+# 导出静态多页面站点：articles/ 下每篇文章一个 HTML，list/ 下是文章列表分页，外加站点地图。
+# 所有页面共用 assets/ 中的样式文件，打开单篇文章只需下载该文章自身的内容。
+# 返回写出的全部文件路径
+def write_multipage_site(articles, articles_data, css_path, base_dir, site_url=""):
+    articles_dir = os.path.join(base_dir, MULTIPAGE_ARTICLES_DIR)
+    list_dir = os.path.join(base_dir, MULTIPAGE_LIST_DIR)
+    for folder in (articles_dir, list_dir):
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+    css_href = f"../{ASSETS_DIR}/{os.path.basename(css_path)}"
+    names = [article_page_name(a["article_url"]) for a in articles_data]
+    total_pages = max(1, math.ceil(len(articles_data) / MULTIPAGE_ARTICLES_PER_PAGE))
+
+    def nav_link(href, text):
+        return f'<a class="nav-btn" href="{href}">{text}</a>' if href else ""
+
+    written = []
+    for i, article_data in enumerate(articles_data):
+        list_page = i // MULTIPAGE_ARTICLES_PER_PAGE + 1
+        nav = (nav_link(names[i - 1] if i > 0 else "", "⬅️ 上一篇")
+               + nav_link(f"../{MULTIPAGE_LIST_DIR}/{list_page}.html", "📚 文章列表")
+               + nav_link(names[i + 1] if i + 1 < len(names) else "", "下一篇 ➡️"))
+        page_html = ARTICLE_PAGE_TEMPLATE.format(
+            title=html_lib.escape(article_data["title"]),
+            css_href=css_href,
+            nav=nav,
+            content=relocate_media_html(article_data["comments_html"], "../"),
         )
-        articles_data.append({
-            "title": article_title,
-            "article_time": article_time,
-            "article_url": article_url,
-            "comments_html": full_html
-        })
-
-    # 生成 JSON 字符串后，将所有的 </ 替换为 <\/ 避免嵌入 <script> 标签时被误判结束标签
-    articles_json = json.dumps(articles_data, ensure_ascii=False).replace("</", "<\\/")
-
-    html_content = fr"""<!DOCTYPE html>
+        written.append(write_text_file(os.path.join(articles_dir, names[i]), page_html))
+
+    for page in range(1, total_pages + 1):
+        start = (page - 1) * MULTIPAGE_ARTICLES_PER_PAGE
+        items = "\n".join(
+            f'    <li class="search-result-item"><a href="../{MULTIPAGE_ARTICLES_DIR}/{names[i]}">'
+            f'<strong>{html_lib.escape(a["title"])}</strong></a> - {html_lib.escape(a["article_time"] or "未知时间")}</li>'
+            for i, a in enumerate(articles_data[start:start + MULTIPAGE_ARTICLES_PER_PAGE], start=start)
+        )
+        nav = (nav_link(f"{page - 1}.html" if page > 1 else "", "⬅️ 上一页")
+               + f'<span> 当前页 {page} / {total_pages} </span>'
+               + nav_link(f"{page + 1}.html" if page < total_pages else "", "下一页 ➡️"))
+        page_html = LIST_PAGE_TEMPLATE.format(css_href=css_href, nav=nav, items=items)
+        written.append(write_text_file(os.path.join(list_dir, f"{page}.html"), page_html))
+
+    # 删除已不存在的文章 / 列表页（连同预压缩文件）
+    keep = {os.path.basename(path) for path in written}
+    for folder in (articles_dir, list_dir):
+        for filename in os.listdir(folder):
+            if re.sub(r'\.(gz|br)$', '', filename) not in keep:
+                os.remove(os.path.join(folder, filename))
+
+    base = site_url.rstrip("/")
+    if not base:
+        print("❌ 未指定 --site-url，站点地图中使用相对地址（搜索引擎需要绝对地址）")
+    urls = [(f"{base}/{MULTIPAGE_LIST_DIR}/{page}.html", "") for page in range(1, total_pages + 1)]
+    urls.extend((f"{base}/{MULTIPAGE_ARTICLES_DIR}/{name}", article_lastmod(article))
+                for name, article in zip(names, articles))
+    entries = []
+    for loc, lastmod in urls:
+        entry = f"  <url><loc>{xml_escape(loc)}</loc>"
+        if lastmod:
+            entry += f"<lastmod>{lastmod}</lastmod>"
+        entries.append(entry + "</url>")
+    sitemap = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+               + "\n".join(entries) + "\n</urlset>\n")
+    written.append(write_text_file(os.path.join(base_dir, SITEMAP_FILE), sitemap))
+    print(f"已导出多页面站点：{len(articles_data)} 篇文章，{total_pages} 个列表页，站点地图 {SITEMAP_FILE}")
+    return written
+
+
+def write_text_file(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+
+# 页面骨架：样式、脚本、数据均以外部文件引入
+INDEX_TEMPLATE = """<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
   <meta charset="utf-8">
   <meta name="viewport" content="width=device-width, initial-scale=1.0, maximum-scale=1.0, user-scalable=no">
   <title>阳气诊所</title>
-  <!-- 引入 opencc-js 完整版，实现简繁转换 -->
-  <script src="https://fastly.jsdelivr.net/npm/opencc-js@1.0.5/dist/umd/full.js"></script>
+  <meta name="build-id" content="{build_id}">
+  <meta name="perf-beacon" content="{perf_beacon}">
   <!-- 引入 Google Fonts -->
   <link href="https://fonts.googleapis.com/css?family=Roboto:400,500,700&display=swap" rel="stylesheet">
-  <style>
+  <link href="{css_href}" rel="stylesheet">
+</head>
+<body>
+  <header>
+    <div style="display:flex; align-items:center;">
+      <!-- 使用彩色 emoji 表情替换图标 -->
+      <h1>☀️阳气诊所</h1>
+      <button class="btn btn-header" onclick="toggleDarkMode()">🌙夜间</button>
+      <button class="btn btn-header" onclick="openSettings()">⚙️设置</button>
+      <!-- 语言切换下拉框 -->
+      <select id="languageSelect" onchange="changeLanguage()" class="btn btn-header">
+        <option value="original">原内容</option>
+        <option value="traditional">繁體</option>
+        <option value="simplified">简体</option>
+      </select>
+    </div>
+  </header>
+
+  <div class="search-controls">
+    <select id="searchType" onchange="onSearchInput()">
+      <option value="comment">💬 根据评论搜索</option>
+      <option value="author">👤 根据评论人搜索</option>
+      <option value="article">📄 根据文章内容搜索</option>
+      <option value="siteBing">🌐 全站搜索 (必应, 不翻墙)</option>
+      <option value="siteGoogle">🌐 全站搜索 (谷歌, 翻墙)</option>
+    </select>
+    <input type="text" id="searchKeyword" placeholder="请输入搜索内容..." oninput="onSearchInput()">
+    <button id="searchButton" class="btn" onclick="searchComments()" disabled>
+      🔍 搜索
+    </button>
+    <button class="btn btn-danger search-close-btn" id="searchCloseButton" onclick="closeSearchResults()">
+      ❌ 关闭搜索结果
+    </button>
+    <!-- 新增查看最近评论按钮 -->
+    <button id="recentCommentsButton" class="btn btn-secondary" onclick="showRecentComments()">🕑 查看最近评论</button>
+    <button id="hostAnswersButton" class="btn btn-secondary" onclick="showHostAnswers()">👑 李宗恩/andy 答疑</button>
+  </div>
+  <div id="searchExtraControls"></div>
+  <div id="loadingIndicator" class="loading-indicator">加载中... ⏳</div>
+  <div id="searchCount"></div>
+  <div id="pagination" class="pagination"></div>
+  <ul id="searchResults" class="search-results"></ul>
+  <hr>
+ <h2 style="text-align:center; margin-top:30px;">文章评论分页显示</h2>
+<div style="text-align:center;">
+  <select id="articleDropdown" aria-describedby="articleDropdownHint" onchange="changeArticle()"></select>
+  <div id="articleDropdownHint" class="dropdown-hint">
+    💡 小提示：本页通常包含多篇文章，点击上方下拉列表可选择要查看的文章。
+  </div>
+</div>
+<div id="articlePagination" class="pagination"></div>
+
+  <div id="articleComments" class="layout-card" data-prerendered-language></div>
+  <div id="articleNav" style="text-align: center; margin: 20px 0;">
+    <button id="prevArticleBtn" class="nav-btn" onclick="prevArticle()">
+      ⬅️ 上一篇
+    </button>
+    <button id="nextArticleBtn" class="nav-btn" onclick="nextArticle()">
+      下一篇 ➡️
+    </button>
+  </div>
+  <button class="back-to-top" onclick="scrollToTop()">↑</button>
+  <!-- 设置面板（Modal） -->
+  <div id="settingsModal" class="modal">
+    <div class="modal-content">
+      <h2>🛠️ 页面设置</h2>
+      <!-- 文本颜色设置 -->
+      <div style="border-bottom: 1px solid #ccc; margin-bottom: 10px; padding-bottom: 10px;">
+        <h3>🎨 文本颜色设置</h3>
+        <label for="textColorInput">文本颜色:</label>
+        <input type="color" id="textColorInput" value="#333333">
+      </div>
+      <!-- 字体设置 -->
+      <div style="border-bottom: 1px solid #ccc; margin-bottom: 10px; padding-bottom: 10px;">
+        <h3>🔠 字体设置</h3>
+        <label for="fontSizeInput">字体大小 (px): <span id="fontSizeVal">16</span></label>
+        <input type="range" id="fontSizeInput" min="12" max="36" value="16" oninput="document.getElementById('fontSizeVal').innerText=this.value">
+        <label for="lineHeightInput">行距 (倍数):</label>
+        <input type="number" id="lineHeightInput" min="1" max="3" step="0.1" value="1.6">
+        <label for="fontFamilySelect">字体样式:</label>
+        <select id="fontFamilySelect">
+          <option value="Roboto, sans-serif">Roboto</option>
+          <option value="Arial, sans-serif">Arial</option>
+          <option value="'Times New Roman', serif">Times New Roman</option>
+          <option value="Verdana, sans-serif">Verdana</option>
+          <option value="'Courier New', monospace">Courier New</option>
+          <option value="Georgia, serif">Georgia</option>
+          <option value="'Microsoft YaHei', sans-serif">微软雅黑</option>
+          <option value="'SimSun', serif">宋体</option>
+          <option value="'SimHei', serif">黑体</option>
+          <option value="'FangSong', serif">仿宋</option>
+          <option value="'KaiTi', serif">楷体</option>
+          <option value="'PingFang SC', sans-serif">苹方</option>
+        </select>
+      </div>
+      <!-- 新增：主题选择（新增“无主题”选项） -->
+      <div style="border-bottom: 1px solid #ccc; margin-bottom: 10px; padding-bottom: 10px;">
+        <h3>🌈 主题选择</h3>
+        <label for="themeSelect">选择主题:</label>
+        <select id="themeSelect">
+          <option value="none" selected>无主题</option>
+          <optgroup label="中国风">
+            <option value="chinese1">墨韵山水</option>
+            <option value="chinese2">书香古韵</option>
+            <option value="chinese3">云水谣</option>
+          </optgroup>
+          <optgroup label="都市风尚">
+            <option value="modern1">清风雅韵</option>
+            <option value="modern2">现代简约</option>
+            <option value="modern3">经典时光</option>
+          </optgroup>
+          <optgroup label="新主题">
+            <option value="romantic">浪漫粉彩</option>
+            <option value="techBlue">科技蓝调</option>
+            <option value="dreamPurple">梦幻紫</option>
+            <option value="minimalBlackWhite">极简黑白</option>
+            <option value="vintage">复古风情</option>
+            <option value="japaneseFresh">日系清新</option>
+          </optgroup>
+        </select>
+      </div>
+      <!-- 布局风格设置 -->
+      <div style="border-bottom: 1px solid #ccc; margin-bottom: 10px; padding-bottom: 10px;">
+        <h3>🗂️ 布局风格设置</h3>
+        <label for="layoutStyleSelect">选择布局风格:</label>
+        <select id="layoutStyleSelect">
+          <option value="card" selected>卡片布局</option>
+          <option value="list">列表布局</option>
+        </select>
+      </div>
+      <div style="text-align: right; margin-top: 10px;">
+        <button class="btn" onclick="applySettings()" style="background-color: var(--primary-color); color: white;">应用</button>
+        <button class="btn btn-secondary" onclick="restoreDefaults()">还原默认</button>
+        <button class="btn btn-danger" onclick="closeSettings()">关闭</button>
+      </div>
+    </div>
+  </div>
+  <!-- 性能统计面板：地址中加 ?perf=1 显示，?perf=0 隐藏 -->
+  <div id="perfPanel" class="perf-panel"></div>
+  <script src="{data_src}"></script>
+  <script src="{js_src}"></script>
+</body>
+</html>
+"""
+
+
+# 多页面导出：单篇文章页面（不含脚本和全站数据）
+ARTICLE_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>{title} - 阳气诊所</title>
+  <link href="{css_href}" rel="stylesheet">
+</head>
+<body>
+  <header>
+    <div style="display:flex; align-items:center;">
+      <h1>☀️阳气诊所</h1>
+      <a class="btn btn-header" href="../index.html">🔍 搜索 / 完整版</a>
+    </div>
+  </header>
+  <div class="pagination">{nav}</div>
+  <div id="articleComments" class="layout-card">{content}</div>
+  <div class="pagination">{nav}</div>
+  <!-- 评论 HTML 中带有 onclick="removeHighlight(this)"，静态页面没有搜索高亮，这里留空实现 -->
+  <script>function removeHighlight() {{}}</script>
+</body>
+</html>
+"""
+
+
+# 多页面导出：文章列表分页
+LIST_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1.0">
+  <title>文章列表 - 阳气诊所</title>
+  <link href="{css_href}" rel="stylesheet">
+</head>
+<body>
+  <header>
+    <div style="display:flex; align-items:center;">
+      <h1>☀️阳气诊所</h1>
+      <a class="btn btn-header" href="../index.html">🔍 搜索 / 完整版</a>
+    </div>
+  </header>
+  <ul class="search-results">
+{items}
+  </ul>
+  <div class="pagination">{nav}</div>
+</body>
+</html>
+"""
+
+
+# 页面样式
+APP_CSS = r"""
     /* CSS变量定义 */
-    :root {{
+    :root {
       --primary-color: #667eea;
       --secondary-color: #764ba2;
       --text-color: #333333;
@@ -134,17 +1010,17 @@ def generate_html(articles, result_file="index.html"):
       --heading-size: calc(var(--font-size) * 1.375);
       --btn-bg: #667eea;
       --btn-hover: #556cd6;
-    }}
+    }
     /* 基础重置 */
-    * {{
+    * {
       margin: 0;
       padding: 0;
       box-sizing: border-box;
-    }}
-    html, body {{
+    }
+    html, body {
       height: 100%;
-    }}
-    body {{
+    }
+    body {
       font-family: var(--font-family);
       font-size: var(--font-size);
       line-height: var(--line-height);
@@ -152,9 +1028,9 @@ def generate_html(articles, result_file="index.html"):
       background-color: var(--background-color);
       padding-top: 70px;
       transition: background-color 0.3s, color 0.3s;
-    }}
+    }
     /* 头部样式 */
-    header {{
+    header {
       position: fixed;
       top: 0;
       left: 0;
@@ -167,17 +1043,17 @@ def generate_html(articles, result_file="index.html"):
       justify-content: space-between;
       align-items: center;
       box-shadow: 0 2px 8px rgba(0, 0, 0, 0.15);
-    }}
+    }
     /* 暗黑模式下头部样式（基于原始颜色暗调10%） */
-    body.dark-mode header {{
+    body.dark-mode header {
       background: linear-gradient(135deg, #5C71D3, #6A4492) !important;
       color: #ddd !important;
-    }}
-    header h1 {{
+    }
+    header h1 {
       font-size: 20px;
-    }}
+    }
     /* 优化后的按钮样式 */
-    .btn {{
+    .btn {
       display: inline-block;
       padding: 10px 20px;
       font-size: 16px;
@@ -189,39 +1065,39 @@ def generate_html(articles, result_file="index.html"):
       transition: background-color 0.3s, transform 0.2s, box-shadow 0.2s;
       margin: 5px;
       outline: none;
-    }}
-    .btn:hover {{
+    }
+    .btn:hover {
       background-color: var(--btn-hover);
       transform: scale(1.05);
       box-shadow: 0 4px 12px rgba(0, 0, 0, 0.2);
-    }}
-    .btn-header {{
+    }
+    .btn-header {
       background: transparent;
       border: 2px solid #fff;
       padding: 8px 16px;
       font-size: 16px;
       margin-left: 10px;
-    }}
-    .btn-header:hover {{
+    }
+    .btn-header:hover {
       background-color: rgba(255, 255, 255, 0.2);
-    }}
-    .btn-success {{ background-color: #43a047; }}
-    .btn-success:hover {{ background-color: #388e3c; }}\
+    }
+    .btn-success { background-color: #43a047; }
+    .btn-success:hover { background-color: #388e3c; }\
     /* —— 青绿色 Teal 500 版 .btn-secondary —— */
-    .btn-secondary {{
+    .btn-secondary {
       background-color: #009688 !important;
       border-color:     #009688 !important;
       color:            #ffffff !important;
-    }}
-    .btn-secondary:hover {{
+    }
+    .btn-secondary:hover {
       background-color: #00796B !important;  /* 深一点的 Teal 700 */
       border-color:     #00796B !important;
-    }}
-    .btn-danger {{ background-color: #ff5555; }}
-    .btn-danger:hover {{ background-color: #e04e4e; }}
+    }
+    .btn-danger { background-color: #ff5555; }
+    .btn-danger:hover { background-color: #e04e4e; }
 
     /* 让下拉框与其他按钮大小一致，并修复PC端展开时“空白”问题 */
-    select.btn-header {{
+    select.btn-header {
       -webkit-appearance: none;
       -moz-appearance: none;
       appearance: none;
@@ -233,33 +1109,33 @@ def generate_html(articles, result_file="index.html"):
       margin-left: 10px;
       border-radius: 12px;
       cursor: pointer;
-    }}
+    }
     /* 保持下拉框点击时背景色不变 */
     select.btn-header:focus,
-    select.btn-header:active {{
+    select.btn-header:active {
       background-color: var(--btn-bg);
       color: #fff;
       outline: none;
-    }}
-    select.btn-header option {{
+    }
+    select.btn-header option {
       background-color: #fff;
       color: #333;
-    }}
+    }
     /* 暗黑模式下，选项也要可见 */
-    body.dark-mode select.btn-header option {{
+    body.dark-mode select.btn-header option {
       background-color: #444;
       color: #ddd;
-    }}
+    }
 
     /* 搜索区域 */
-    .search-controls {{
+    .search-controls {
       margin: 20px auto;
       text-align: center;
       max-width: 800px;
       padding: 0 10px;
-    }}
+    }
     .search-controls select,
-    .search-controls input {{
+    .search-controls input {
       padding: 10px;
       font-size: 16px;
       margin: 5px 2px;
@@ -267,14 +1143,14 @@ def generate_html(articles, result_file="index.html"):
       border: 1px solid #ccc;
       width: calc(50% - 14px);
       transition: border-color 0.3s;
-    }}
+    }
     .search-controls input:focus,
-    .search-controls select:focus {{
+    .search-controls select:focus {
       border-color: var(--primary-color);
       outline: none;
-    }}
-    .search-controls input::placeholder {{ color: #999; }}
-    .search-close-btn {{
+    }
+    .search-controls input::placeholder { color: #999; }
+    .search-close-btn {
       background-color: #ff0000;
       color: white;
       border: none;
@@ -283,39 +1159,39 @@ def generate_html(articles, result_file="index.html"):
       cursor: pointer;
       display: none;
       border-radius: 5px;
-    }}
+    }
     /* 新增：搜索结果额外控制按钮区域 */
-    #searchExtraControls {{
+    #searchExtraControls {
       text-align: center;
       margin: 10px 0;
       display: none;
-    }}
+    }
     /* 搜索结果计数样式优化 */
-    #searchCount {{
+    #searchCount {
       text-align: center;
       font-size: 20px;
       font-weight: bold;
       color: var(--primary-color);
       margin: 20px 0;
-    }}
-    #searchCount span {{
+    }
+    #searchCount span {
       color: var(--btn-bg);
-    }}
+    }
     /* 文章内容 */
-    .article-header {{
+    .article-header {
       text-align: center;
       margin: 20px auto;
       padding: 10px;
       border-bottom: 1px solid #ccc;
       max-width: 800px;
-    }}
-    .article-header h2 {{ margin-bottom: 10px; font-size: var(--heading-size); }}
-    .article-time {{
+    }
+    .article-header h2 { margin-bottom: 10px; font-size: var(--heading-size); }
+    .article-time {
       font-size: 0.9em;
       color: #888;
       margin-bottom: 8px;
-    }}
-    .origin-link {{
+    }
+    .origin-link {
       text-decoration: none;
       font-size: var(--font-size);
       color: var(--primary-color);
@@ -323,52 +1199,52 @@ def generate_html(articles, result_file="index.html"):
       padding: 5px 10px;
       border-radius: 5px;
       transition: background-color 0.3s, color 0.3s;
-    }}
-    .origin-link:hover {{
+    }
+    .origin-link:hover {
       background-color: var(--primary-color);
       color: white;
-    }}
-    .article-content {{
+    }
+    .article-content {
       max-width: 800px;
       margin: 20px auto;
       padding: 10px;
       font-size: var(--font-size);
       line-height: var(--line-height);
       word-wrap: break-word;
-    }}
-    .article-content p {{
+    }
+    .article-content p {
       margin: 10px 0;
-    }}
+    }
     /* 新增：使评论区内的段落也换两行 */
-    .comment .comment-text p {{
+    .comment .comment-text p {
       margin: 10px 0;
-    }}
-    .article-content a {{
+    }
+    .article-content a {
       word-wrap: break-word;
       text-decoration: none;
       color: var(--primary-color);
-    }}
-    .article-content a:hover {{
+    }
+    .article-content a:hover {
       text-decoration: underline;
-    }}
+    }
     /* 分界线及标题 */
-    .article-divider {{
+    .article-divider {
       max-width: 800px;
       margin: 20px auto;
       text-align: center;
-    }}
-    .article-divider hr {{
+    }
+    .article-divider hr {
       border: none;
       height: 1px;
       background-color: #ccc;
       margin-bottom: 10px;
-    }}
-    .article-divider h3 {{
+    }
+    .article-divider h3 {
       font-size: 20px;
       color: var(--primary-color);
-    }}
+    }
     /* 评论样式（默认卡片布局） */
-    .comment {{
+    .comment {
       padding: 15px;
       margin: 15px auto;
       border-radius: 8px;
@@ -377,63 +1253,63 @@ def generate_html(articles, result_file="index.html"):
       transition: background-color 0.3s;
       cursor: pointer;
       background-color: var(--background-color);
-    }}
-    .comment:hover {{
+    }
+    .comment:hover {
       background-color: #f9f9f9;
-    }}
-    .comment.highlight {{
+    }
+    .comment.highlight {
       background-color: #fff5cc;
       border-left: 5px solid #ffdb00;
-    }}
-    .comment.reply {{
+    }
+    .comment.reply {
       background-color: var(--background-color) !important;
       border-left: 5px solid #66ccff;
-    }}
-    .comment .author {{
+    }
+    .comment .author {
       font-weight: bold;
       margin-bottom: 5px;
-    }}
-    .comment .time {{
+    }
+    .comment .time {
       font-size: 0.9em;
       color: #888;
       margin-bottom: 8px;
-    }}
-    .comment .comment-text {{
+    }
+    .comment .comment-text {
       font-size: var(--font-size);
       word-wrap: break-word;
-    }}
-    .comment .comment-text a {{
+    }
+    .comment .comment-text a {
       color: var(--text-color) !important;
       text-decoration: none;
-    }}
-    body.dark-mode .comment .comment-text a {{
+    }
+    body.dark-mode .comment .comment-text a {
       color: white !important;
-    }}
-    .replies {{
+    }
+    .replies {
       margin-top: 15px;
       padding-left: 20px;
       border-left: 2px dashed #ccc;
-    }}
+    }
     /* 关键字高光 */
-    .keyword-highlight {{
+    .keyword-highlight {
       background-color: rgba(255, 255, 0, 0.5);
-    }}
-    .highlighted-comment, .search-highlight {{
+    }
+    .highlighted-comment, .search-highlight {
       border: 4px solid #ff8888!important;
       background-color: transparent;
-    }}
+    }
     /* 新增：文章搜索后标题或内容红框高亮（点击后消失） */
-    .article-search-highlight {{
+    .article-search-highlight {
        border: 4px solid #ff8888!important;
        background-color: transparent !important;
-    }}
+    }
     /* 分页样式 */
-    .pagination {{
+    .pagination {
       text-align: center;
       margin: 20px 0;
-    }}
-    .pagination div {{ margin: 5px 0; }}
-    .pagination input[type="number"] {{
+    }
+    .pagination div { margin: 5px 0; }
+    .pagination input[type="number"] {
       width: 80px;
       height: 40px;
       font-size: 18px;
@@ -441,8 +1317,8 @@ def generate_html(articles, result_file="index.html"):
       margin-left: 10px;
       border-radius: 5px;
       border: 1px solid #ccc;
-    }}
-    .jump-btn, .nav-btn {{
+    }
+    .jump-btn, .nav-btn {
       padding: 10px 20px;
       font-size: 18px;
       background: var(--primary-color);
@@ -452,19 +1328,34 @@ def generate_html(articles, result_file="index.html"):
       cursor: pointer;
       margin: 0 5px;
       transition: background-color 0.3s, transform 0.2s;
-    }}
-    .jump-btn:hover, .nav-btn:hover {{
+    }
+    /* 评论分批渲染：加载更多 / 展开折叠的回复 */
+    .load-more-comments {
+      display: block;
+      margin: 15px auto;
+    }
+    .expand-replies {
+      margin: 8px 0 0 20px;
+      padding: 4px 12px;
+      font-size: 0.9em;
+      color: var(--primary-color);
+      background: transparent;
+      border: 1px solid var(--primary-color);
+      border-radius: 15px;
+      cursor: pointer;
+    }
+    .jump-btn:hover, .nav-btn:hover {
       background: var(--btn-hover);
       transform: scale(1.03);
-    }}
+    }
     /* 搜索结果列表 */
-    .search-results {{
+    .search-results {
       list-style-type: none;
       padding: 0;
       margin: 20px auto;
       max-width: 800px;
-    }}
-    .search-result-item {{
+    }
+    .search-result-item {
       background-color: white;
       margin: 10px;
       padding: 15px;
@@ -475,35 +1366,46 @@ def generate_html(articles, result_file="index.html"):
       word-wrap: break-word;
       overflow-wrap: break-word;
       white-space: normal;
-    }}
+    }
     /* 黑暗模式下搜索结果列表也变为深色 */
-    body.dark-mode .search-result-item {{
+    body.dark-mode .search-result-item {
       background-color: #2b2b2b;
       color: #ccc;
       border: 1px solid #444;
       box-shadow: 0 2px 4px rgba(0,0,0,0.7);
-    }}
+    }
     /* 新增：特殊高亮（作者为李宗恩或andy） */
-    .special-highlight {{
+    .special-highlight {
       background-color: #fff5cc;
-    }}
-    body.dark-mode .special-highlight {{
+    }
+    body.dark-mode .special-highlight {
       background-color: rgba(255,245,204,0.3);
-    }}
+    }
+    /* 站长答疑中被回复的问题 */
+    .answer-question {
+      margin: 6px 0;
+      padding-left: 8px;
+      color: #666;
+      border-left: 3px solid #66ccff;
+    }
+    body.dark-mode .answer-question {
+      color: #aaa;
+      border-left-color: #5577aa;
+    }
 
 /* 下拉框下面的小提示 */
-.dropdown-hint {{
+.dropdown-hint {
   font-size: 12px;
   line-height: 1.4;
   color: #888;
   margin-top: 6px;
-}}
-body.dark-mode .dropdown-hint {{
+}
+body.dark-mode .dropdown-hint {
   color: #aaa;
-}}
+}
 
     /* 文章评论下拉选择框 */
-    #articleDropdown {{
+    #articleDropdown {
       padding: 12px;
       font-size: 16px;
       border: 1px solid #ccc;
@@ -512,23 +1414,23 @@ body.dark-mode .dropdown-hint {{
       max-width: 400px;
       margin: 0 auto;
       display: block;
-    }}
+    }
     /* 暗黑模式下文章下拉框保持与搜索区域一致 */
-    body.dark-mode #articleDropdown {{
+    body.dark-mode #articleDropdown {
       background-color: #444;
       color: #ddd;
       border: 1px solid #555;
       -webkit-appearance: none;
       -moz-appearance: none;
       appearance: none;
-    }}
+    }
     /* 暗黑模式下下拉框中 option 选项样式也保持一致 */
-    body.dark-mode #articleDropdown option {{
+    body.dark-mode #articleDropdown option {
       background-color: #444;
       color: #ddd;
-    }}
+    }
     /* 返回顶部按钮 */
-    .back-to-top {{
+    .back-to-top {
       position: fixed;
       bottom: 20px;
       right: 20px;
@@ -542,159 +1444,159 @@ body.dark-mode .dropdown-hint {{
       display: none;
       transition: transform 0.3s, opacity 0.3s;
       z-index: 1000;
-    }}
-    .back-to-top:hover {{
+    }
+    .back-to-top:hover {
       background-color: var(--btn-hover);
-    }}
+    }
 
     /* ---------------- 暗黑模式 ---------------- */
-    body.dark-mode {{
+    body.dark-mode {
       background-color: #222;
       color: #ccc;
-    }}
-    body.dark-mode a.origin-link {{
+    }
+    body.dark-mode a.origin-link {
       color: #66aaff;
       border-color: #66aaff;
-    }}
-    body.dark-mode a.origin-link:hover {{
+    }
+    body.dark-mode a.origin-link:hover {
       background-color: #66aaff;
       color: #fff;
-    }}
-    body.dark-mode .comment {{
+    }
+    body.dark-mode .comment {
       background-color: #2b2b2b !important;
       color: #ccc !important;
       box-shadow: 0 2px 4px rgba(0,0,0,0.7);
       border: 1px solid #444;
-    }}
-    body.dark-mode .comment.reply {{
+    }
+    body.dark-mode .comment.reply {
       background-color: #2e2e2e !important;
       border-left: 5px solid #5577aa;
-    }}
-    body.dark-mode .comment.highlight {{
+    }
+    body.dark-mode .comment.highlight {
       background-color: #3a2a2a !important;
       border-left: 5px solid #aa7733;
-    }}
+    }
     body.dark-mode .search-controls select,
-    body.dark-mode .search-controls input {{
+    body.dark-mode .search-controls input {
       background-color: #444;
       color: #ddd;
       border: 1px solid #555;
-    }}
-    body.dark-mode .search-controls button {{
+    }
+    body.dark-mode .search-controls button {
       background-color: #555;
-    }}
-    body.dark-mode input::placeholder {{
+    }
+    body.dark-mode input::placeholder {
       color: #ccc;
-    }}
+    }
     /* 黑暗模式下设置面板样式 */
-    body.dark-mode .modal-content {{
+    body.dark-mode .modal-content {
       background-color: #333;
       color: #ccc;
       border: 1px solid #555;
-    }}
+    }
     /* 新增：暗黑模式下点击搜索结果时添加红色边框高亮 */
     body.dark-mode .highlighted-comment,
     body.dark-mode .search-highlight,
-    body.dark-mode .article-search-highlight {{
+    body.dark-mode .article-search-highlight {
       border: 4px solid #ff8888!important;
-    }}
+    }
 
     /* ---------------- Dark mode：按钮颜色稍暗（基于原始颜色暗调10%） ---------------- */
     body.dark-mode .btn,
     body.dark-mode .jump-btn,
     body.dark-mode .nav-btn,
-    body.dark-mode .back-to-top {{
+    body.dark-mode .back-to-top {
       background-color: #5C71D3 !important;
       color: #fff !important;
       border-color: #5C71D3 !important;
-    }}
+    }
     body.dark-mode .btn:hover,
     body.dark-mode .jump-btn:hover,
     body.dark-mode .nav-btn:hover,
-    body.dark-mode .back-to-top:hover {{
+    body.dark-mode .back-to-top:hover {
       background-color: #4D61C1 !important;
-    }}
+    }
 
-    body.dark-mode .btn-success {{
+    body.dark-mode .btn-success {
       background-color: #3C9040 !important;
-    }}
-    body.dark-mode .btn-success:hover {{
+    }
+    body.dark-mode .btn-success:hover {
       background-color: #328036 !important;
-    }}
-    body.dark-mode .btn-secondary {{
+    }
+    body.dark-mode .btn-secondary {
       background-color: #E68A00 !important;
-    }}
-    body.dark-mode .btn-secondary:hover {{
+    }
+    body.dark-mode .btn-secondary:hover {
       background-color: #CF7C00 !important;
-    }}
-    body.dark-mode .btn-danger {{
+    }
+    body.dark-mode .btn-danger {
       background-color: #E64D4D !important;
-    }}
-    body.dark-mode .btn-danger:hover {{
+    }
+    body.dark-mode .btn-danger:hover {
       background-color: #CA4646 !important;
-    }}
+    }
 
     body.dark-mode .btn-header,
-    body.dark-mode select.btn-header {{
+    body.dark-mode select.btn-header {
       background-color: rgba(255,255,255,0.1) !important;
       color: #fff !important;
       border-color: rgba(255,255,255,0.7) !important;
-    }}
+    }
     body.dark-mode .btn-header:hover,
-    body.dark-mode select.btn-header:hover {{
+    body.dark-mode select.btn-header:hover {
       background-color: rgba(255,255,255,0.2) !important;
-    }}
+    }
 
     /* ==================== 手机端优化 ==================== */
-    @media (max-width: 768px) {{
+    @media (max-width: 768px) {
       /* 1）保持所有 btn-header（除了最近评论那一项）的小号 */
-      .btn-header {{
+      .btn-header {
         font-size: 12px !important;
         padding: 5px 8px !important;
-      }}
+      }
 
       /* 2）仅针对“查看最近评论”里生成的下拉放回大尺寸 */
-      #recentFilterDropdown {{
+      #recentFilterDropdown {
         font-size: 16px !important;
         padding: 10px 20px !important;
-      }}
+      }
 
       /* —— 以下是你原有的其他移动端规则，保持不动 —— */
-      header h1 {{ font-size: 18px; }}
+      header h1 { font-size: 18px; }
       .search-controls select,
-      .search-controls input {{ width: 100%; margin: 5px 0; }}
-      .search-controls button {{ width: 100%; margin: 5px 0; }}
-      .jump-btn, .nav-btn {{ font-size: 16px; padding: 8px 16px; }}
-      .comment .comment-text {{ font-size: var(--font-size); }}
-      #timeSortDropdown, #filterDropdown {{ font-size: 14px !important; padding: 12px 12px !important; }}
-    }}
+      .search-controls input { width: 100%; margin: 5px 0; }
+      .search-controls button { width: 100%; margin: 5px 0; }
+      .jump-btn, .nav-btn { font-size: 16px; padding: 8px 16px; }
+      .comment .comment-text { font-size: var(--font-size); }
+      #timeSortDropdown, #filterDropdown { font-size: 14px !important; padding: 12px 12px !important; }
+    }
 
     /* 列表布局：卡片布局与列表布局切换 */
-    #articleComments.layout-list .comment {{
+    #articleComments.layout-list .comment {
       box-shadow: none !important;
       border: none !important;
       margin: 10px 0 !important;
       padding: 10px !important;
       border-bottom: 1px solid #ccc;
       border-radius: 0 !important;
-    }}
-    @media (min-width: 769px) {{
-      #articleComments.layout-list {{
+    }
+    @media (min-width: 769px) {
+      #articleComments.layout-list {
           display: flex;
           flex-direction: column;
           align-items: center;
-      }}
-      #articleComments.layout-list .comment {{
+      }
+      #articleComments.layout-list .comment {
           margin: 10px auto !important;
           max-width: 800px;
-      }}
-    }}
+      }
+    }
     #articleComments.layout-list .comment.highlighted-comment,
-    #articleComments.layout-list .comment.search-highlight {{
+    #articleComments.layout-list .comment.search-highlight {
         border: 4px solid #ff8888!important !important;
-    }}
+    }
     /* 加载动画 */
-    .loading-indicator {{
+    .loading-indicator {
       position: fixed;
       top: 50%;
       left: 50%;
@@ -706,9 +1608,9 @@ body.dark-mode .dropdown-hint {{
       border-radius: 8px;
       z-index: 3000;
       display: none;
-    }}
+    }
     /* 设置面板（Modal）样式 */
-    .modal {{
+    .modal {
       display: none;
       position: fixed;
       z-index: 2000;
@@ -718,8 +1620,8 @@ body.dark-mode .dropdown-hint {{
       height: 100%;
       overflow: auto;
       background-color: rgba(0,0,0,0.4);
-    }}
-    .modal-content {{
+    }
+    .modal-content {
       background-color: #fefefe;
       margin: 10% auto;
       padding: 20px;
@@ -727,170 +1629,78 @@ body.dark-mode .dropdown-hint {{
       width: 80%;
       max-width: 400px;
       border-radius: 8px;
-    }}
+    }
     .modal-content input,
-    .modal-content select {{
+    .modal-content select {
       width: 100%;
       padding: 8px;
       margin: 8px 0;
       box-sizing: border-box;
-    }}
-    .modal-content button {{
+    }
+    .modal-content button {
       padding: 10px 15px;
       margin: 10px 5px 0 5px;
       border: none;
       border-radius: 5px;
       cursor: pointer;
-    }}
-    img, iframe, embed, object, video {{
+    }
+    img, iframe, embed, object, video {
       max-width: 100%;
       height: auto;
-    }}
-  </style>
-</head>
-<body>
-  <header>
-    <div style="display:flex; align-items:center;">
-      <!-- 使用彩色 emoji 表情替换图标 -->
-      <h1>☀️阳气诊所</h1>
-      <button class="btn btn-header" onclick="toggleDarkMode()">🌙夜间</button>
-      <button class="btn btn-header" onclick="openSettings()">⚙️设置</button>
-      <!-- 语言切换下拉框 -->
-      <select id="languageSelect" onchange="changeLanguage()" class="btn btn-header">
-        <option value="original">原内容</option>
-        <option value="traditional">繁體</option>
-        <option value="simplified">简体</option>
-      </select>
-    </div>
-  </header>
-
-  <div class="search-controls">
-    <select id="searchType">
-      <option value="comment">💬 根据评论搜索</option>
-      <option value="author">👤 根据评论人搜索</option>
-      <option value="article">📄 根据文章内容搜索</option>
-      <option value="siteBing">🌐 全站搜索 (必应, 不翻墙)</option>
-      <option value="siteGoogle">🌐 全站搜索 (谷歌, 翻墙)</option>
-    </select>
-    <input type="text" id="searchKeyword" placeholder="请输入搜索内容..." oninput="toggleSearchButton()">
-    <button id="searchButton" class="btn" onclick="searchComments()" disabled>
-      🔍 搜索
-    </button>
-    <button class="btn btn-danger search-close-btn" id="searchCloseButton" onclick="closeSearchResults()">
-      ❌ 关闭搜索结果
-    </button>
-    <!-- 新增查看最近评论按钮 -->
-    <button id="recentCommentsButton" class="btn btn-secondary" onclick="showRecentComments()">🕑 查看最近评论</button>
-  </div>
-  <div id="searchExtraControls"></div>
-  <div id="loadingIndicator" class="loading-indicator">加载中... ⏳</div>
-  <div id="searchCount"></div>
-  <div id="pagination" class="pagination"></div>
-  <ul id="searchResults" class="search-results"></ul>
-  <hr>
- <h2 style="text-align:center; margin-top:30px;">文章评论分页显示</h2>
-<div style="text-align:center;">
-  <select id="articleDropdown" aria-describedby="articleDropdownHint" onchange="changeArticle()"></select>
-  <div id="articleDropdownHint" class="dropdown-hint">
-    💡 小提示：本页通常包含多篇文章，点击上方下拉列表可选择要查看的文章。
-  </div>
-</div>
-<div id="articlePagination" class="pagination"></div>
-
-  <div id="articleComments" class="layout-card"></div>
-  <div id="articleNav" style="text-align: center; margin: 20px 0;">
-    <button id="prevArticleBtn" class="nav-btn" onclick="prevArticle()">
-      ⬅️ 上一篇
-    </button>
-    <button id="nextArticleBtn" class="nav-btn" onclick="nextArticle()">
-      下一篇 ➡️
-    </button>
-  </div>
-  <button class="back-to-top" onclick="scrollToTop()">↑</button>
-  <!-- 设置面板（Modal） -->
-  <div id="settingsModal" class="modal">
-    <div class="modal-content">
-      <h2>🛠️ 页面设置</h2>
-      <!-- 文本颜色设置 -->
-      <div style="border-bottom: 1px solid #ccc; margin-bottom: 10px; padding-bottom: 10px;">
-        <h3>🎨 文本颜色设置</h3>
-        <label for="textColorInput">文本颜色:</label>
-        <input type="color" id="textColorInput" value="#333333">
-      </div>
-      <!-- 字体设置 -->
-      <div style="border-bottom: 1px solid #ccc; margin-bottom: 10px; padding-bottom: 10px;">
-        <h3>🔠 字体设置</h3>
-        <label for="fontSizeInput">字体大小 (px): <span id="fontSizeVal">16</span></label>
-        <input type="range" id="fontSizeInput" min="12" max="36" value="16" oninput="document.getElementById('fontSizeVal').innerText=this.value">
-        <label for="lineHeightInput">行距 (倍数):</label>
-        <input type="number" id="lineHeightInput" min="1" max="3" step="0.1" value="1.6">
-        <label for="fontFamilySelect">字体样式:</label>
-        <select id="fontFamilySelect">
-          <option value="Roboto, sans-serif">Roboto</option>
-          <option value="Arial, sans-serif">Arial</option>
-          <option value="'Times New Roman', serif">Times New Roman</option>
-          <option value="Verdana, sans-serif">Verdana</option>
-          <option value="'Courier New', monospace">Courier New</option>
-          <option value="Georgia, serif">Georgia</option>
-          <option value="'Microsoft YaHei', sans-serif">微软雅黑</option>
-          <option value="'SimSun', serif">宋体</option>
-          <option value="'SimHei', serif">黑体</option>
-          <option value="'FangSong', serif">仿宋</option>
-          <option value="'KaiTi', serif">楷体</option>
-          <option value="'PingFang SC', sans-serif">苹方</option>
-        </select>
-      </div>
-      <!-- 新增：主题选择（新增“无主题”选项） -->
-      <div style="border-bottom: 1px solid #ccc; margin-bottom: 10px; padding-bottom: 10px;">
-        <h3>🌈 主题选择</h3>
-        <label for="themeSelect">选择主题:</label>
-        <select id="themeSelect">
-          <option value="none" selected>无主题</option>
-          <optgroup label="中国风">
-            <option value="chinese1">墨韵山水</option>
-            <option value="chinese2">书香古韵</option>
-            <option value="chinese3">云水谣</option>
-          </optgroup>
-          <optgroup label="都市风尚">
-            <option value="modern1">清风雅韵</option>
-            <option value="modern2">现代简约</option>
-            <option value="modern3">经典时光</option>
-          </optgroup>
-          <optgroup label="新主题">
-            <option value="romantic">浪漫粉彩</option>
-            <option value="techBlue">科技蓝调</option>
-            <option value="dreamPurple">梦幻紫</option>
-            <option value="minimalBlackWhite">极简黑白</option>
-            <option value="vintage">复古风情</option>
-            <option value="japaneseFresh">日系清新</option>
-          </optgroup>
-        </select>
-      </div>
-      <!-- 布局风格设置 -->
-      <div style="border-bottom: 1px solid #ccc; margin-bottom: 10px; padding-bottom: 10px;">
-        <h3>🗂️ 布局风格设置</h3>
-        <label for="layoutStyleSelect">选择布局风格:</label>
-        <select id="layoutStyleSelect">
-          <option value="card" selected>卡片布局</option>
-          <option value="list">列表布局</option>
-        </select>
-      </div>
-      <div style="text-align: right; margin-top: 10px;">
-        <button class="btn" onclick="applySettings()" style="background-color: var(--primary-color); color: white;">应用</button>
-        <button class="btn btn-secondary" onclick="restoreDefaults()">还原默认</button>
-        <button class="btn btn-danger" onclick="closeSettings()">关闭</button>
-      </div>
-    </div>
-  </div>
+    }
+    /* 外部 iframe 的占位按钮，点击后才加载 */
+    .iframe-placeholder {
+      display: block;
+      width: 100%;
+      max-width: 560px;
+      aspect-ratio: 16 / 9;
+      margin: 10px 0;
+      font-size: var(--font-size);
+      color: var(--primary-color);
+      background-color: #f0f0f0;
+      border: 1px dashed var(--primary-color);
+      border-radius: 5px;
+      cursor: pointer;
+    }
+    body.dark-mode .iframe-placeholder {
+      color: #66aaff;
+      background-color: #2b2b2b;
+      border-color: #66aaff;
+    }
+    /* 性能统计面板（调试用） */
+    .perf-panel {
+      display: none;
+      position: fixed;
+      right: 10px;
+      bottom: 10px;
+      z-index: 2000;
+      padding: 8px;
+      font: 12px/1.4 monospace;
+      background-color: rgba(255,255,255,0.95);
+      border: 1px solid #ccc;
+      border-radius: 5px;
+      box-shadow: 0 2px 8px rgba(0,0,0,0.2);
+    }
+    .perf-panel.visible {
+      display: block;
+    }
+    .perf-panel td, .perf-panel th {
+      padding: 0 6px;
+      text-align: right;
+    }
+    .perf-panel td:first-child, .perf-panel th:first-child {
+      text-align: left;
+    }
+    body.dark-mode .perf-panel {
+      color: #ccc;
+      background-color: rgba(43,43,43,0.95);
+      border-color: #444;
+    }
+"""
 
-  <script>
-    /* ---------------- 简繁转换器初始化 ---------------- */
-    var converterCn2Tw = OpenCC.Converter({{ from: 'cn', to: 'tw' }});
-    var converterTw2Cn = OpenCC.Converter({{ from: 'tw', to: 'cn' }});
-        // 👇 新增：标准繁体 和 香港繁体
-    var converterCn2T  = OpenCC.Converter({{ from: 'cn', to: 't'  }});
-    var converterCn2Hk = OpenCC.Converter({{ from: 'cn', to: 'hk' }});
 
+# 页面脚本
+APP_JS = r"""
     /* ---------------- 全局变量 ---------------- */
     var currentSearchKeyword = "";
     var currentLanguage = "original"; // "original"、"traditional"、"simplified"
@@ -898,52 +1708,137 @@ body.dark-mode .dropdown-hint {{
     var currentSortOrder = "default"; // "default", "asc" 或 "desc"
     var filterSpecialAuthors = false; // false：全部结果；true：只显示作者为 "李宗恩" 或 "andy"
 
+    /* ---------------- 性能统计 ----------------
+       主要操作用 performance.mark / measure 记录（开发者工具的性能面板中可见），
+       本次访问的耗时分位数显示在调试面板中；生成网页时指定了 --perf-beacon 则在页面隐藏时批量上报 */
+    const PERF_SAMPLE_LIMIT = 200;    // 每种操作最多保留的样本数
+    const PERF_BEACON_BATCH = 20;     // 攒够这么多条就立即上报一次
+    var perfSamples = {};             // 操作名 -> [耗时 ms, ...]
+    var perfUnsent = [];              // 尚未上报的样本 [{name, ms}]
+    var perfSeq = 0;
+
+    function metaContent(name) {
+      const meta = document.querySelector('meta[name="' + name + '"]');
+      return meta ? meta.content : "";
+    }
+
+    // 开始计时，返回结束函数（多次调用只记录第一次）。异步操作在真正完成时再调用结束函数
+    function perfSpan(name) {
+      if (!window.performance || !performance.mark) return function() {};
+      const mark = name + '#' + (++perfSeq);
+      const start = performance.now();
+      performance.mark(mark);
+      let finished = false;
+      return function() {
+        if (finished) return;
+        finished = true;
+        try { performance.measure(name, mark); } catch (e) {}
+        performance.clearMarks(mark);
+        recordPerf(name, performance.now() - start);
+      };
+    }
+
+    function recordPerf(name, ms) {
+      const samples = perfSamples[name] || (perfSamples[name] = []);
+      samples.push(ms);
+      if (samples.length > PERF_SAMPLE_LIMIT) samples.shift();
+      if (metaContent('perf-beacon')) {
+        perfUnsent.push({ name: name, ms: Math.round(ms * 10) / 10 });
+        if (perfUnsent.length >= PERF_BEACON_BATCH) sendPerfBeacon();
+      }
+      updatePerfPanel();
+    }
+
+    function percentile(sorted, p) {
+      return sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * p / 100))];
+    }
+
+    function updatePerfPanel() {
+      const panel = document.getElementById('perfPanel');
+      if (!panel || !panel.classList.contains('visible')) return;
+      let rows = '';
+      Object.keys(perfSamples).sort().forEach(function(name) {
+        const sorted = perfSamples[name].slice().sort(function(a, b) { return a - b; });
+        rows += '<tr><td>' + name + '</td><td>' + sorted.length + '</td>'
+          + [50, 90, 99].map(function(p) { return '<td>' + percentile(sorted, p).toFixed(1) + '</td>'; }).join('')
+          + '<td>' + sorted[sorted.length - 1].toFixed(1) + '</td></tr>';
+      });
+      panel.innerHTML = '<table><tr><th>操作（ms）</th><th>次数</th><th>p50</th><th>p90</th><th>p99</th><th>最大</th></tr>'
+        + rows + '</table><div>版本 ' + metaContent('build-id') + '</div>';
+    }
+
+    // 地址中的 ?perf=1 / ?perf=0 打开或关闭面板，设置保存在本地
+    function initPerfPanel() {
+      const flag = new URLSearchParams(location.search).get('perf');
+      if (flag !== null) localStorage.setItem('perfPanel', flag);
+      if (localStorage.getItem('perfPanel') === '1') {
+        document.getElementById('perfPanel').classList.add('visible');
+        updatePerfPanel();
+      }
+    }
+
+    function sendPerfBeacon() {
+      const url = metaContent('perf-beacon');
+      if (!url || !perfUnsent.length || !navigator.sendBeacon) return;
+      const payload = JSON.stringify({
+        build: metaContent('build-id'),
+        page: location.pathname,
+        userAgent: navigator.userAgent,
+        samples: perfUnsent.splice(0)
+      });
+      navigator.sendBeacon(url, new Blob([payload], { type: 'application/json' }));
+    }
+
+    document.addEventListener('visibilitychange', function() {
+      if (document.visibilityState === 'hidden') sendPerfBeacon();
+    });
+
     /* ---------------- 辅助函数 ---------------- */
     
     
         
     // 1) 归一化：和你的搜索规则保持一致（NFKC + 繁转简 + 小写）
-    function norm(s='') {{
-      try {{ s = s.normalize('NFKC'); }} catch(e) {{}}
-      s = converterTw2Cn(s);     // 你已有的 OpenCC：繁 -> 简
+    function norm(s='') {
+      try { s = s.normalize('NFKC'); } catch(e) {}
+      s = foldToSimplified(s);   // 繁 -> 简（生成网页时预先计算的逐字映射）
       s = s.toLowerCase();
       return s;
-    }}
+    }
     
     // 2) 把原文本逐字归一化，同时建立“归一化串索引 -> 原文下标”的映射
-    function buildNormIndexMap(raw) {{
+    function buildNormIndexMap(raw) {
       const map = [];     // map[normIndex] = originalIndex
       let normStr = '';
-      for (let i = 0; i < raw.length; i++) {{
+      for (let i = 0; i < raw.length; i++) {
         const ch = raw[i];
         const n = norm(ch);   // 单字符归一化（保持索引一一对应）
         normStr += n;
-        for (let k = 0; k < n.length; k++) {{
+        for (let k = 0; k < n.length; k++) {
           map.push(i);        // 归一化出的每个位置都指回这个原字符
-        }}
-      }}
-      return {{ normStr, map }};
-    }}
+        }
+      }
+      return { normStr, map };
+    }
     
     // 3) 在归一化串里找所有命中区间
-    function findAll(haystack, needle) {{
+    function findAll(haystack, needle) {
       const hits = [];
       if (!needle) return hits;
       let i = 0;
-      while ((i = haystack.indexOf(needle, i)) !== -1) {{
+      while ((i = haystack.indexOf(needle, i)) !== -1) {
         hits.push([i, i + needle.length]); // 半开区间
         i += Math.max(needle.length, 1);
-      }}
+      }
       return hits;
-    }}
+    }
     
 // 用归一化索引在“单个文本节点”内高亮，不破坏外层 DOM 结构
-function highlightOneTextNode(node, keyword) {{
+function highlightOneTextNode(node, keyword) {
   const raw = node.nodeValue;
   if (!raw || !keyword) return;
 
   // 复用你已有的归一化工具
-  const {{ normStr, map }} = buildNormIndexMap(raw);
+  const { normStr, map } = buildNormIndexMap(raw);
   const nk = norm(keyword);
   const hits = findAll(normStr, nk);
   if (!hits.length) return;
@@ -952,14 +1847,14 @@ function highlightOneTextNode(node, keyword) {{
   const frag = document.createDocumentFragment();
   let lastEnd = raw.length;
 
-  for (let i = hits.length - 1; i >= 0; i--) {{
+  for (let i = hits.length - 1; i >= 0; i--) {
     const [s, e] = hits[i];
     const start = map[s];
     const end   = map[e - 1] + 1;
 
-    if (end < lastEnd) {{
+    if (end < lastEnd) {
       frag.prepend(document.createTextNode(raw.slice(end, lastEnd)));
-    }}
+    }
 
     const span = document.createElement('span');
     span.className = 'keyword-highlight';
@@ -967,272 +1862,388 @@ function highlightOneTextNode(node, keyword) {{
     frag.prepend(span);
 
     lastEnd = start;
-  }}
+  }
 
-  if (lastEnd > 0) {{
+  if (lastEnd > 0) {
     frag.prepend(document.createTextNode(raw.slice(0, lastEnd)));
-  }}
+  }
 
   node.replaceWith(frag);
-}}
+}
 
 // 遍历 el 下所有文本节点逐个高亮（不跨标签匹配）
-function highlightNormalized(el, keyword) {{
+function highlightNormalized(el, keyword) {
   // 先清旧高亮（保持你原先的做法）
-  el.querySelectorAll('span.keyword-highlight').forEach(function(sp) {{
+  el.querySelectorAll('span.keyword-highlight').forEach(function(sp) {
     const p = sp.parentNode;
     while (sp.firstChild) p.insertBefore(sp.firstChild, sp);
     p.removeChild(sp);
     p.normalize();
-  }});
+  });
   if (!keyword || !keyword.trim()) return;
 
   const walker = document.createTreeWalker(
     el,
     NodeFilter.SHOW_TEXT,
-    {{
-      acceptNode: (n) => {{
+    {
+      acceptNode: (n) => {
         if (!n.nodeValue || !n.nodeValue.trim()) return NodeFilter.FILTER_REJECT;
         const p = n.parentNode;
         if (!p) return NodeFilter.FILTER_REJECT;
         const tn = p.nodeName;
-        if (tn === 'SCRIPT' || tn === 'STYLE' || tn === 'NOSCRIPT' || tn === 'IFRAME') {{
+        if (tn === 'SCRIPT' || tn === 'STYLE' || tn === 'NOSCRIPT' || tn === 'IFRAME') {
           return NodeFilter.FILTER_REJECT;
-        }}
+        }
         return NodeFilter.FILTER_ACCEPT;
-      }}
-    }}
+      }
+    }
   );
 
   const nodes = [];
   while (walker.nextNode()) nodes.push(walker.currentNode);
   nodes.forEach(textNode => highlightOneTextNode(textNode, keyword));
-}}
+}
 
-    
-    function escapeRegExp(s) {{
-      // 标准写法：把正则特殊字符全部转义
-      return s.replace(/[.*+?^${{}}()|[\\]\\]/g, '\\$&');
-    }}
-
-        // 统一正规化（可选，但更稳）
-    function toNFKC(s) {{
-      try {{ return s.normalize('NFKC'); }} catch (e) {{ return s; }}
-    }}
-
-     /* 半角/全角标点映射（可按需扩展） */
-    const PUNCT_MAP = {{
-      ',': '，',
-      '.': '。',
-      '!': '！',
-      '?': '？',
-      ':': '：',
-      ';': '；',
-      '(': '（',
-      ')': '）',
-      '[': '【',
-      ']': '】',
-      '"': '“”',    // 常见中文引号
-      "'": '‘’',
-      '-': '－',
-      '_': '＿',
-      '/': '／'
-    }};
-
-    /* 把字符串里的标点替换为“字符类”，例如 "," -> "[,，]"，从而同时匹配半角/全角 */
-    function punctFlexiblePattern(s) {{
-      return s.split('').map(function(ch) {{
-        const fw = PUNCT_MAP[ch];
-        if (fw) {{
-          // 去重后拼到一个字符类里
-          const uniq = Array.from(new Set([ch, ...fw.split('')]))
-            .map(escapeRegExp)
-            .join('');
-          return `[${{uniq}}]`;
-        }}
-        return escapeRegExp(ch);
-      }}).join('');
-    }}
-
-    /* ✅ 方案一：让正则同时匹配“原样 + NFKC + 半/全角标点变体” */
-    function buildHighlightRegex(kw) {{
-      // 基础形态（原样 + 简繁/港台互转）
-      const baseForms = Array.from(new Set([
-        kw,
-        converterTw2Cn(kw),
-        converterCn2Tw(kw),
-        converterCn2T(kw),
-        converterCn2Hk(kw)
-      ].filter(Boolean)));
-
-      // 扩展出：原样、NFKC 后的版本，并分别做“标点灵活匹配”
-      const patterns = new Set();
-      baseForms.forEach(function(s) {{
-        const raw = s;
-        const nk  = toNFKC(s);
-        patterns.add(punctFlexiblePattern(raw));
-        patterns.add(punctFlexiblePattern(nk));
-      }});
-
-      const pattern = '(' + Array.from(patterns).join('|') + ')';
-      return new RegExp(pattern, 'gi'); // i 忽略大小写，g 全局
-    }}
-
-     /* 👉 在这里插入： */
-  function getKwRegex() {{
-    if (!currentSearchKeyword) return null;
-    return buildHighlightRegex(currentSearchKeyword);
-  }}
 
      // —— 新增：用于“无间隔匹配”的标准化 ——
     // 简繁 -> 简体；NFKC；小写；去掉所有空白（空格、换行、制表等）
-    function normalizeForSearch(s) {{
+    function normalizeForSearch(s) {
       s = s || '';
-      try {{ s = s.normalize('NFKC'); }} catch(e) {{}}
-      s = converterTw2Cn(s);
+      try { s = s.normalize('NFKC'); } catch(e) {}
+      s = foldToSimplified(s);
       s = s.toLowerCase();
       s = s.replace(/\s+/g, '');
       return s;
-    }}
-
+    }
+
+
+    /* ---------------- 简繁数据（生成网页时预先转换，切换语言时按需加载） ---------------- */
+    // languageShards（各语言数据文件路径）与 foldMap（繁 -> 简逐字映射）由数据文件提供
+    var languageData = {};
+
+    // 语言数据文件加载后调用，shard = {chars: {原字: 转换后的字}}
+    function registerLanguageShard(lang, shard) {
+      languageData[lang] = shard;
+    }
+
+    function loadLanguageShard(lang, callback) {
+      if (lang === "original" || languageData[lang]) {
+        callback();
+        return;
+      }
+      const script = document.createElement('script');
+      script.src = languageShards[lang];
+      script.onload = callback;
+      script.onerror = function() {
+        hideLoading();
+        alert("😢 语言数据加载失败，请稍后重试");
+      };
+      document.head.appendChild(script);
+    }
+
+    function mapChars(s, map) {
+      let out = '';
+      for (const ch of s) {
+        out += map[ch] || ch;
+      }
+      return out;
+    }
+
+    function foldToSimplified(s) {
+      return mapChars(s, foldMap);
+    }
+
+    // 转换结果缓存：每种语言一份“原文 -> 转换结果”，同一段文字在页面生命周期内只转换一次
+    var conversionCache = {};
+
+    // 界面文字、搜索结果摘要等短文本：按当前语言逐字转换
+    function convertText(s) {
+      const shard = languageData[currentLanguage];
+      if (currentLanguage === "original" || !shard) return s;
+      const cache = conversionCache[currentLanguage] || (conversionCache[currentLanguage] = new Map());
+      let converted = cache.get(s);
+      if (converted === undefined) {
+        converted = mapChars(s, shard.chars);
+        cache.set(s, converted);
+      }
+      return converted;
+    }
+
+    /* ---------------- 文章数据分片（打开文章时按需加载） ---------------- */
+    // articleShards（{语言: [分片文件路径, ...]}）由数据文件提供，articlesData[i].shard 为文章所在分片
+    var articleHtml = {};          // {语言: {文章链接: 文章 HTML}}
+    var loadedArticleShards = {};  // 分片文件路径 -> true（已加载）或等待加载完成的回调列表
+
+    // 分片文件加载后调用，articles = {文章链接: 该语言预先转换好的文章 HTML}
+    function registerArticleShard(lang, articles) {
+      const target = articleHtml[lang] || (articleHtml[lang] = {});
+      for (const url in articles) {
+        target[url] = articles[url];
+      }
+    }
+
+    // 文章内容所用的语言：语言数据尚未加载时显示原文
+    function articleLanguage() {
+      return currentLanguage !== "original" && languageData[currentLanguage] ? currentLanguage : "original";
+    }
+
+    function loadArticleShard(index, callback) {
+      const src = articleShards[articleLanguage()][articlesData[index].shard];
+      const state = loadedArticleShards[src];
+      if (state === true) {
+        callback();
+        return;
+      }
+      if (state) {
+        state.push(callback);
+        return;
+      }
+      loadedArticleShards[src] = [callback];
+      loadScript(src, function() {
+        const waiting = loadedArticleShards[src];
+        loadedArticleShards[src] = true;
+        waiting.forEach(function(cb) { cb(); });
+      }, function() {
+        delete loadedArticleShards[src];  // 允许下次重试
+      });
+    }
+
+    // 文章标题与文章/评论 HTML：直接取当前语言预先转换好的版本（所在分片须已加载）
+    function localizedArticle(index) {
+      return { title: articlesData[index].title,
+               comments_html: articleHtml[articleLanguage()][articlesData[index].article_url] };
+    }
 
     /* ---------------- 全文语言切换相关函数 ---------------- */
-    function initOriginalText(root) {{
-      if (root.nodeType === Node.TEXT_NODE) {{
-        if (root.textContent.trim() !== "") {{
-          if (!root._originalText) {{
+    // 带 data-prerendered-language 的容器内容已按语言预先转换，不再逐个文本节点处理
+    function isPrerendered(el) {
+      return el.hasAttribute && el.hasAttribute('data-prerendered-language');
+    }
+
+    function initOriginalText(root) {
+      if (root.nodeType === Node.TEXT_NODE) {
+        if (root.textContent.trim() !== "") {
+          if (!root._originalText) {
             root._originalText = root.textContent;
-          }}
-        }}
-      }} else if (root.nodeType === Node.ELEMENT_NODE && !["SCRIPT", "STYLE", "NOSCRIPT", "IFRAME"].includes(root.tagName)) {{
-        for (var i = 0; i < root.childNodes.length; i++) {{
+          }
+        }
+      } else if (root.nodeType === Node.ELEMENT_NODE && !isPrerendered(root) && !["SCRIPT", "STYLE", "NOSCRIPT", "IFRAME"].includes(root.tagName)) {
+        for (var i = 0; i < root.childNodes.length; i++) {
           initOriginalText(root.childNodes[i]);
-        }}
-      }}
-    }}
-
-    function applyLanguageToNode(root) {{
-      if (root.nodeType === Node.TEXT_NODE) {{
-        if (root._originalText === undefined) {{
+        }
+      }
+    }
+
+    // 隐藏中的区域（如关闭后的设置弹窗）先不转换，等它重新显示时再转换
+    var hiddenLanguageRoots = new Map();   // 元素 -> 监听其显示状态的 MutationObserver
+
+    function isHidden(el) {
+      return el.hidden || (el.style && el.style.display === 'none');
+    }
+
+    function deferLanguageUntilVisible(el) {
+      if (hiddenLanguageRoots.has(el)) return;
+      const observer = new MutationObserver(function() {
+        if (isHidden(el)) return;
+        observer.disconnect();
+        hiddenLanguageRoots.delete(el);
+        applyLanguageToNode(el);
+      });
+      observer.observe(el, { attributes: true, attributeFilter: ['style', 'hidden'] });
+      hiddenLanguageRoots.set(el, observer);
+    }
+
+    // 每个文本节点记下已转换成的语言（_language），已是当前语言的节点直接跳过
+    function applyLanguageToNode(root) {
+      if (root.nodeType === Node.TEXT_NODE) {
+        if (root._originalText === undefined) {
           root._originalText = root.textContent;
-        }}
-        if (currentLanguage === "original") {{
-          root.textContent = root._originalText;
-        }} else if (currentLanguage === "simplified") {{
-          root.textContent = converterTw2Cn(root._originalText);
-        }} else if (currentLanguage === "traditional") {{
-          root.textContent = converterCn2Tw(root._originalText);
-        }}
-      }} else if (root.nodeType === Node.ELEMENT_NODE && !["SCRIPT", "STYLE", "NOSCRIPT", "IFRAME"].includes(root.tagName)) {{
-        for (var i = 0; i < root.childNodes.length; i++) {{
+        }
+        if (root._language === currentLanguage) return;
+        root.textContent = convertText(root._originalText);
+        root._language = currentLanguage;
+      } else if (root.nodeType === Node.ELEMENT_NODE && !isPrerendered(root) && !["SCRIPT", "STYLE", "NOSCRIPT", "IFRAME"].includes(root.tagName)) {
+        if (isHidden(root) && typeof MutationObserver !== 'undefined') {
+          deferLanguageUntilVisible(root);
+          return;
+        }
+        for (var i = 0; i < root.childNodes.length; i++) {
           applyLanguageToNode(root.childNodes[i]);
-        }}
-      }}
-    }}
+        }
+      }
+    }
 
-    function reRenderDynamicAreasBeforeLanguageApply() {{
-  // 1) 文章区域：用数据源还原为“原始 HTML”，清掉高亮/红框残留
+    // 文章区域重新渲染（可能需要先下载该语言的文章分片）完成后调用 done
+    function reRenderDynamicAreasBeforeLanguageApply(done) {
+  // 1) 文章区域：用当前语言的数据重新渲染，清掉高亮/红框残留
   const dropdown = document.getElementById('articleDropdown');
-  if (dropdown && dropdown.value !== "") {{
-    const idx = parseInt(dropdown.value, 10);
-    const container = document.getElementById('articleComments');
-    container.innerHTML = articlesData[idx].comments_html; // 直接回到原始 HTML
-    initOriginalText(container);
-  }}
+  if (dropdown && dropdown.value !== "") {
+    renderArticle(parseInt(dropdown.value, 10), done);
+  } else {
+    done();
+  }
 
   // 2) 搜索结果区域：按当前分页/排序/过滤重新渲染
   const results = document.getElementById('searchResults');
-  if (results && results.children.length) {{
+  if (results && results.children.length) {
     results.innerHTML = "";
     displayPageResults(); // 里面会对每个 li 调 initOriginalText + applyLanguageToNode
-  }}
-}}
+  }
+}
 
 
 
-    function changeLanguage() {{
-      currentLanguage = document.getElementById("languageSelect").value;
-      // ⚠️ 关键：先把动态区域还原为“原始 DOM”，再统一应用语言
-      reRenderDynamicAreasBeforeLanguageApply();
+    function changeLanguage(finish) {
+      finish = finish || perfSpan('changeLanguage');
+      const lang = document.getElementById("languageSelect").value;
+      if (lang !== "original" && !languageData[lang]) {
+        // 首次切换到该语言：先加载对应的语言数据
+        showLoading();
+        loadLanguageShard(lang, function() {
+          hideLoading();
+          changeLanguage(finish);
+        });
+        return;
+      }
+      if (lang === currentLanguage) return;
+      currentLanguage = lang;
+      // ⚠️ 关键：先用当前语言的数据重新渲染动态区域，再转换界面文字（文章区域已预先转换，会被跳过；
+      // 隐藏的区域等显示时再转换，已转换过的文字直接取缓存）
+      reRenderDynamicAreasBeforeLanguageApply(finish);
       applyLanguageToNode(document.body);
-    }}
+    }
 
     /* ---------------- 搜索相关功能 ---------------- */
-    let allResults = [];
     let currentPage = 1;
     const resultsPerPage = 5;
 
-    function toggleSearchButton() {{
+    function toggleSearchButton() {
       const keyword = document.getElementById('searchKeyword').value.trim();
       document.getElementById('searchButton').disabled = (keyword === "");
-    }}
+    }
 
-    function showLoading() {{
+    // 边输入边搜索：停止输入 LIVE_SEARCH_DELAY 毫秒后搜索一次（站外搜索仍需点击按钮）
+    const LIVE_SEARCH_DELAY = 150;
+    var liveSearchTimer = null;
+
+    function onSearchInput() {
+      toggleSearchButton();
+      clearTimeout(liveSearchTimer);
+      const searchType = document.getElementById('searchType').value;
+      if (searchType === 'siteBing' || searchType === 'siteGoogle') return;
+      liveSearchTimer = setTimeout(function() {
+        if (document.getElementById('searchKeyword').value.trim()) {
+          searchComments(true);
+        } else if (activeSearchKind === 'search') {
+          closeSearchResults();
+        }
+      }, LIVE_SEARCH_DELAY);
+    }
+
+    function showLoading() {
       document.getElementById('loadingIndicator').style.display = 'block';
-    }}
+    }
 
-    function hideLoading() {{
+    function hideLoading() {
       document.getElementById('loadingIndicator').style.display = 'none';
-    }}
-
-
-
-/* ------------------ 新增：把时间字符串解析成时间戳的辅助函数 ------------------ */
-function parseTime(timeStr) {{
-  // 优先尝试 ISO 8601 格式
-  var iso = timeStr.replace(' ', 'T');
-  var t = Date.parse(iso);
-  if (!isNaN(t)) return t;
-  // 回退：用正则抽数字
-  var parts = timeStr.match(/(\d+)/g);
-  if (!parts) return 0;
-  return new Date(
-    +parts[0],           // 年
-    +parts[1] - 1,       // 月（0-based）
-    +parts[2],           // 日
-    parts[3] ? +parts[3] : 0,
-    parts[4] ? +parts[4] : 0,
-    parts[5] ? +parts[5] : 0
-  ).getTime();
-}}
-
-/* ------------------ 修改：查看最近评论 ------------------ */
-function showRecentComments() {{
-  showLoading();
+    }
+
+    /* ---------------- 搜索 Worker ---------------- */
+    // 搜索、最近评论的收集与排序都在 Worker 中完成（searchWorkerSrc / searchCorpusSrc 由数据文件提供），
+    // 结果分批发回，页面只渲染当前这一页
+    const SPECIAL_AUTHORS = ["李宗恩", "andy"];
+    var searchEngine = null;       // Worker；无法创建 Worker 时为在页面中运行的同一引擎
+    var searchEngineWaiting = [];
+    var activeSearchId = 0;        // 最新一次搜索的编号，旧搜索发回的结果直接丢弃
+    var activeSearchKind = "";     // "search" 或 "recent"
+    var activeSearchType = "";
+    var activeSearchLive = false;  // 边输入边搜索发起的搜索：没有结果时不弹窗
+    var activeSearchSpan = null;   // 当前搜索的计时（收到完整结果时结束，被取消则不记录）
+
+    function loadScript(src, onload, onerror) {
+      const script = document.createElement('script');
+      script.src = src;
+      script.onload = onload;
+      script.onerror = function() {
+        if (onerror) onerror();
+        hideLoading();
+        alert("😢 数据加载失败，请稍后重试");
+      };
+      document.head.appendChild(script);
+    }
+
+    function withSearchEngine(callback) {
+      if (searchEngine) {
+        callback();
+        return;
+      }
+      searchEngineWaiting.push(callback);
+      if (searchEngineWaiting.length > 1) return;   // 正在加载
+      function ready(engine) {
+        searchEngine = engine;
+        searchEngine.postMessage({
+          type: 'init',
+          corpusUrl: new URL(searchCorpusSrc, location.href).href,
+          foldMap: foldMap,
+          specialAuthors: SPECIAL_AUTHORS
+        });
+        searchEngineWaiting.splice(0).forEach(function(cb) { cb(); });
+      }
+      let worker = null;
+      try {
+        worker = new Worker(searchWorkerSrc);
+      } catch (e) {
+        worker = null;   // 以 file:// 打开页面时部分浏览器不允许创建 Worker
+      }
+      if (worker) {
+        worker.onmessage = function(e) { onSearchMessage(e.data); };
+        worker.onerror = function() {
+          hideLoading();
+          alert("😢 搜索出错，请刷新页面后重试");
+        };
+        ready(worker);
+        return;
+      }
+      // 退回到主线程：加载同一个引擎脚本和搜索数据，引擎分批运行，不会长时间卡住页面
+      loadScript(searchWorkerSrc, function() {
+        loadScript(searchCorpusSrc, function() {
+          const engine = createSearchEngine(onSearchMessage);
+          ready({ postMessage: function(msg) { engine.handle(msg); } });
+        });
+      });
+    }
+
+    function searchView() {
+      return { page: currentPage, perPage: resultsPerPage, sort: currentSortOrder, special: filterSpecialAuthors };
+    }
+
+    // 开始新的搜索 / 最近评论查询，正在进行的旧搜索随之取消
+    function startSearchJob(msg, live) {
+      activeSearchId++;
+      activeSearchKind = msg.type;
+      activeSearchLive = !!live;
+      activeSearchSpan = perfSpan(msg.type === 'recent' ? 'showRecentComments'
+                                  : live ? 'searchComments(live)' : 'searchComments');
+      msg.id = activeSearchId;
+      msg.view = searchView();
+      if (!live) showLoading();
+      withSearchEngine(function() { searchEngine.postMessage(msg); });
+    }
+
+    function cancelSearchJob() {
+      activeSearchId++;
+      if (searchEngine) searchEngine.postMessage({ type: 'cancel' });
+      hideLoading();
+    }
+
+
+
+/* ------------------ 查看最近评论（在搜索 Worker 中收集并按时间排序） ------------------ */
+function showRecentComments() {
   currentSortOrder = "default";
   filterSpecialAuthors = false;
-  allResults = [];
   currentPage = 1;
 
-  // 收集所有评论，同时生成 timestamp 字段
-  articlesData.forEach(function(article, articleIndex) {{
-    var tempDiv = document.createElement("div");
-    tempDiv.innerHTML = article.comments_html;
-    var commentElems = tempDiv.querySelectorAll(".comment");
-    commentElems.forEach(function(commentElem) {{
-      var author   = commentElem.querySelector(".author").innerText || "";
-      var timeText = commentElem.querySelector(".time").innerText   || "";
-      var preview  = commentElem.querySelector(".comment-text").innerText.slice(0, 60) + "…";
-      allResults.push({{ 
-        id:           commentElem.id,
-        articleTitle: article.title,
-        author:       author,
-        time:         timeText,
-        timestamp:    parseTime(timeText),
-        text:         author + " – " + timeText + " : " + preview,
-        articleIndex: articleIndex
-      }});
-    }});
-  }});
-
-  // 按 timestamp 降序排序（最新在前）
-  allResults.sort(function(a, b) {{
-    return b.timestamp - a.timestamp;
-  }});
-
-
-  hideLoading();
-
   // 显示筛选控件
   var extra = ''
     + '<select id="recentFilterDropdown" class="btn btn-header" onchange="onRecentFilterChange()">'
@@ -1244,139 +2255,111 @@ function showRecentComments() {{
   extraEl.innerHTML = extra;
   document.getElementById("searchCloseButton").style.display = "inline-block";
 
-  displayPageResults();
-}}
+  startSearchJob({ type: 'recent' });
+}
+
+
+/* ------------------ 站长答疑（生成网页时预先整理好的李宗恩/andy 回复及其所答的问题） ------------------ */
+// answerIndex = {count, shardSize, shards: [分片文件路径]} 由数据文件提供；分片按回复时间从旧到新排列，
+// 页面按从新到旧显示，每页只加载所需的一两个分片，无需搜索引擎
+var answerShardData = {};     // 分片号 -> 条目数组
+var articleIndexByUrl = null;
+
+function registerAnswerShard(n, entries) {
+  answerShardData[n] = entries;
+}
+
+function escapeHtml(s) {
+  return String(s).replace(/[&<>"']/g, function(c) {
+    return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+  });
+}
+
+function showHostAnswers() {
+  cancelSearchJob();
+  activeSearchKind = 'answers';
+  currentSearchKeyword = "";
+  currentPage = 1;
+  document.getElementById("searchExtraControls").style.display = "none";
+  document.getElementById("searchCloseButton").style.display = "inline-block";
+  displayAnswerPage(perfSpan('showHostAnswers'));
+}
+
+function answerItem(entry) {
+  if (!articleIndexByUrl) {
+    articleIndexByUrl = {};
+    articlesData.forEach(function(article, i) { articleIndexByUrl[article.article_url] = i; });
+  }
+  const articleIndex = articleIndexByUrl[entry[1]];
+  const question = entry[6];
+  return {
+    id: entry[0],
+    articleIndex: articleIndex,
+    articleTitle: articlesData[articleIndex].title,
+    author: entry[2],
+    text: (question ? '<div class="answer-question">❓ ' + escapeHtml(question[1]) + ' - ' + escapeHtml(question[2])
+                      + '：' + escapeHtml(question[3]) + '</div>' : '')
+      + '<div>💬 ' + escapeHtml(entry[2]) + ' - ' + escapeHtml(entry[3]) + '：' + escapeHtml(entry[5]) + '</div>'
+  };
+}
+
+// 显示第 currentPage 页（最新的回复在前），对应按时间升序排列中的 [first, last)
+function displayAnswerPage(finish) {
+  const request = activeSearchId;
+  const total = answerIndex.count;
+  const last = total - (currentPage - 1) * resultsPerPage;
+  const first = Math.max(0, last - resultsPerPage);
+  const needed = [];
+  for (let n = Math.floor(first / answerIndex.shardSize); first < last && n * answerIndex.shardSize < last; n++) {
+    if (!answerShardData[n]) needed.push(n);
+  }
+  let pending = needed.length + 1;
+  function loaded() {
+    if (--pending > 0 || request !== activeSearchId) return;
+    const items = [];
+    for (let i = last - 1; i >= first; i--) {
+      items.push(answerItem(answerShardData[Math.floor(i / answerIndex.shardSize)][i % answerIndex.shardSize]));
+    }
+    renderResultsPage({ items: items, total: total, totalPages: Math.ceil(total / resultsPerPage),
+                        page: currentPage, done: true });
+    if (finish) finish();
+  }
+  needed.forEach(function(n) { loadScript(answerIndex.shards[n], loaded); });
+  loaded();
+}
 
 
 /* ---------------- 最近评论的筛选函数 ---------------- */
-function onRecentFilterChange() {{
+function onRecentFilterChange() {
   var val = document.getElementById("recentFilterDropdown").value;
   filterSpecialAuthors = (val === "special");
   displayPageResults();
-}}
+}
 
 
 
-    // 搜索函数，支持根据不同类型（文章、评论、作者）搜索，并为每个结果添加统一的 time 属性
-    function searchComments() {{
-      showLoading();
+    // 搜索函数，支持根据不同类型（文章、评论、作者）搜索；实际匹配在搜索 Worker 中进行。
+    // live 为 true 表示边输入边搜索
+    function searchComments(live) {
+      clearTimeout(liveSearchTimer);
       currentPage = 1;
       const keyword = document.getElementById('searchKeyword').value.trim();
       currentSearchKeyword = keyword;
       // 每次搜索重置排序和过滤状态
       currentSortOrder = "default";
       filterSpecialAuthors = false;
-     // 统一：关键词的“简体”用于匹配判断；多形态集合用于高亮
-     var kwRaw = (keyword || '').trim();
-     var kwCN  = toNFKC(converterTw2Cn(kwRaw)).toLowerCase();
-     var kwRegex = buildHighlightRegex(kwRaw);
 
       const searchType = document.getElementById('searchType').value;
-      if(searchType === 'siteBing') {{
+      if(searchType === 'siteBing') {
           let searchUrl = "https://www.bing.com/search?q=" + encodeURIComponent("site:andylee.pro " + keyword);
           window.open(searchUrl, '_blank');
-          hideLoading();
           return;
-      }} else if (searchType === 'siteGoogle') {{
+      } else if (searchType === 'siteGoogle') {
           let searchUrl = "https://www.google.com/search?q=" + encodeURIComponent("site:andylee.pro " + keyword);
           window.open(searchUrl, '_blank');
-          hideLoading();
           return;
-      }}
-
-      allResults = [];
-if (searchType === 'article') {{
-    articlesData.forEach(function(article, articleIndex) {{
-    const tempDiv = document.createElement('div');
-    tempDiv.innerHTML = article.comments_html;
-
-    const articleHeaderElem  = tempDiv.querySelector('.article-header');
-    const articleContentElem = tempDiv.querySelector('.article-content');
-
-    // 把标题+正文拼成待检索文本
-    let textToSearch = "";
-    if (articleHeaderElem)  {{ textToSearch  += articleHeaderElem.innerText + " "; }}
-    if (articleContentElem) {{ textToSearch  += articleContentElem.innerText;    }}
-
-      // 去空白后的无间隔匹配
-    var textCN_noWS = normalizeForSearch(textToSearch);
-    var kwCN_noWS   = normalizeForSearch(kwRaw);
-
-    if (textCN_noWS.indexOf(kwCN_noWS) !== -1) {{
-      let foundInHeader = false, foundInContent = false;
-
-      // 标题/正文命中位置判断也用去空白版本
-      foundInHeader  = !!(articleHeaderElem  &&
-        normalizeForSearch(articleHeaderElem.innerText).includes(kwCN_noWS));
-
-      foundInContent = !!(articleContentElem &&
-        normalizeForSearch(articleContentElem.innerText).includes(kwCN_noWS));
-
-      const previewText = articleContentElem ? articleContentElem.innerText.slice(0, 60) + '...' : "";
-      const articleTime = article.article_time || "未知时间";
-
-
-      allResults.push({{
-        id: "article-" + articleIndex,
-        articleTitle: article.title,
-        articleTime: articleTime,
-        time: articleTime,
-        text: `<strong>${{article.title}}</strong> - ${{articleTime}} - ${{previewText}}`,
-        articleIndex: articleIndex,
-        foundInHeader: foundInHeader,
-        foundInContent: foundInContent,
-        author: ""
-      }});
-    }}
-  }});
-}} else {{
-         articlesData.forEach(function(article, articleIndex) {{
-            const tempDiv = document.createElement('div');
-            tempDiv.innerHTML = article.comments_html;
-            const commentElems = tempDiv.querySelectorAll('.comment');
-            commentElems.forEach(function(commentElem) {{
-              let textToSearch = "";
-              if (searchType === 'comment') {{
-                const commentTextElem = commentElem.querySelector('.comment-text');
-                if (commentTextElem) {{
-                  textToSearch = toNFKC(commentTextElem.innerText || '').toLowerCase();
-                }}
-              }} else if (searchType === 'author') {{
-                const authorElem = commentElem.querySelector('.author');
-                if (authorElem) {{
-                 textToSearch = toNFKC(authorElem.innerText || '').toLowerCase();
-                }}
-              }}
-              var textCN_noWS = normalizeForSearch(textToSearch);
-              var kwCN_noWS   = normalizeForSearch(kwRaw);
-               if (textCN_noWS.indexOf(kwCN_noWS) !== -1) {{
-                const commentTextElem = commentElem.querySelector('.comment-text');
-                if (commentTextElem) {{  
-            if (!commentTextElem.dataset.rawHtml) {{
-                commentTextElem.dataset.rawHtml = commentTextElem.innerHTML;
-              }}
-              // 用“文本节点包装”高亮（kwRaw 是你上面已算好的原始关键词）
-              highlightNormalized(commentTextElem, kwRaw);
-            }}
-                const author = commentElem.querySelector('.author') ? commentElem.querySelector('.author').innerText : "";
-                const timeElem = commentElem.querySelector('.time');
-                const time = timeElem ? timeElem.innerText : "";
-                const commentPreview = commentElem.querySelector('.comment-text') ? commentElem.querySelector('.comment-text').innerText.slice(0, 60) + '...' : "";
-                const commentId = commentElem.id;
-                // 增加 time 属性便于排序
-                allResults.push({{
-                  id: commentId,
-                  articleTitle: article.title,
-                  text: author + " - " + time + " : " + commentPreview,
-                  articleIndex: articleIndex,
-                  author: author,
-                  time: time
-                }});
-              }}
-            }});
-         }});
-      }}
-      hideLoading();
+      }
+
       document.getElementById('searchCloseButton').style.display = 'inline-block';
       document.getElementById('searchExtraControls').style.display = 'block';
       // 根据搜索类型构建下拉列表：如果是文章搜索，则只显示时间排序下拉框
@@ -1385,151 +2368,149 @@ if (searchType === 'article') {{
                       '<option value="asc">时间排序：升序</option>' +
                       '<option value="desc">时间排序：降序</option>' +
                       '</select>';
-      if(searchType === "comment" || searchType === "author") {{
+      if(searchType === "comment" || searchType === "author") {
           extraHtml += '<select id="filterDropdown" class="btn btn-header" onchange="onFilterChange()">' +
                        '<option value="all">全部回复</option>' +
                        '<option value="special">仅看李宗恩/andy回复</option>' +
                        '</select>';
-      }}
+      }
       document.getElementById('searchExtraControls').innerHTML = extraHtml;
-      displayPageResults();
-      if (allResults.length === 0) {{
-        alert("😢 没有找到匹配的" + (searchType === 'article' ? "文章" : "评论") + "！");
-        closeSearchResults();
-      }}
-    }}
+      activeSearchType = searchType;
+      startSearchJob({ type: 'search', keyword: keyword, searchType: searchType }, live === true);
+    }
 
     // 时间排序下拉框响应函数
-    function onTimeSortChange() {{
+    function onTimeSortChange() {
       currentSortOrder = document.getElementById("timeSortDropdown").value;
       displayPageResults();
-    }}
+    }
 
     // 作者过滤下拉框响应函数
-    function onFilterChange() {{
+    function onFilterChange() {
       const value = document.getElementById("filterDropdown").value;
       filterSpecialAuthors = (value === "special");
       displayPageResults();
-    }}
-
-            // 显示搜索结果（包含分页、排序及过滤）
-          function displayPageResults() {{
-          let resultsToDisplay = allResults.slice();
-
-          // 过滤特殊作者
-          if (filterSpecialAuthors) {{
-            resultsToDisplay = resultsToDisplay.filter(function(result) {{
-              return result.author === "andy" || result.author === "李宗恩";
-            }});
-          }}
-
-          // 排序
-          if (currentSortOrder !== "default") {{
-            resultsToDisplay.sort(function(a, b) {{
-              let timeA = a.time === "未知时间" ? "9999" : a.time;
-              let timeB = b.time === "未知时间" ? "9999" : b.time;
-              return currentSortOrder === "asc"
-                ? timeA.localeCompare(timeB)
-                : timeB.localeCompare(timeA);
-            }});
-          }}
-
-          const totalResults = resultsToDisplay.length;
-          const totalPages = Math.ceil(totalResults / resultsPerPage);
-          if (currentPage > totalPages) currentPage = totalPages || 1;
-
-          document.getElementById('searchCount').innerHTML = "共找到 <span>" + totalResults + "</span> 条记录";
-          displayPagination(totalPages);
-
-          const start = (currentPage - 1) * resultsPerPage;
-          const end   = start + resultsPerPage;
-          const paginatedResults = resultsToDisplay.slice(start, end);
+    }
+
+    // 排序、过滤或翻页：向搜索引擎请求当前页（结果由 onSearchMessage 渲染）
+    function displayPageResults() {
+      if (activeSearchKind === 'answers') {
+        displayAnswerPage();
+        return;
+      }
+      if (!activeSearchId || !searchEngine) return;
+      searchEngine.postMessage({ type: 'view', id: activeSearchId, view: searchView() });
+    }
+
+    // 搜索引擎发回的结果：搜索过程中分批到达，每批都带当前页的条目
+    function onSearchMessage(msg) {
+      if (msg.type !== 'results' || msg.id !== activeSearchId) return;   // 已被新的搜索取代或已关闭
+      if (msg.done) hideLoading();
+      if (msg.event === 'done' && msg.kind === 'search' && msg.matched === 0 && !activeSearchLive) {
+        if (activeSearchSpan) activeSearchSpan();
+        alert("😢 没有找到匹配的" + (activeSearchType === 'article' ? "文章" : "评论") + "！");
+        closeSearchResults();
+        return;
+      }
+      currentPage = msg.page;
+      renderResultsPage(msg);
+      if (msg.event === 'done' && activeSearchSpan) {
+        activeSearchSpan();
+        activeSearchSpan = null;
+      }
+    }
+
+          // 显示搜索结果的当前页（排序、过滤及分页已在搜索引擎中完成）
+          function renderResultsPage(view) {
+          document.getElementById('searchCount').innerHTML = "共找到 <span>" + view.total + "</span> 条记录"
+            + (view.done ? "" : "（搜索中…）");
+          displayPagination(view.totalPages);
 
           const resultsContainer = document.getElementById('searchResults');
           resultsContainer.innerHTML = "";
 
-          paginatedResults.forEach(function(result) {{
+          view.items.forEach(function(result) {
             const li = document.createElement('li');
             li.classList.add('search-result-item');
 
-            if (result.author === "andy" || result.author === "李宗恩") {{
+            if (result.author === "andy" || result.author === "李宗恩") {
               li.classList.add('special-highlight');
-            }}
+            }
 
-            if (result.id.startsWith("article-")) {{
+            if (result.id.startsWith("article-")) {
               li.innerHTML = result.text;
-            }} else {{
-              li.innerHTML = `<strong>${{result.articleTitle}}</strong> - ${{result.text}}`;
-            }}
+            } else {
+              li.innerHTML = `<strong>${result.articleTitle}</strong> - ${result.text}`;
+            }
 
             // 让新建的 li 支持简繁/原文切换
             initOriginalText(li);
             applyLanguageToNode(li);
 
             // —— 点击条目：跳转 + 高亮 —— //
-            li.onclick = function() {{
+            li.onclick = function() {
               let targetArticleIndex = result.articleIndex;
               let targetArticlePage  = Math.floor(targetArticleIndex / articlesPerPage) + 1;
 
-              if (currentArticlePage !== targetArticlePage) {{
+              if (currentArticlePage !== targetArticlePage) {
                 currentArticlePage = targetArticlePage;
                 populateArticleDropdown();
                 displayArticlePagination();
-              }}
+              }
 
               document.getElementById('articleDropdown').value = targetArticleIndex;
-              changeArticle();
-
-              setTimeout(function() {{
-                if (result.id.startsWith("article-")) {{
+              changeArticle(function() {
+              setTimeout(function() {
+                if (result.id.startsWith("article-")) {
                   const articleElem    = document.getElementById('articleComments');
                   const articleHeader  = articleElem.querySelector('.article-header');
                   const articleContent = articleElem.querySelector('.article-content');
 
                   // 滚动到标题处
-                  if (articleHeader) {{
+                  if (articleHeader) {
                     const headerOffset   = 70;
                     const elementPosition = articleHeader.getBoundingClientRect().top;
                     const offsetPosition  = elementPosition + window.pageYOffset - headerOffset;
-                    window.scrollTo({{ top: offsetPosition, behavior: 'smooth' }});
-                  }}
+                    window.scrollTo({ top: offsetPosition, behavior: 'smooth' });
+                  }
 
                 // 标题
-                if (result.foundInHeader && articleHeader) {{
-                  if (!articleHeader.dataset.rawHtml) {{ articleHeader.dataset.rawHtml = articleHeader.innerHTML; }}
+                if (result.foundInHeader && articleHeader) {
+                  if (!articleHeader.dataset.rawHtml) { articleHeader.dataset.rawHtml = articleHeader.innerHTML; }
                   highlightNormalized(articleHeader, currentSearchKeyword);   // ✅ 改这里
                   articleHeader.classList.add('article-search-highlight');
-                  articleHeader.onclick = function() {{ removeArticleHighlight(articleHeader); }};
-                }}
+                  articleHeader.onclick = function() { removeArticleHighlight(articleHeader); };
+                }
             
             // 正文
-            if (result.foundInContent && articleContent) {{
-              if (!articleContent.dataset.rawHtml) {{ articleContent.dataset.rawHtml = articleContent.innerHTML; }}
+            if (result.foundInContent && articleContent) {
+              if (!articleContent.dataset.rawHtml) { articleContent.dataset.rawHtml = articleContent.innerHTML; }
               highlightNormalized(articleContent, currentSearchKeyword);  // ✅ 改这里
               articleContent.classList.add('article-search-highlight');
-              articleContent.onclick = function() {{ removeArticleHighlight(articleContent); }};
-            }}
+              articleContent.onclick = function() { removeArticleHighlight(articleContent); };
+            }
 
-                }} else {{
-                  // 评论命中：滚动并高亮评论
-                  const comment = document.getElementById(result.id);
-                  if (comment) {{
+                } else {
+                  // 评论命中：滚动并高亮评论（评论可能还没挂到页面上，先展开）
+                  const comment = revealComment(result.id);
+                  if (comment) {
                     const headerOffset   = 70;
                     const elementPosition = comment.getBoundingClientRect().top;
                     const offsetPosition  = elementPosition + window.pageYOffset - headerOffset;
-                    window.scrollTo({{ top: offsetPosition, behavior: 'smooth' }});
+                    window.scrollTo({ top: offsetPosition, behavior: 'smooth' });
                     highlightComment(comment);
-                  }}
-                }}
-              }}, 200);
-            }};
+                  }
+                }
+              }, 200);
+              });
+            };
 
             resultsContainer.appendChild(li);
-          }});
-        }}
+          });
+        }
 
 
-    function displayPagination(totalPages) {{
+    function displayPagination(totalPages) {
       const paginationContainer = document.getElementById('pagination');
       paginationContainer.innerHTML = "";
       if(totalPages <= 1) return;
@@ -1539,7 +2520,7 @@ if (searchType === 'article') {{
       topLine.style.alignItems = 'center';
       topLine.style.fontSize = '16px';
       const pageInfo = document.createElement('span');
-      pageInfo.innerText = `当前页 ${{currentPage}} / ${{totalPages}}`;
+      pageInfo.innerText = `当前页 ${currentPage} / ${totalPages}`;
       topLine.appendChild(pageInfo);
       const pageInput = document.createElement('input');
       pageInput.type = 'number';
@@ -1551,155 +2532,156 @@ if (searchType === 'article') {{
       const jumpBtn = document.createElement('button');
       jumpBtn.innerHTML = '📍 跳转';
       jumpBtn.className = 'jump-btn';
-      jumpBtn.onclick = function() {{
+      jumpBtn.onclick = function() {
           const raw = (document.getElementById('pageInput').value || '').trim();
           let target = parseInt(raw, 10);
-          if (!raw || isNaN(target)) {{ target = 1; }}
-          if (target < 1) {{ target = 1; }}
-          if (target > totalPages) {{ target = totalPages; }}
+          if (!raw || isNaN(target)) { target = 1; }
+          if (target < 1) { target = 1; }
+          if (target > totalPages) { target = totalPages; }
           currentPage = target;
           document.getElementById('pageInput').value = String(target);
           displayPageResults();
-        }};
+        };
 
       topLine.appendChild(jumpBtn);
       paginationContainer.appendChild(topLine);
       const bottomLine = document.createElement('div');
       bottomLine.style.textAlign = 'center';
       bottomLine.style.marginTop = '10px';
-      if(currentPage > 1) {{
+      if(currentPage > 1) {
         const prevBtn = document.createElement('button');
         prevBtn.innerHTML = '⬅️ 上一页';
         prevBtn.className = 'nav-btn';
-        prevBtn.onclick = function() {{
+        prevBtn.onclick = function() {
           currentPage--;
           displayPageResults();
-        }};
+        };
         bottomLine.appendChild(prevBtn);
-      }}
-      if(currentPage < totalPages) {{
+      }
+      if(currentPage < totalPages) {
         const nextBtn = document.createElement('button');
         nextBtn.innerHTML = '下一页 ➡️';
         nextBtn.className = 'nav-btn';
-        nextBtn.onclick = function() {{
+        nextBtn.onclick = function() {
           currentPage++;
           displayPageResults();
-        }};
+        };
         bottomLine.appendChild(nextBtn);
-      }}
+      }
       paginationContainer.appendChild(bottomLine);
-    }}
+    }
 
-    function closeSearchResults() {{
+    function closeSearchResults() {
+      cancelSearchJob();
       document.getElementById('searchResults').innerHTML = "";
       document.getElementById('pagination').innerHTML = "";
       document.getElementById('searchCount').innerText = "";
       document.getElementById('searchCloseButton').style.display = 'none';
       document.getElementById('searchExtraControls').style.display = 'none';
-    }}
+    }
 
-function highlightComment(comment) {{
+function highlightComment(comment) {
   comment.classList.add('highlighted-comment');
   const commentTextElem = comment.querySelector('.comment-text');
   if (!commentTextElem) return;
 
   // 首次缓存原始 HTML（保留你已有的还原机制）
-  if (!commentTextElem.dataset.rawHtml) {{
+  if (!commentTextElem.dataset.rawHtml) {
     commentTextElem.dataset.rawHtml = commentTextElem.innerHTML;
-  }}
+  }
 
   // ✅ 用“归一化映射高亮”，解决菸/烟/煙等字形
-  if (currentSearchKeyword) {{
+  if (currentSearchKeyword) {
     highlightNormalized(commentTextElem, currentSearchKeyword);
-  }}
-}}
+  }
+}
 
 
-function removeArticleHighlight(elem) {{
+function removeArticleHighlight(elem) {
   // 优先用缓存恢复
-  if (elem.dataset.rawHtml) {{
+  if (elem.dataset.rawHtml) {
     elem.innerHTML = elem.dataset.rawHtml;
     delete elem.dataset.rawHtml;
     initOriginalText(elem);   // 恢复后重建“原文”
     applyLanguageToNode(elem); // 再按当前语言渲染
-  }} else {{
+  } else {
     // 兜底：旧逻辑
     const highlights = elem.querySelectorAll('.keyword-highlight');
-    highlights.forEach(function(span) {{
+    highlights.forEach(function(span) {
       span.replaceWith(document.createTextNode(span.textContent));
-    }});
+    });
     initOriginalText(elem);
     applyLanguageToNode(elem);
-  }}
+  }
   elem.classList.remove('article-search-highlight');
   elem.onclick = null;
-}}
+}
 
-function removeHighlight(commentElem) {{
+function removeHighlight(commentElem) {
   if (
     !commentElem.classList.contains('highlighted-comment') &&
     !commentElem.classList.contains('search-highlight')
-  ) {{
+  ) {
     return;
-  }}
+  }
 
   commentElem.classList.remove('highlighted-comment', 'search-highlight');
 
   const textBox = commentElem.querySelector('.comment-text');
-  if (textBox && textBox.dataset.rawHtml) {{
+  if (textBox && textBox.dataset.rawHtml) {
     // 用缓存一次性还原
     textBox.innerHTML = textBox.dataset.rawHtml;
     delete textBox.dataset.rawHtml;
     initOriginalText(commentElem);
     applyLanguageToNode(commentElem);
     return;
-  }}
+  }
 
   // 兜底：不走缓存时，移除<span>并重建原文
   const highlights = commentElem.querySelectorAll('.keyword-highlight');
-  highlights.forEach(function(span) {{
+  highlights.forEach(function(span) {
     span.replaceWith(document.createTextNode(span.textContent));
-  }});
+  });
   initOriginalText(commentElem);
   applyLanguageToNode(commentElem);
-}}
+}
 
 
-    window.onscroll = function() {{
-      if (document.body.scrollTop > 200 || document.documentElement.scrollTop > 200) {{
+    window.onscroll = function() {
+      if (document.body.scrollTop > 200 || document.documentElement.scrollTop > 200) {
         document.querySelector('.back-to-top').style.display = 'block';
-      }} else {{
+      } else {
         document.querySelector('.back-to-top').style.display = 'none';
-      }}
-    }}
+      }
+    }
 
-    function scrollToTop() {{
-      window.scrollTo({{top: 0, behavior: 'smooth'}});
-    }}
+    function scrollToTop() {
+      window.scrollTo({top: 0, behavior: 'smooth'});
+    }
 
     /* ---------------- 文章选择及分页 ---------------- */
-    const articlesData = {articles_json};
+    // articlesData 由数据文件 data.<hash>.js 提供
     const articlesPerPage = 10;
     let currentArticlePage = 1;
-function persistArticleState(index) {{
+function persistArticleState(index) {
   var page = Math.floor(index / articlesPerPage) + 1;
   localStorage.setItem('savedArticleIndex', String(index));
   localStorage.setItem('savedArticlePage', String(page));
-}}
+}
 
-function initArticlePage() {{
+function initArticlePage() {
   const totalPages = Math.ceil(articlesData.length / articlesPerPage);
   let savedIndex = parseInt(localStorage.getItem('savedArticleIndex'));
   let savedPage  = parseInt(localStorage.getItem('savedArticlePage'));
 
   // 优先根据“索引”反推出“页号”，确保两者一致
-  if (!isNaN(savedIndex)) {{
+  if (!isNaN(savedIndex)) {
     currentArticlePage = Math.floor(savedIndex / articlesPerPage) + 1;
-  }} else if (!isNaN(savedPage) && savedPage >= 1 && savedPage <= totalPages) {{
+  } else if (!isNaN(savedPage) && savedPage >= 1 && savedPage <= totalPages) {
     currentArticlePage = savedPage;
-  }} else {{
+  } else {
     currentArticlePage = 1;
-  }}
+  }
 
   // 渲染分页与下拉
   displayArticlePagination();
@@ -1707,23 +2689,23 @@ function initArticlePage() {{
 
   const dropdown = document.getElementById('articleDropdown');
 
-  if (!isNaN(savedIndex)) {{
+  if (!isNaN(savedIndex)) {
     // 如果当前页里没有这个索引，对齐到索引所在页并重新生成选项
-    if (![...dropdown.options].some(function(o) {{ return o.value == savedIndex; }})) {{
+    if (![...dropdown.options].some(function(o) { return o.value == savedIndex; })) {
       currentArticlePage = Math.floor(savedIndex / articlesPerPage) + 1;
       populateArticleDropdown();
-    }}
+    }
     dropdown.value = savedIndex;
-  }} else {{
+  } else {
     dropdown.selectedIndex = 0;
-  }}
+  }
 
   changeArticle();
-}}
+}
 
 
 
-function populateArticleDropdown() {{
+function populateArticleDropdown() {
   const dropdown = document.getElementById('articleDropdown');
   if (!dropdown) return;
 
@@ -1734,13 +2716,13 @@ function populateArticleDropdown() {{
   const articlesPage = articlesData.slice(start, end);
 
   // 生成当前页的下拉选项（值为全局索引）
-  articlesPage.forEach(function(article, index) {{
+  articlesPage.forEach(function(article, index) {
     const option = document.createElement('option');
     option.value = start + index;         // 全局文章索引
     option.text  = article.title;         // 选项显示标题
     option._originalText = article.title; // 供简繁切换使用
     dropdown.appendChild(option);
-  }});
+  });
 
   // 让下拉选项支持简繁切换
   initOriginalText(dropdown);
@@ -1748,44 +2730,174 @@ function populateArticleDropdown() {{
 
   // —— 更新下拉框提示文案：显示本页文章数量 ——
   const hintEl = document.getElementById('articleDropdownHint');
-  if (hintEl) {{
+  if (hintEl) {
     const count = articlesPage.length;
-    hintEl.innerHTML = `💡 本页共 <strong>${{count}}</strong> 篇文章；点击上方下拉列表可切换查看。`;
+    hintEl.innerHTML = `💡 本页共 <strong>${count}</strong> 篇文章；点击上方下拉列表可切换查看。`;
     // 提示文案也参与简繁切换
     initOriginalText(hintEl);
     applyLanguageToNode(hintEl);
-  }}
-}}
-
-
-function changeArticle() {{
+  }
+}
+
+
+/* ---------------- 评论分批渲染 ----------------
+   文章 HTML 先解析到脱离文档的 <template> 中，页面上只挂标题、正文和前 COMMENT_WINDOW 条顶层评论，
+   滚动到末尾（或点击按钮）时再挂下一批；第 COLLAPSE_DEPTH 层以下的回复先折叠，点击后才展开。
+   这样无论楼层有多少评论，页面中的 DOM 节点数都有上限 */
+const COMMENT_WINDOW = 30;
+const COLLAPSE_DEPTH = 3;
+var pendingComments = [];      // 尚未挂到页面上的顶层评论
+var loadMoreButton = null;
+var commentObserver = null;
+
+// 新挂到页面上的评论：链接在新窗口打开（原先在整篇文章上统一处理）。
+// 评论背景色由样式表中的 CSS 变量决定，切换主题 / 夜间模式时无需逐条修改
+function prepareComments(root) {
+  root.querySelectorAll('.comment-text a').forEach(function(a) {
+    a.target = '_blank';
+  });
+}
+
+// 折叠 comment 下第 COLLAPSE_DEPTH 层及更深的回复（只访问折叠线以上的评论）
+function collapseDeepReplies(comment, depth) {
+  for (const child of Array.from(comment.children)) {
+    if (!child.classList.contains('replies')) continue;
+    if (depth + 1 >= COLLAPSE_DEPTH) {
+      const button = document.createElement('button');
+      button.type = 'button';
+      button.className = 'expand-replies';
+      button.textContent = convertText("💬 展开 " + child.children.length + " 条回复");
+      button._replies = child;
+      button.onclick = function(e) {
+        e.stopPropagation();
+        expandReplies(button, false);
+      };
+      child.replaceWith(button);
+    } else {
+      for (const reply of Array.from(child.children)) {
+        collapseDeepReplies(reply, depth + 1);
+      }
+    }
+  }
+}
+
+// 展开折叠的回复；all 为 true 时整段展开（跳转到其中的某条评论时使用），否则再往下展开 COLLAPSE_DEPTH 层
+function expandReplies(button, all) {
+  const replies = button._replies;
+  if (!all) {
+    for (const reply of Array.from(replies.children)) {
+      collapseDeepReplies(reply, 0);
+    }
+  }
+  prepareComments(replies);
+  button.replaceWith(replies);
+}
+
+function mountMoreComments() {
+  if (!loadMoreButton || !loadMoreButton.isConnected) return;   // 本篇文章已全部挂上
+  const container = document.getElementById('articleComments');
+  const batch = pendingComments.splice(0, COMMENT_WINDOW);
+  const fragment = document.createDocumentFragment();
+  batch.forEach(function(comment) {
+    collapseDeepReplies(comment, 0);
+    fragment.appendChild(comment);
+  });
+  prepareComments(fragment);
+  container.insertBefore(fragment, loadMoreButton);
+  if (pendingComments.length) {
+    loadMoreButton.textContent = convertText("⬇️ 加载更多评论（还有 " + pendingComments.length + " 条）");
+  } else {
+    loadMoreButton.remove();
+    if (commentObserver) commentObserver.disconnect();
+  }
+}
+
+// 按当前语言渲染文章：先加载文章所在的分片，完成后调用 done。
+// 加载期间读者又换了文章时，只渲染最后一次选择的文章
+var renderRequest = 0;
+
+function renderArticle(articleIndex, done) {
+  const request = ++renderRequest;
+  loadArticleShard(articleIndex, function() {
+    if (request !== renderRequest) return;
+    mountArticle(articleIndex);
+    if (done) done();
+  });
+}
+
+// 挂载文章（内容已在生成网页时转换好，无需再做简繁转换）
+function mountArticle(articleIndex) {
+  const articleCommentsElem = document.getElementById('articleComments');
+  const template = document.createElement('template');
+  template.innerHTML = localizedArticle(articleIndex).comments_html;
+  pendingComments = Array.from(template.content.children).filter(function(el) {
+    return el.classList.contains('comment');
+  });
+  pendingComments.forEach(function(comment) { comment.remove(); });
+
+  articleCommentsElem.innerHTML = "";
+  articleCommentsElem.appendChild(template.content);
+  // 正文里的链接在新窗口打开，避免离开本页导致状态不同步
+  articleCommentsElem.querySelectorAll('.article-content a').forEach(function(a) {
+    a.target = '_blank';
+  });
+
+  loadMoreButton = document.createElement('button');
+  loadMoreButton.type = 'button';
+  loadMoreButton.className = 'nav-btn load-more-comments';
+  loadMoreButton.onclick = mountMoreComments;
+  articleCommentsElem.appendChild(loadMoreButton);
+  if (commentObserver) commentObserver.disconnect();
+  if (pendingComments.length > COMMENT_WINDOW && 'IntersectionObserver' in window) {
+    // 按钮进入视口前 600px 就开始挂下一批，滚动时基本感觉不到分批
+    commentObserver = new IntersectionObserver(function(entries) {
+      if (entries.some(function(entry) { return entry.isIntersecting; })) mountMoreComments();
+    }, { rootMargin: '600px 0px' });
+    commentObserver.observe(loadMoreButton);
+  }
+  mountMoreComments();
+  return articleCommentsElem;
+}
+
+// 确保某条评论已挂到页面上（可能还在后面的批次里，或在折叠的回复中），返回该元素
+function revealComment(commentId) {
+  let comment = document.getElementById(commentId);
+  if (comment) return comment;
+  const selector = '[id="' + commentId + '"]';
+  const topLevel = pendingComments.find(function(el) {
+    return el.id === commentId || el.querySelector(selector);
+  });
+  while (topLevel && pendingComments.indexOf(topLevel) !== -1) {
+    mountMoreComments();
+  }
+  comment = document.getElementById(commentId);
+  while (!comment) {
+    const button = Array.from(document.querySelectorAll('#articleComments .expand-replies')).find(function(b) {
+      return b._replies.querySelector(selector);
+    });
+    if (!button) return null;
+    expandReplies(button, true);
+    comment = document.getElementById(commentId);
+  }
+  return comment;
+}
+
+function changeArticle(done) {
   const dropdown = document.getElementById('articleDropdown');
   const articleIndex = parseInt(dropdown.value);
 
   // 立刻把“当前文章索引 & 页号”写入 localStorage，防止返回后丢失
   persistArticleState(articleIndex);
 
-  const article = articlesData[articleIndex];
-  const articleCommentsElem = document.getElementById('articleComments');
-  articleCommentsElem.innerHTML = article.comments_html;
-
-  initOriginalText(articleCommentsElem);
-  changeLanguage();
+  const finish = perfSpan('changeArticle');
+  renderArticle(articleIndex, function() {
+    finish();
+    if (done) done();
+  });
+}
 
-  articleCommentsElem.querySelectorAll('.comment.reply').forEach(function(comment) {{
-    comment.style.backgroundColor = currentColor;
-  }});
 
-  // 重点：正文与评论里的链接都在新窗口打开，避免离开本页导致状态不同步
-  articleCommentsElem
-    .querySelectorAll('.article-content a, .comment .comment-text a')
-    .forEach(function(a) {{
-      a.target = '_blank';
-    }});
-}}
-
-
-    function displayArticlePagination() {{
+    function displayArticlePagination() {
       const paginationContainer = document.getElementById('articlePagination');
       paginationContainer.innerHTML = "";
       const totalPages = Math.ceil(articlesData.length / articlesPerPage);
@@ -1796,7 +2908,7 @@ function changeArticle() {{
       topLine.style.alignItems = 'center';
       topLine.style.fontSize = '16px';
       const pageInfo = document.createElement('span');
-      pageInfo.innerText = `当前页 ${{currentArticlePage}} / ${{totalPages}}`;
+      pageInfo.innerText = `当前页 ${currentArticlePage} / ${totalPages}`;
       topLine.appendChild(pageInfo);
       const pageInput = document.createElement('input');
       pageInput.type = 'number';
@@ -1808,132 +2920,132 @@ function changeArticle() {{
       const jumpBtn = document.createElement('button');
       jumpBtn.innerHTML = '📍 跳转';
       jumpBtn.className = 'jump-btn';
-      jumpBtn.onclick = function() {{
+      jumpBtn.onclick = function() {
           const raw = (document.getElementById('articlePageInput').value || '').trim();
           let target = parseInt(raw, 10);
-          if (!raw || isNaN(target)) {{ target = 1; }}
-          if (target < 1) {{ target = 1; }}
-          if (target > totalPages) {{ target = totalPages; }}
+          if (!raw || isNaN(target)) { target = 1; }
+          if (target < 1) { target = 1; }
+          if (target > totalPages) { target = totalPages; }
           currentArticlePage = target;
           document.getElementById('articlePageInput').value = String(target);
           populateArticleDropdown();
           displayArticlePagination();
           document.getElementById('articleDropdown').selectedIndex = 0;
           changeArticle();
-    }};
+    };
 
       topLine.appendChild(jumpBtn);
       paginationContainer.appendChild(topLine);
       const bottomLine = document.createElement('div');
       bottomLine.style.textAlign = 'center';
       bottomLine.style.marginTop = '10px';
-      if(currentArticlePage > 1) {{
+      if(currentArticlePage > 1) {
         const prevBtn = document.createElement('button');
         prevBtn.innerHTML = '⬅️ 上一页';
         prevBtn.className = 'nav-btn';
-        prevBtn.onclick = function() {{
+        prevBtn.onclick = function() {
           currentArticlePage--;
           populateArticleDropdown();
           displayArticlePagination();
           document.getElementById('articleDropdown').selectedIndex = 0;
           changeArticle();
-        }};
+        };
         bottomLine.appendChild(prevBtn);
-      }}
-      if(currentArticlePage < totalPages) {{
+      }
+      if(currentArticlePage < totalPages) {
         const nextBtn = document.createElement('button');
         nextBtn.innerHTML = '下一页 ➡️';
         nextBtn.className = 'nav-btn';
-        nextBtn.onclick = function() {{
+        nextBtn.onclick = function() {
           currentArticlePage++;
           populateArticleDropdown();
           displayArticlePagination();
           document.getElementById('articleDropdown').selectedIndex = 0;
           changeArticle();
-        }};
+        };
         bottomLine.appendChild(nextBtn);
-      }}
+      }
       paginationContainer.appendChild(bottomLine);
-    }}
+    }
 
-    function goToArticle(index, autoScroll) {{
+    function goToArticle(index, autoScroll) {
       var totalArticles = articlesData.length;
       if(index < 0 || index >= totalArticles) return;
       var newPage = Math.floor(index / articlesPerPage) + 1;
-      if(newPage !== currentArticlePage) {{
+      if(newPage !== currentArticlePage) {
          currentArticlePage = newPage;
          populateArticleDropdown();
          displayArticlePagination();
-      }}
+      }
       document.getElementById('articleDropdown').value = index;
       changeArticle();
-      if(autoScroll) {{
-          setTimeout(function(){{
+      if(autoScroll) {
+          setTimeout(function(){
               var articleHeader = document.querySelector('#articleComments .article-header');
-              if(articleHeader) {{
+              if(articleHeader) {
                   var headerOffset = 70;
                   var elementPosition = articleHeader.getBoundingClientRect().top;
                   var offsetPosition = elementPosition + window.pageYOffset - headerOffset;
-                  window.scrollTo({{ top: offsetPosition, behavior: 'smooth' }});
-              }}
-          }}, 100);
-      }}
-    }}
+                  window.scrollTo({ top: offsetPosition, behavior: 'smooth' });
+              }
+          }, 100);
+      }
+    }
 
-    function prevArticle() {{
+    function prevArticle() {
       var currentIndex = parseInt(document.getElementById('articleDropdown').value);
-      if(currentIndex > 0) {{
+      if(currentIndex > 0) {
            goToArticle(currentIndex - 1, true);
-      }} else {{
+      } else {
            alert("🙈 已经是第一篇文章了");
-      }}
-    }}
+      }
+    }
 
-    function nextArticle() {{
+    function nextArticle() {
       var currentIndex = parseInt(document.getElementById('articleDropdown').value);
-      if(currentIndex < articlesData.length - 1) {{
+      if(currentIndex < articlesData.length - 1) {
            goToArticle(currentIndex + 1, true);
-      }} else {{
+      } else {
            alert("🙉 已经是最后一篇文章了");
-      }}
-    }}
+      }
+    }
 
     /* --------------- 设置面板功能 --------------- */
-    function openSettings() {{
+    function openSettings() {
       document.getElementById('settingsModal').style.display = 'block';
       const settings = localStorage.getItem('userSettings');
-      if(settings) {{
+      if(settings) {
         const obj = JSON.parse(settings);
         document.getElementById('fontSizeInput').value = obj.fontSize;
         document.getElementById('fontSizeVal').innerText = obj.fontSize;
         document.getElementById('lineHeightInput').value = obj.lineHeight;
         document.getElementById('fontFamilySelect').value = obj.fontFamily;
         document.getElementById('textColorInput').value = obj.textColor;
-        if(obj.theme) {{
+        if(obj.theme) {
           document.getElementById('themeSelect').value = obj.theme;
-        }} else {{
+        } else {
           document.getElementById('themeSelect').value = "none";
-        }}
+        }
         document.getElementById('layoutStyleSelect').value = obj.layoutStyle || "card";
-      }}
-    }}
+      }
+    }
 
-    function closeSettings() {{
+    function closeSettings() {
       document.getElementById('settingsModal').style.display = 'none';
-    }}
+    }
 
-    function updateLayoutStyle(style) {{
+    function updateLayoutStyle(style) {
       var articleCommentsElem = document.getElementById('articleComments');
-      if (style === 'list') {{
+      if (style === 'list') {
          articleCommentsElem.classList.remove('layout-card');
          articleCommentsElem.classList.add('layout-list');
-      }} else {{
+      } else {
          articleCommentsElem.classList.remove('layout-list');
          articleCommentsElem.classList.add('layout-card');
-      }}
-    }}
+      }
+    }
 
-    function applySettings() {{
+    function applySettings() {
       const fontSize = document.getElementById('fontSizeInput').value;
       const lineHeight = document.getElementById('lineHeightInput').value;
       const fontFamily = document.getElementById('fontFamilySelect').value;
@@ -1945,136 +3057,122 @@ function changeArticle() {{
       var headingSize = Math.round(parseFloat(fontSize) * 1.375);
       document.documentElement.style.setProperty('--heading-size', headingSize + 'px');
 
-      currentColor = getComputedStyle(document.documentElement).getPropertyValue('--background-color');
-      document.querySelectorAll('.comment.reply').forEach(function(comment) {{
-        comment.style.backgroundColor = currentColor;
-      }});
       const layoutStyle = document.getElementById('layoutStyleSelect').value;
       updateLayoutStyle(layoutStyle);
 
       const theme = document.getElementById('themeSelect').value;
-const themeSettings = {{
-    "chinese1": {{
+const themeSettings = {
+    "chinese1": {
         "--primary-color": "#2c3e50",
         "--secondary-color": "#7f8c8d",
         "--background-color": "#f8f1e5",
         "--btn-bg": "#2c3e50",
         "--btn-hover": "#7f8c8d"
-    }},
-    "chinese2": {{
+    },
+    "chinese2": {
         "--primary-color": "#8d6e63",
         "--secondary-color": "#d7ccc8",
         "--background-color": "#fff8e1",
         "--btn-bg": "#8d6e63",
         "--btn-hover": "#d7ccc8"
-    }},
-    "chinese3": {{
+    },
+    "chinese3": {
         "--primary-color": "#00897b",
         "--secondary-color": "#80cbc4",
         "--background-color": "#e0f2f1",
         "--btn-bg": "#00897b",
         "--btn-hover": "#80cbc4"
-    }},
-    "modern1": {{
+    },
+    "modern1": {
         "--primary-color": "#4caf50",
         "--secondary-color": "#81c784",
         "--background-color": "#e8f5e9",
         "--btn-bg": "#4caf50",
         "--btn-hover": "#81c784"
-    }},
-    "modern2": {{
+    },
+    "modern2": {
         "--primary-color": "#2196f3",
         "--secondary-color": "#90caf9",
         "--background-color": "#e3f2fd",
         "--btn-bg": "#2196f3",
         "--btn-hover": "#90caf9"
-    }},
-    "modern3": {{
+    },
+    "modern3": {
         "--primary-color": "#3e2723",
         "--secondary-color": "#5d4037",
         "--background-color": "#f3e0dc",
         "--btn-bg": "#3e2723",
         "--btn-hover": "#5d4037"
-    }},
-    "romantic": {{         // 浪漫粉彩风格
+    },
+    "romantic": {         // 浪漫粉彩风格
         "--primary-color": "#FF8DA9",
         "--secondary-color": "#FFB3C1",
         "--background-color": "#FFF0F5",
         "--btn-bg": "#FF8DA9",
         "--btn-hover": "#FF6F91"
-    }},
-    "techBlue": {{         // 科技蓝调风格
+    },
+    "techBlue": {         // 科技蓝调风格
         "--primary-color": "#0077CC",
         "--secondary-color": "#005FA3",
         "--background-color": "#E6F7FF",
         "--btn-bg": "#0077CC",
         "--btn-hover": "#006BB3"
-    }},
-    "dreamPurple": {{      // 梦幻紫风格
+    },
+    "dreamPurple": {      // 梦幻紫风格
         "--primary-color": "#9C27B0",
         "--secondary-color": "#7B1FA2",
         "--background-color": "#F3E5F5",
         "--btn-bg": "#9C27B0",
         "--btn-hover": "#8E24AA"
-    }},
-    "minimalBlackWhite": {{ // 极简黑白风格
+    },
+    "minimalBlackWhite": { // 极简黑白风格
         "--primary-color": "#000000",
         "--secondary-color": "#333333",
         "--background-color": "#FFFFFF",
         "--btn-bg": "#000000",
         "--btn-hover": "#666666"
-    }},
-    "vintage": {{          // 复古风情
+    },
+    "vintage": {          // 复古风情
         "--primary-color": "#8B4513",
         "--secondary-color": "#A0522D",
         "--background-color": "#F5F5DC",
         "--btn-bg": "#8B4513",
         "--btn-hover": "#7B3E0A"
-    }},
-    "japaneseFresh": {{    // 日系清新风格
+    },
+    "japaneseFresh": {    // 日系清新风格
         "--primary-color": "#8FBC8F",
         "--secondary-color": "#708090",
         "--background-color": "#FAFAD2",
         "--btn-bg": "#8FBC8F",
         "--btn-hover": "#7AA07A"
-    }}
-}};
-      if(theme !== "none" && themeSettings[theme]) {{
+    }
+};
+      if(theme !== "none" && themeSettings[theme]) {
           const t = themeSettings[theme];
-          for (const key in t) {{
+          for (const key in t) {
               document.documentElement.style.setProperty(key, t[key]);
-          }}
-          if(t["--background-color"]) {{
-             currentColor = t["--background-color"];
-          }}
-          document.querySelectorAll('.comment.reply').forEach(function(comment) {{
-              comment.style.backgroundColor = currentColor;
-          }});
-      }} else {{
+          }
+      } else {
           /* 选择无主题时，立即恢复默认样式 */
           document.documentElement.style.setProperty('--primary-color', '#667eea');
           document.documentElement.style.setProperty('--secondary-color', '#764ba2');
           document.documentElement.style.setProperty('--background-color', '#f4f4f9');
           document.documentElement.style.setProperty('--btn-bg', '#667eea');
           document.documentElement.style.setProperty('--btn-hover', '#556cd6');
-          currentColor = getComputedStyle(document.documentElement).getPropertyValue('--background-color');
-          document.querySelectorAll('.comment.reply').forEach(function(comment) {{
-              comment.style.backgroundColor = currentColor;
-          }});
-      }}
-      const settings = {{
+      }
+      const settings = {
         fontSize: fontSize,
         lineHeight: lineHeight,
         fontFamily: fontFamily,
         textColor: textColor,
         layoutStyle: layoutStyle,
         theme: theme
-      }};
+      };
       localStorage.setItem('userSettings', JSON.stringify(settings));
       closeSettings();
-    }}
+    }
 
-    function restoreDefaults() {{
+    function restoreDefaults() {
       document.getElementById('fontSizeInput').value = 16;
       document.getElementById('fontSizeVal').innerText = 16;
       document.getElementById('lineHeightInput').value = 1.6;
@@ -2083,20 +3181,22 @@ const themeSettings = {{
       document.getElementById('layoutStyleSelect').value = "card";
       document.getElementById('themeSelect').value = "none";
       applySettings();
-    }}
+    }
 
-    window.addEventListener("beforeunload", function() {{
+    window.addEventListener("beforeunload", function() {
       const articleDropdown = document.getElementById('articleDropdown');
-      if(articleDropdown) {{
+      if(articleDropdown) {
         localStorage.setItem('savedArticleIndex', articleDropdown.value);
-      }}
+      }
       localStorage.setItem('savedArticlePage', currentArticlePage);
-    }});
+    });
 
-    window.onload = function() {{
+    window.onload = function() {
+      const finish = perfSpan('window.onload');
+      initPerfPanel();
       initOriginalText(document.body);
       const settings = localStorage.getItem('userSettings');
-      if(settings) {{
+      if(settings) {
         const obj = JSON.parse(settings);
         document.getElementById('fontSizeInput').value = obj.fontSize;
         document.getElementById('fontSizeVal').innerText = obj.fontSize;
@@ -2106,44 +3206,554 @@ const themeSettings = {{
         document.getElementById('themeSelect').value = obj.theme || "none";
         document.getElementById('layoutStyleSelect').value = obj.layoutStyle || "card";
         applySettings();
-      }}
+      }
       const savedArticlePage = localStorage.getItem('savedArticlePage');
-      if(savedArticlePage !== null) {{
+      if(savedArticlePage !== null) {
          currentArticlePage = parseInt(savedArticlePage);
-      }}
+      }
       initArticlePage();
-      document.querySelectorAll('.comment .comment-text a').forEach(function(a) {{
+      document.querySelectorAll('.comment .comment-text a').forEach(function(a) {
         a.target = '_blank';
-      }});
+      });
       applyLanguageToNode(document.body);
-    }}
-
-    let currentColor = "white";
-    function toggleDarkMode() {{
+      // 注册 Service Worker：离线访问，再次访问时只下载有变化的分片（以 file:// 打开时不可用）
+      if ('serviceWorker' in navigator && location.protocol !== 'file:') {
+        navigator.serviceWorker.register('sw.js').catch(function(e) {
+          console.warn('Service Worker 注册失败：', e);
+        });
+      }
+      finish();
+    }
+
+    function toggleDarkMode() {
       document.body.classList.toggle('dark-mode');
-    }}
+    }
     // 从 bfcache 返回时，按本地状态再对齐一次
-    window.addEventListener('pageshow', function (e) {{
-  if (e.persisted) {{
+    window.addEventListener('pageshow', function (e) {
+  if (e.persisted) {
     initArticlePage();
-  }}
-}});
+  }
+});
 
-  </script>
-</body>
-</html>
 """
 
-    with open(result_file, "w", encoding="utf-8") as f:
-        f.write(html_content)
-    print(f"已生成文件：{result_file}")
 
+SERVICE_WORKER_JS = r"""
+    /* ---------------- Service Worker：离线访问与增量更新 ----------------
+       PRECACHE / ON_DEMAND 由生成器写在本文件开头，是本次生成引用的全部带哈希资源；
+       CACHE_FIRST_DIRS 为静态资源目录和图片缓存目录（文件名均由内容哈希决定）。
+       带哈希的文件内容永不改变，一律缓存优先：安装新版本时只下载缓存中还没有的文件（即有变化的分片），
+       激活后删除已不再引用的旧文件。页面（index.html、多页面导出的文章页）网络优先，离线时使用缓存 */
+    var ASSET_CACHE = 'assets';
+    var PAGE_CACHE = 'pages';
+    var MEDIA_CACHE = 'media';
+
+    function absolute(url) {
+      return new URL(url, self.location).href;
+    }
+
+    self.addEventListener('install', function(event) {
+      event.waitUntil(caches.open(ASSET_CACHE).then(function(cache) {
+        return Promise.all(PRECACHE.map(function(url) {
+          return cache.match(url).then(function(hit) {
+            return hit || cache.add(url);
+          });
+        }));
+      }).then(function() {
+        return caches.open(PAGE_CACHE).then(function(cache) {
+          return cache.add('./');
+        });
+      }).then(function() {
+        return self.skipWaiting();
+      }));
+    });
+
+    self.addEventListener('activate', function(event) {
+      var keep = new Set(PRECACHE.concat(ON_DEMAND).map(absolute));
+      event.waitUntil(caches.open(ASSET_CACHE).then(function(cache) {
+        return cache.keys().then(function(requests) {
+          return Promise.all(requests.filter(function(request) {
+            return !keep.has(request.url);
+          }).map(function(request) {
+            return cache.delete(request);
+          }));
+        });
+      }).then(function() {
+        return self.clients.claim();
+      }));
+    });
+
+    function cacheFirst(cacheName, request) {
+      return caches.open(cacheName).then(function(cache) {
+        return cache.match(request).then(function(hit) {
+          return hit || fetch(request).then(function(response) {
+            if (response.ok) cache.put(request, response.clone());
+            return response;
+          });
+        });
+      });
+    }
+
+    function networkFirst(request) {
+      return caches.open(PAGE_CACHE).then(function(cache) {
+        return fetch(request).then(function(response) {
+          if (response.ok) cache.put(request, response.clone());
+          return response;
+        }).catch(function() {
+          return cache.match(request, {ignoreSearch: true}).then(function(hit) {
+            return hit || cache.match('./');
+          });
+        });
+      });
+    }
+
+    self.addEventListener('fetch', function(event) {
+      var request = event.request;
+      if (request.method !== 'GET' || request.headers.has('range')) return;
+      var url = request.url;
+      if (url.indexOf(absolute(CACHE_FIRST_DIRS[0])) === 0) {
+        event.respondWith(cacheFirst(ASSET_CACHE, request));
+      } else if (url.indexOf(absolute(CACHE_FIRST_DIRS[1])) === 0) {
+        event.respondWith(cacheFirst(MEDIA_CACHE, request));
+      } else if (request.mode === 'navigate' && url.indexOf(absolute('./')) === 0) {
+        event.respondWith(networkFirst(request));
+      }
+    });
+"""
+
+
+# 扫描 data 目录，返回 {文件路径: (子文件夹名, 修改时间, 大小)}
+def scan_data_files(data_folder):
+    snapshot = {}
+    for folder_name, path in list_data_files(data_folder):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue  # 扫描期间被删除
+        snapshot[path] = (folder_name, stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+# 按快照读取文章，只重新解析修改时间或大小变化的文件，其余直接使用 article_cache 中已解析的数据。
+# 返回 (排序后的文章列表, 重新读取的文件数)
+def load_articles_cached(snapshot, article_cache):
+    articles = []
+    loaded = 0
+    for path, (folder_name, mtime, size) in snapshot.items():
+        cached = article_cache.get(path)
+        if cached is None or cached[:2] != (mtime, size):
+            cached = (mtime, size, load_article(folder_name, path))
+            article_cache[path] = cached
+            loaded += 1
+        articles.append(cached[2])
+    for path in set(article_cache) - set(snapshot):
+        del article_cache[path]
+    return sort_articles(articles), loaded
+
+
+# 等待 data 目录停止变化（连续 debounce 秒没有新改动），返回最后的快照。
+# reassign_and_save_articles 会先删除再逐个写入全部文件，这样整批写完只触发一次生成
+def wait_until_quiet(data_folder, snapshot, poll_interval, debounce):
+    last_change = time.monotonic()
+    while time.monotonic() - last_change < debounce:
+        time.sleep(poll_interval)
+        latest = scan_data_files(data_folder)
+        if latest != snapshot:
+            snapshot = latest
+            last_change = time.monotonic()
+    return snapshot
+
+
+# 监视模式：常驻运行，data 目录有变化时自动重新生成网页。
+# 已解析的文章和渲染结果保存在内存中，每次只处理变化的文件和文章；
+# 采用定时扫描修改时间的方式，在 Windows / Linux 上行为一致，不依赖额外的库。
+# 生成失败（文件正在写入、记录缺少字段等）时保留上一次的网页继续监视，数据再次变化后重试
+def watch_data(data_folder, result_file="index.html", jobs=1, multipage=False, site_url="", perf_beacon="",
+               poll_interval=WATCH_POLL_INTERVAL, debounce=WATCH_DEBOUNCE):
+    article_cache = {}
+    render_cache = {}
+    snapshot = None   # 上一次成功生成网页时的数据
+    failed = None     # 上一次生成失败时的数据，没有新的改动时不再重试
+    print(f"👀 监视模式：{data_folder} 目录有变化时自动重新生成网页（按 Ctrl+C 退出）")
+    try:
+        while True:
+            current = snapshot
+            try:
+                current = scan_data_files(data_folder)
+                if current != snapshot and current != failed:
+                    if snapshot is not None:
+                        current = wait_until_quiet(data_folder, current, poll_interval, debounce)
+                    start = time.perf_counter()
+                    articles, loaded = load_articles_cached(current, article_cache)
+                    generate_html(articles, result_file, jobs, multipage, site_url, render_cache, perf_beacon)
+                    print(f"✅ 网页已更新：读取 {loaded} 个变化的文件，耗时 {time.perf_counter() - start:.2f} 秒")
+                    snapshot = current
+                    failed = None
+            except Exception as e:
+                print(f"❌ 生成网页失败，保留上一次的网页，等待下一次改动: {e!r}")
+                failed = current
+            time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        print("已退出监视模式")
+
+
+# 搜索 Worker 脚本（搜索、最近评论、排序与过滤都在这里完成，页面只渲染当前页）
+SEARCH_WORKER_JS = r"""
+    /* ---------------- 搜索引擎（在 Web Worker 中运行） ----------------
+       数据来自 search.<hash>.js 中的 searchCorpus（引擎在其上按需建立语料模型，搜索、过滤、最近评论都只查询模型）：
+       [{title, time, header: 标题栏文字, content: 正文文字, comments: [[ID, 作者, 时间, 时间戳, 评论文字], ...]}, ...]
+       浏览器不能创建 Worker（例如以 file:// 打开页面）时，页面直接加载本文件，在主线程中分批运行同一套代码 */
+    var SEARCH_SLICE_MS = 30;    // 每批最多连续运行的时间，之后让出线程以便接收新的搜索（取消旧搜索）
+    var PREVIEW_LENGTH = 60;     // 结果摘要字数
+
+    function createSearchEngine(post) {
+      var foldMap = {};
+      var specialAuthors = [];
+      var current = null;        // 当前结果集：{id, kind, matches, done, sorted}
+      var recentOrder = null;    // 全部评论按时间降序排列（第一次查看最近评论时计算）
+      var corpusModel = [];      // 语料模型：第 i 篇文章第一次用到时建立 corpusModel[i]，整个页面生命周期内复用
+      var queryCache = [];       // 最近完成的搜索 [{key, matches}]，重复搜索或来回切换搜索类型时直接复用
+      var QUERY_CACHE_SIZE = 20;
+
+      function foldToSimplified(s) {
+        var out = '';
+        for (var ch of s) {
+          out += foldMap[ch] || ch;
+        }
+        return out;
+      }
+
+      // 与页面中的 normalizeForSearch 一致：NFKC + 繁转简 + 小写 + 去掉所有空白
+      function normalizeForSearch(s) {
+        s = s || '';
+        try { s = s.normalize('NFKC'); } catch (e) {}
+        s = foldToSimplified(s);
+        s = s.toLowerCase();
+        return s.replace(/\s+/g, '');
+      }
+
+      function escapeHtml(s) {
+        return String(s).replace(/[&<>"']/g, function(c) {
+          return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+        });
+      }
+
+      function preview(text) {
+        return escapeHtml(Array.from(text).slice(0, PREVIEW_LENGTH).join(''));
+      }
+
+      // 文章模型：每条评论拆成 {id, author, time, timestamp, text, special}；
+      // 归一化文本（headerNorm / contentNorm / authorNorm / textNorm）在第一次搜索到时才计算并保存
+      function articleModel(index) {
+        var model = corpusModel[index];
+        if (!model) {
+          var article = searchCorpus[index];
+          model = corpusModel[index] = {
+            title: article.title,
+            time: article.time,
+            header: article.header,
+            content: article.content,
+            comments: article.comments.map(function(c) {
+              return { id: c[0], author: c[1], time: c[2], timestamp: c[3], text: c[4],
+                       special: specialAuthors.indexOf(c[1]) !== -1 };
+            })
+          };
+        }
+        return model;
+      }
+
+      function normalized(item, field) {
+        var key = field + 'Norm';
+        if (item[key] === undefined) {
+          item[key] = normalizeForSearch(item[field]);
+        }
+        return item[key];
+      }
+
+      function cachedQuery(key) {
+        for (var i = 0; i < queryCache.length; i++) {
+          if (queryCache[i].key === key) return queryCache[i].matches;
+        }
+        return null;
+      }
+
+      function rememberQuery(key, matches) {
+        queryCache.unshift({key: key, matches: matches});
+        if (queryCache.length > QUERY_CACHE_SIZE) queryCache.pop();
+      }
+
+      // 命中记录：文章为 [文章下标, -1, 标题命中, 正文命中]，评论为 [文章下标, 评论下标]
+      function describe(match) {
+        var article = articleModel(match[0]);
+        var title = article.title;
+        if (match[1] < 0) {
+          var time = article.time || "未知时间";
+          return {
+            id: "article-" + match[0], articleTitle: title, time: time, author: "",
+            text: '<strong>' + title + '</strong> - ' + time + ' - ' + preview(article.content) + '...',
+            articleIndex: match[0], foundInHeader: match[2], foundInContent: match[3]
+          };
+        }
+        var c = article.comments[match[1]];
+        var text = current.kind === 'recent'
+          ? c.author + " – " + c.time + " : " + preview(c.text) + "…"
+          : c.author + " - " + c.time + " : " + preview(c.text) + "...";
+        return { id: c.id, articleTitle: title, time: c.time, author: c.author, text: text, articleIndex: match[0] };
+      }
+
+      function matchTime(match) {
+        var article = articleModel(match[0]);
+        var time = match[1] < 0 ? article.time : article.comments[match[1]].time;
+        return !time || time === "未知时间" ? "9999" : time;
+      }
+
+      function isSpecial(match) {
+        return match[1] >= 0 && articleModel(match[0]).comments[match[1]].special;
+      }
+
+      // 按排序 / 过滤条件取出当前页，只把这一页的条目发回页面
+      function postView(event, view) {
+        var state = current;
+        var key = view.sort + '|' + view.special;
+        if (!state.sorted || state.sorted.key !== key || state.sorted.count !== state.matches.length) {
+          var filtered = state.matches;
+          if (view.special) {
+            filtered = filtered.filter(isSpecial);
+          } else if (view.sort !== "default") {
+            filtered = filtered.slice();
+          }
+          if (view.sort !== "default") {
+            filtered.sort(function(a, b) {
+              return view.sort === "asc"
+                ? matchTime(a).localeCompare(matchTime(b))
+                : matchTime(b).localeCompare(matchTime(a));
+            });
+          }
+          state.sorted = {key: key, count: state.matches.length, list: filtered};
+        }
+        var list = state.sorted.list;
+        var totalPages = Math.ceil(list.length / view.perPage);
+        var page = Math.min(Math.max(view.page, 1), totalPages || 1);
+        var start = (page - 1) * view.perPage;
+        post({
+          type: 'results', event: event, id: state.id, kind: state.kind, done: state.done,
+          matched: state.matches.length, total: list.length, page: page, totalPages: totalPages,
+          items: list.slice(start, start + view.perPage).map(describe)
+        });
+      }
+
+      /* ---------- 二元字组索引（边输入边搜索） ----------
+         每种搜索类型一份：docs[文档号] = [文章下标, 评论下标]，texts[文档号] = 归一化文本，
+         grams：相邻两个字 -> 含有它的文档号（升序）。初始化后在后台分批建立，建好之前的搜索退回逐篇扫描 */
+      var INDEX_TYPES = ['comment', 'author', 'article'];
+      var indexes = {};
+      var lastQuery = null;      // 上一次用索引完成的搜索 {searchType, kw, docs}
+
+      function addDocument(index, position, text) {
+        var doc = index.docs.length;
+        index.docs.push(position);
+        index.texts.push(text);
+        for (var p = 0; p + 1 < text.length; p++) {
+          var gram = text.substr(p, 2);
+          var list = index.grams.get(gram);
+          if (!list) {
+            index.grams.set(gram, [doc]);
+          } else if (list[list.length - 1] !== doc) {
+            list.push(doc);
+          }
+        }
+      }
+
+      function addArticleToIndex(index, searchType, articleIndex) {
+        var article = articleModel(articleIndex);
+        if (searchType === 'article') {
+          addDocument(index, [articleIndex, -1], normalized(article, 'header') + normalized(article, 'content'));
+          return;
+        }
+        var field = searchType === 'author' ? 'author' : 'text';
+        for (var i = 0; i < article.comments.length; i++) {
+          addDocument(index, [articleIndex, i], normalized(article.comments[i], field));
+        }
+      }
+
+      function buildIndexes() {
+        var started = Date.now();
+        var typeIndex = 0;
+        var articleIndex = 0;
+        var building = null;
+        function step() {
+          var deadline = Date.now() + SEARCH_SLICE_MS;
+          while (typeIndex < INDEX_TYPES.length && Date.now() < deadline) {
+            var searchType = INDEX_TYPES[typeIndex];
+            building = building || {docs: [], texts: [], grams: new Map()};
+            if (articleIndex < searchCorpus.length) {
+              addArticleToIndex(building, searchType, articleIndex++);
+            } else {
+              indexes[searchType] = building;
+              building = null;
+              articleIndex = 0;
+              typeIndex++;
+            }
+          }
+          if (typeIndex < INDEX_TYPES.length) {
+            setTimeout(step, 0);
+          } else {
+            post({type: 'indexed', ms: Date.now() - started});
+          }
+        }
+        setTimeout(step, 0);
+      }
+
+      // 用索引查找：候选集取关键词中最少见的字组对应的文档；若新关键词包含上一次的关键词
+      // （继续输入），上一次的结果一定包含全部新结果，候选集更小时直接用它。最后逐个用 indexOf 确认
+      function indexedSearch(index, searchType, kw) {
+        var candidates = null;
+        if (lastQuery && lastQuery.searchType === searchType && kw.indexOf(lastQuery.kw) !== -1) {
+          candidates = lastQuery.docs;
+        }
+        for (var p = 0; p + 1 < kw.length; p++) {
+          var list = index.grams.get(kw.substr(p, 2)) || [];
+          if (!candidates || list.length < candidates.length) candidates = list;
+        }
+        var docs = [];
+        var count = candidates ? candidates.length : index.texts.length;
+        for (var i = 0; i < count; i++) {
+          var doc = candidates ? candidates[i] : i;
+          if (index.texts[doc].indexOf(kw) !== -1) docs.push(doc);
+        }
+        lastQuery = {searchType: searchType, kw: kw, docs: docs};
+        return docs.map(function(doc) {
+          var position = index.docs[doc];
+          if (searchType !== 'article') return position;
+          var article = articleModel(position[0]);
+          return [position[0], -1, normalized(article, 'header').indexOf(kw) !== -1,
+                  normalized(article, 'content').indexOf(kw) !== -1];
+        });
+      }
+
+      // 搜索：索引已建好时一次完成；否则分批扫描文章，每批结束后把已找到的结果发回页面，
+      // current 被新的搜索替换后即停止
+      function runSearch(state, keyword, searchType) {
+        var kw = normalizeForSearch(keyword);
+        var key = searchType + '\u0000' + kw;
+        var cached = cachedQuery(key);
+        if (cached || indexes[searchType]) {
+          state.matches = cached || indexedSearch(indexes[searchType], searchType, kw);
+          state.done = true;
+          if (!cached) rememberQuery(key, state.matches);
+          postView('done', state.view);
+          return;
+        }
+        var articleIndex = 0;
+        function step() {
+          if (current !== state) return;   // 已被新的搜索取消
+          var deadline = Date.now() + SEARCH_SLICE_MS;
+          while (articleIndex < searchCorpus.length && Date.now() < deadline) {
+            var article = articleModel(articleIndex);
+            if (searchType === 'article') {
+              // 标题栏 + 正文去空白后连起来匹配，再分别判断命中位置（用于打开文章后的高亮）
+              var header = normalized(article, 'header');
+              var content = normalized(article, 'content');
+              if ((header + content).indexOf(kw) !== -1) {
+                state.matches.push([articleIndex, -1, header.indexOf(kw) !== -1, content.indexOf(kw) !== -1]);
+              }
+            } else {
+              var field = searchType === 'author' ? 'author' : 'text';
+              for (var i = 0; i < article.comments.length; i++) {
+                if (normalized(article.comments[i], field).indexOf(kw) !== -1) {
+                  state.matches.push([articleIndex, i]);
+                }
+              }
+            }
+            articleIndex++;
+          }
+          state.done = articleIndex >= searchCorpus.length;
+          if (state.done) rememberQuery(key, state.matches);
+          postView(state.done ? 'done' : 'progress', state.view);
+          if (!state.done) setTimeout(step, 0);
+        }
+        step();
+      }
+
+      function showRecent(state) {
+        if (!recentOrder) {
+          recentOrder = [];
+          for (var a = 0; a < searchCorpus.length; a++) {
+            articleModel(a).comments.forEach(function(c, i) { recentOrder.push([a, i, c.timestamp]); });
+          }
+          // Array.prototype.sort 为稳定排序，时间相同的评论保持原有顺序
+          recentOrder.sort(function(a, b) { return b[2] - a[2]; });
+        }
+        state.matches = recentOrder;
+        state.done = true;
+        postView('done', state.view);
+      }
+
+      return {
+        handle: function(msg) {
+          if (msg.type === 'init') {
+            foldMap = msg.foldMap;
+            specialAuthors = msg.specialAuthors;
+            buildIndexes();
+          } else if (msg.type === 'search' || msg.type === 'recent') {
+            current = {id: msg.id, kind: msg.type, matches: [], done: false, sorted: null, view: msg.view};
+            if (msg.type === 'recent') {
+              showRecent(current);
+            } else {
+              runSearch(current, msg.keyword, msg.searchType);
+            }
+          } else if (msg.type === 'view' && current && current.id === msg.id) {
+            current.view = msg.view;
+            postView('view', msg.view);
+          } else if (msg.type === 'cancel') {
+            current = null;
+          }
+        }
+      };
+    }
+
+    if (typeof WorkerGlobalScope !== 'undefined' && self instanceof WorkerGlobalScope) {
+      var workerEngine = createSearchEngine(function(msg) { self.postMessage(msg); });
+      self.onmessage = function(e) {
+        if (e.data.type === 'init') {
+          importScripts(e.data.corpusUrl);
+        }
+        workerEngine.handle(e.data);
+      };
+    }
+"""
+
+
+# argv 为命令行参数列表；从其他模块直接调用 main() 时使用默认参数
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="根据 data 目录中的数据生成网页")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="并行渲染文章的进程数，默认 1（串行），0 表示使用全部 CPU 核心")
+    parser.add_argument("--multipage", action="store_true",
+                        help="另外导出静态多页面站点（每篇文章一个 HTML）及站点地图")
+    parser.add_argument("--site-url", default="",
+                        help="站点地图中使用的站点根地址，例如 https://example.com/yangqi")
+    parser.add_argument("--fetch-media", action="store_true",
+                        help="生成前先把文章中引用的图片下载到本地缓存（media 目录）")
+    parser.add_argument("--watch", action="store_true",
+                        help="监视模式：常驻运行，data 目录有变化时自动重新生成")
+    parser.add_argument("--perf-beacon", default="",
+                        help="页面性能统计的上报地址（navigator.sendBeacon，POST JSON），默认不上报")
+    args = parser.parse_args(argv if argv is not None else [])
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
 
-def main():
     data_folder = "data"  # 数据目录中应包含 "page" 和 "fixed" 文件夹
+    if args.watch:
+        watch_data(data_folder, jobs=jobs, multipage=args.multipage, site_url=args.site_url,
+                   perf_beacon=args.perf_beacon)
+        return
     articles = read_and_sort_data(data_folder)
-    generate_html(articles)
+    if args.fetch_media:
+        cache_media(articles)
+    generate_html(articles, jobs=jobs, multipage=args.multipage, site_url=args.site_url,
+                  perf_beacon=args.perf_beacon)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    multiprocessing.freeze_support()
+    main(sys.argv[1:])
\ No newline at end of file
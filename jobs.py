@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台任务队列（管理控制台使用）：
+会写 data 目录或生成网页的任务（爬取、更新、生成、发邮件）全部在同一个工作线程中依次执行，
+避免两个任务同时删除 / 改写数据文件；同名任务已在排队时不再重复加入。
+任务函数接收一个 progress 回调，用来报告进度（第 i/n 篇、数据量），回调同时检查取消请求：
+取消后下一次调用 progress 会抛出 JobCancelled（协作式取消，任务在安全的位置停下）。
+"""
+
+import itertools
+import threading
+
+QUEUED = "queued"
+RUNNING = "running"
+PROGRESS = "progress"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    """任务已被取消（由 progress 回调抛出，任务函数无需捕获）"""
+
+
+class Job:
+    def __init__(self, job_id, name, func, title):
+        self.id = job_id
+        self.name = name
+        self.title = title or name
+        self.func = func
+        self.state = QUEUED
+        self.result = None
+        self.error = None
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def wait(self, timeout=None):
+        """
+        等待任务结束，返回是否已结束
+        """
+        return self._finished.wait(timeout)
+
+
+class JobManager:
+    def __init__(self, listener=None):
+        """
+        listener(event) 在工作线程（或提交任务的线程）中被调用，event 为 dict：
+        {job, name, title, state, current, total, bytes, message, error, result}，result 为任务函数的返回值
+        """
+        self._listener = listener or (lambda event: None)
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._pending = []
+        self._current = None
+        self._thread = threading.Thread(target=self._run, name="job-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, name, func, title=None):
+        """
+        加入任务 func(progress)。同名任务已在排队（尚未开始）时直接返回排队中的那个
+        """
+        with self._condition:
+            for job in self._pending:
+                if job.name == name:
+                    return job
+            job = Job(next(self._ids), name, func, title)
+            self._pending.append(job)
+            self._condition.notify()
+        self._emit(job, QUEUED)
+        return job
+
+    def cancel(self, name=None):
+        """
+        取消排队中和正在运行的任务（指定 name 时只取消同名任务），返回被取消的任务数
+        """
+        with self._condition:
+            dropped = [job for job in self._pending if name is None or job.name == name]
+            self._pending = [job for job in self._pending if job not in dropped]
+            running = self._current if self._current and (name is None or self._current.name == name) else None
+        for job in dropped:
+            job.cancel()
+            self._finish(job, CANCELLED)
+        if running:
+            running.cancel()
+            self._emit(running, PROGRESS, message="正在取消…")
+        return len(dropped) + (1 if running else 0)
+
+    @property
+    def busy(self):
+        with self._condition:
+            return self._current is not None or bool(self._pending)
+
+    def _progress_callback(self, job):
+        def progress(current=None, total=None, message="", nbytes=None):
+            if job.cancelled:
+                raise JobCancelled()
+            self._emit(job, PROGRESS, current=current, total=total, message=message, nbytes=nbytes)
+        return progress
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                job = self._pending.pop(0)
+                self._current = job
+            job.state = RUNNING
+            self._emit(job, RUNNING)
+            try:
+                job.result = job.func(self._progress_callback(job))
+                state = DONE
+            except JobCancelled:
+                state = CANCELLED
+            except Exception as e:
+                job.error = str(e)
+                state = FAILED
+            with self._condition:
+                self._current = None
+            self._finish(job, state)
+
+    def _finish(self, job, state):
+        job.state = state
+        self._emit(job, state, message=job.error or "")
+        job._finished.set()
+
+    def _emit(self, job, state, current=None, total=None, message="", nbytes=None):
+        try:
+            self._listener({"job": job.id, "name": job.name, "title": job.title, "state": state,
+                            "current": current, "total": total, "bytes": nbytes, "message": message,
+                            "error": job.error, "result": job.result})
+        except Exception as e:
+            print(f"❌ 任务事件处理出错: {e}")
+
+
+def describe_event(event):
+    """
+    把任务事件转成状态栏文字
+    """
+    title = event["title"]
+    state = event["state"]
+    if state == QUEUED:
+        return f"状态：{title} 已加入队列，等待前面的任务完成…"
+    if state == RUNNING:
+        return f"状态：正在{title}…"
+    if state == DONE:
+        return f"状态：✔ {title}完成"
+    if state == FAILED:
+        return f"状态：✖ {title}失败: {event['error']}"
+    if state == CANCELLED:
+        return f"状态：已取消{title}"
+    parts = []
+    if event["current"] is not None:
+        parts.append(f"{event['current']}/{event['total']}" if event["total"] else f"第 {event['current']} 篇")
+    if event["bytes"]:
+        parts.append(f"{event['bytes'] / 1024:.1f}KB")
+    detail = f"（{'，'.join(parts)}）" if parts else ""
+    return f"状态：正在{title}{detail} {event['message']}".rstrip()
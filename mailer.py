@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发送网页邮件（管理控制台 display.py 与命令行 cli.py 共用）。
+cfg 与邮件配置对话框的字段一致：smtp_server, port, sender, password, recipient, file, subject，
+另有可选字段 mode（site / digest）和 security（auto / starttls / ssl / none）。
+
+- site 模式：把已生成的网页（index.html、assets、sw.js、media）打包成 zip 附件发送；
+  网页内容哈希取自构建清单 build-manifest.json，与上次成功发送给该收件人时相同则跳过。
+- digest 模式：正文列出上次发送以来的新文章和站长答疑，没有新内容时跳过。
+  站点时间只精确到分钟，水位线同时记录最新时间戳上已发送过的文章链接 / 评论 ID，
+  与上次摘要同一分钟发布的内容仍会出现在下一次摘要中，且不会重复。
+两种模式都只读取现有的生成结果和 data 目录，不会重新生成网页。
+多个收件人用逗号或分号分隔，共用同一个 SMTP 连接，每人单独一封邮件；
+每个收件人的发送记录保存在 index.html 同目录的 email-state.json 中。
+security 为 none 时不加密、不登录，可用于本地测试服务器（如 python -m aiosmtpd -n -l localhost:1025）。
+"""
+
+import datetime
+import hashlib
+import html as html_lib
+import io
+import json
+import os
+import re
+import smtplib
+import time
+import zipfile
+from email.message import EmailMessage
+
+from site_layout import BUILD_MANIFEST_FILE
+
+# 简单邮箱格式校验正则
+EMAIL_REGEX = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+RECIPIENT_SEPARATOR = re.compile(r"[,;，；\s]+")
+CONFIG_FIELDS = ("smtp_server", "port", "sender", "password", "recipient", "file", "subject", "mode", "security")
+MODES = ("site", "digest")
+SECURITY_OPTIONS = ("auto", "starttls", "ssl", "none")
+SSL_PORT = 465                        # security 为 auto 时，此端口使用 SSL 直连，其余端口使用 STARTTLS
+SMTP_TIMEOUT = 30
+EMAIL_STATE_FILE = "email-state.json"  # 每个收件人的上次发送记录（与 index.html 同目录）
+ARCHIVE_NAME = "site.zip"
+ARCHIVE_EXCLUDE = ("articles/", "list/", "sitemap.xml")  # 多页面导出只用于部署和搜索引擎，不放进附件
+DIGEST_FIRST_DAYS = 7                 # 第一次发送摘要时包含最近几天的内容
+DATA_DIR = "data"
+
+
+def parse_recipients(text):
+    return [r for r in RECIPIENT_SEPARATOR.split(text or "") if r]
+
+
+def validate_config(cfg):
+    """
+    检查邮件配置，返回错误信息列表（为空表示配置有效）
+    """
+    errors = []
+    if not cfg.get('smtp_server'):
+        errors.append("SMTP 服务器不能为空。")
+    if not str(cfg.get('port', '')).isdigit():
+        errors.append("端口必须为数字。")
+    if not EMAIL_REGEX.match(cfg.get('sender', '')):
+        errors.append("发件人邮箱格式不正确。")
+    if cfg.get('security', 'auto') not in SECURITY_OPTIONS:
+        errors.append(f"加密方式必须为 {' / '.join(SECURITY_OPTIONS)} 之一。")
+    elif cfg.get('security') != "none" and not cfg.get('password'):
+        errors.append("SMTP 授权码/密码不能为空。")
+    recipients = parse_recipients(cfg.get('recipient', ''))
+    if not recipients or not all(EMAIL_REGEX.match(r) for r in recipients):
+        errors.append("收件人邮箱格式不正确（多个收件人用逗号分隔）。")
+    if not cfg.get('file') or not os.path.exists(cfg['file']):
+        errors.append("文件路径不存在或为空。")
+    if not cfg.get('subject'):
+        errors.append("邮件主题不能为空。")
+    if cfg.get('mode', 'site') not in MODES:
+        errors.append(f"发送方式必须为 {' / '.join(MODES)} 之一。")
+    return errors
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ 读取邮件发送记录失败，视为从未发送: {e}")
+        return {}
+
+
+def save_state(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+# =================== site 模式：网页压缩包 ===================
+
+def site_manifest(base_dir):
+    """
+    读取构建清单，返回 {相对路径: sha256}（不含 .gz/.br 预压缩文件和多页面导出）
+    """
+    manifest_file = os.path.join(base_dir, BUILD_MANIFEST_FILE)
+    if not os.path.exists(manifest_file):
+        raise FileNotFoundError(f"未找到构建清单 {manifest_file}，请先生成网页")
+    with open(manifest_file, "r", encoding="utf-8") as f:
+        files = json.load(f)["files"]
+    return {rel: info["sha256"] for rel, info in sorted(files.items())
+            if not rel.endswith((".gz", ".br")) and not rel.startswith(ARCHIVE_EXCLUDE)}
+
+
+def site_hash(manifest):
+    return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def build_site_archive(base_dir, manifest):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+        for rel in manifest:
+            archive.write(os.path.join(base_dir, rel), rel)
+    return buffer.getvalue()
+
+
+# =================== digest 模式：新文章和站长答疑摘要 ===================
+
+def load_digest_source(data_folder):
+    """
+    返回 (文章列表 [(时间戳, 标题, 链接, 时间)], 站长答疑索引)，时间戳为毫秒
+    """
+    import generator
+    articles = generator.read_and_sort_data(data_folder)
+    items = [(generator.to_epoch_ms(a.get("article_time_iso"), a.get("article_time", "")),
+              a.get("title", ""), a["article_url"], a.get("article_time", "")) for a in articles]
+    return items, generator.build_answer_index(articles)
+
+
+def render_digest(articles, answers, titles):
+    """
+    返回 (纯文本, HTML) 正文，文章和答疑都按时间从新到旧排列；titles 为 {文章链接: 标题}
+    """
+    esc = html_lib.escape
+    text = [f"新文章 {len(articles)} 篇，站长答疑 {len(answers)} 条", ""]
+    html = [f"<h2>新文章（{len(articles)}）</h2><ul>"]
+    for _, title, url, article_time in sorted(articles, reverse=True):
+        text.append(f"· {title}（{article_time}） {url}")
+        html.append(f'<li><a href="{esc(url)}">{esc(title)}</a> <small>{esc(article_time)}</small></li>')
+    html.append(f"</ul><h2>站长答疑（{len(answers)}）</h2>")
+    text.append("")
+    for _, url, author, answer_time, _, answer, parent in reversed(answers):
+        title = titles.get(url, url)
+        text.append(f"《{title}》 {author}（{answer_time}）")
+        html.append(f'<div style="margin-bottom:16px"><div><a href="{esc(url)}">{esc(title)}</a></div>')
+        if parent:
+            text.append(f"  问 {parent[1]}：{parent[3]}")
+            html.append(f'<blockquote style="color:#666">{esc(parent[1])}：{esc(parent[3])}</blockquote>')
+        text.append(f"  答：{answer}")
+        html.append(f"<div><b>{esc(author)}</b> <small>{esc(answer_time)}</small>：{esc(answer)}</div></div>")
+    return "\n".join(text), "".join(html)
+
+
+def split_new(items, until, seen, key, ident):
+    """
+    返回晚于水位线 until 的条目；时间戳等于 until 的条目只保留 ID 不在 seen 中的（时间只精确到分钟）
+    """
+    seen = set(seen)
+    return [x for x in items if key(x) > until or (key(x) == until and ident(x) not in seen)]
+
+
+def advance_watermark(items, until, seen, key, ident):
+    """
+    发送 items 后的新水位线 (时间戳, 该时间戳上已发送的 ID 列表)
+    """
+    if not items:
+        return until, list(seen)
+    newest = max(key(x) for x in items)
+    latest = sorted(ident(x) for x in items if key(x) == newest)
+    return newest, sorted(set(latest).union(seen)) if newest == until else latest
+
+
+def digest_update(record, new_articles, new_answers, first_since):
+    update = {}
+    for name, items, key, ident in (("articles", new_articles, lambda a: a[0], lambda a: a[2]),
+                                    ("answers", new_answers, lambda a: a[4] or 0, lambda a: a[0])):
+        until, seen = advance_watermark(items, record.get(f"{name}_until", first_since),
+                                        record.get(f"{name}_seen", []), key, ident)
+        update[f"{name}_until"], update[f"{name}_seen"] = until, seen
+    return update
+
+
+def describe_summary(summary):
+    text = f"已发送 {summary['sent']} 封，跳过 {summary['skipped']} 位收件人"
+    if summary.get("failed"):
+        text += f"，{summary['failed']} 位发送失败"
+    return text
+
+
+# =================== 发送 ===================
+
+def build_message(cfg, recipient, subject, text, html=None, attachment=None):
+    msg = EmailMessage()
+    msg['Subject'] = subject
+    msg['From'] = cfg['sender']
+    msg['To'] = recipient
+    msg.set_content(text)
+    if html:
+        msg.add_alternative(html, subtype='html')
+    if attachment:
+        msg.add_attachment(attachment, maintype='application', subtype='zip', filename=ARCHIVE_NAME)
+    return msg
+
+
+def open_smtp(cfg):
+    security = cfg.get('security') or "auto"
+    port = int(cfg['port'])
+    if security == "ssl" or (security == "auto" and port == SSL_PORT):
+        smtp = smtplib.SMTP_SSL(cfg['smtp_server'], port, timeout=SMTP_TIMEOUT)
+    else:
+        smtp = smtplib.SMTP(cfg['smtp_server'], port, timeout=SMTP_TIMEOUT)
+        if security != "none":
+            smtp.starttls()
+    if security != "none" or cfg.get('password'):
+        smtp.login(cfg['sender'], cfg['password'])
+    return smtp
+
+
+def send_messages(cfg, messages):
+    """
+    通过同一个 SMTP 连接依次发送 {收件人: 邮件}，返回 (成功的收件人列表, {失败的收件人: 原因})
+    """
+    sent, failed = [], {}
+    smtp = open_smtp(cfg)
+    try:
+        for recipient, msg in messages.items():
+            try:
+                smtp.send_message(msg)
+                sent.append(recipient)
+            except (smtplib.SMTPException, OSError) as e:
+                failed[recipient] = str(e)
+    finally:
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+    return sent, failed
+
+
+def deliver(cfg, force=False, data_folder=DATA_DIR):
+    """
+    按 cfg['mode'] 发送网页压缩包或摘要。内容没有变化的收件人会被跳过（force=True 时强制发送），
+    返回摘要 dict；有收件人发送失败时在记录已成功的收件人后抛出异常
+    """
+    mode = cfg.get('mode') or "site"
+    recipients = parse_recipients(cfg['recipient'])
+    base_dir = os.path.dirname(os.path.abspath(cfg['file']))
+    state_file = os.path.join(base_dir, EMAIL_STATE_FILE)
+    state = load_state(state_file)
+    records = state.setdefault(mode, {})
+    messages, updates = {}, {}
+    attachment = None
+
+    if mode == "site":
+        manifest = site_manifest(base_dir)
+        digest = site_hash(manifest)
+        pending = [r for r in recipients if force or records.get(r, {}).get("hash") != digest]
+        if pending:
+            attachment = build_site_archive(base_dir, manifest)
+            text = f"附件为最新生成的网页（共 {len(manifest)} 个文件），解压后打开 index.html 即可浏览。"
+        for r in pending:
+            messages[r] = build_message(cfg, r, cfg['subject'], text, attachment=attachment)
+            updates[r] = {"hash": digest}
+    else:
+        articles, answers = load_digest_source(data_folder)
+        titles = {url: title for _, title, url, _ in articles}
+        first_since = int((time.time() - DIGEST_FIRST_DAYS * 86400) * 1000)
+        for r in recipients:
+            record = records.get(r, {})
+            new_articles = split_new(articles, record.get("articles_until", first_since),
+                                     record.get("articles_seen", []), lambda a: a[0], lambda a: a[2])
+            new_answers = split_new(answers, record.get("answers_until", first_since),
+                                    record.get("answers_seen", []), lambda a: a[4] or 0, lambda a: a[0])
+            if not (new_articles or new_answers or force):
+                continue
+            text, html = render_digest(new_articles, new_answers, titles)
+            subject = f"{cfg['subject']}（{len(new_articles)} 篇新文章，{len(new_answers)} 条答疑）"
+            messages[r] = build_message(cfg, r, subject, text, html)
+            updates[r] = digest_update(record, new_articles, new_answers, first_since)
+
+    summary = {"mode": mode, "recipients": len(recipients), "sent": 0, "skipped": len(recipients) - len(messages),
+               "failed": 0, "attachment_bytes": len(attachment) if attachment else 0}
+    if not messages:
+        print("✅ 内容与上次发送时相同，跳过发送")
+        return summary
+    sent, failed = send_messages(cfg, messages)
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+    for r in sent:
+        records[r] = dict(updates[r], sent_at=now)
+    if sent:
+        save_state(state_file, state)
+    summary["sent"] = len(sent)
+    summary["failed"] = len(failed)
+    print(f"✅ 邮件已发送给 {len(sent)} 位收件人，跳过 {summary['skipped']} 位"
+          + (f"（附件 {len(attachment) / 1024:.1f}KB）" if attachment else ""))
+    if failed:
+        raise RuntimeError(describe_summary(summary) + "。以下收件人发送失败："
+                           + "；".join(f"{r}: {e}" for r, e in failed.items()))
+    return summary
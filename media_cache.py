@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地图片缓存：
+把文章正文和评论中引用的远程图片并发下载到 media 目录，按内容哈希命名（相同图片只保存一份），
+记录宽高并生成缩略图；生成网页时把 <img> 改为引用本地文件并延迟加载，<iframe> 改为点击后才加载的占位按钮。
+
+用法：python media_cache.py        （下载 data 目录中文章引用的图片，之后再运行 generator.py）
+"""
+
+import os
+import re
+import json
+import struct
+import hashlib
+import threading
+import html as html_lib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from site_layout import MEDIA_DIR
+
+try:
+    from PIL import Image  # 可选：生成缩略图
+except ImportError:
+    Image = None
+
+MEDIA_INDEX_FILE = "index.json"     # 图片地址 -> 本地文件及尺寸
+MEDIA_DOWNLOAD_WORKERS = 8          # 并发下载数
+MEDIA_TIMEOUT = 15                  # 单张图片下载超时（秒）
+MEDIA_MAX_BYTES = 20 * 1024 * 1024  # 超过该大小的图片不缓存
+THUMBNAIL_WIDTH = 800               # 宽于该值的图片另外生成缩略图，与页面内容区最大宽度相近
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
+}
+
+IMG_TAG_RE = re.compile(r'<img\b[^>]*>', re.I)
+IFRAME_OPEN_RE = re.compile(r'<iframe\b[^>]*>', re.I)
+IFRAME_RE = re.compile(r'<iframe\b[^>]*>(?:.*?</iframe\s*>)?', re.I | re.S)
+ATTR_RE = re.compile(r'([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+)))?')
+IMAGE_EXTENSIONS = {"png": ".png", "gif": ".gif", "jpeg": ".jpg", "webp": ".webp"}
+
+
+# 解析标签属性，返回 (标签名, [(属性名, 属性值)])，属性值已反转义；没有值的属性值为 None
+def parse_tag(tag):
+    inner = tag[1:-1].rstrip("/")
+    name, _, rest = re.sub(r'\s', " ", inner).partition(" ")
+    attrs = []
+    for m in ATTR_RE.finditer(rest):
+        value = next((v for v in m.groups()[1:] if v is not None), None)
+        attrs.append((m.group(1).lower(), html_lib.unescape(value) if value is not None else None))
+    return name.lower(), attrs
+
+
+def build_tag(name, attrs):
+    parts = [name]
+    for key, value in attrs:
+        parts.append(key if value is None else f'{key}="{html_lib.escape(str(value))}"')
+    return "<" + " ".join(parts) + ">"
+
+
+# 从图片文件头读取格式和宽高（PNG / GIF / JPEG / WebP），无法识别时返回 (None, 0, 0)
+def image_info(data):
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        return "png", width, height
+    if data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        width, height = struct.unpack("<HH", data[6:10])
+        return "gif", width, height
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP" and len(data) >= 30:
+        chunk = data[12:16]
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", data[26:30])
+            return "webp", width & 0x3FFF, height & 0x3FFF
+        if chunk == b"VP8L":
+            bits = int.from_bytes(data[21:25], "little")
+            return "webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if chunk == b"VP8X":
+            return "webp", int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+    if data[:2] == b"\xff\xd8":
+        pos = 2
+        while pos + 9 < len(data):
+            if data[pos] != 0xFF:
+                pos += 1
+                continue
+            marker = data[pos + 1]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7 or marker == 0xFF:
+                pos += 1 if marker == 0xFF else 2
+                continue
+            length = struct.unpack(">H", data[pos + 2:pos + 4])[0]
+            # SOF0~SOF15（不含 DHT/JPG/DAC）中记录了图片尺寸
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack(">HH", data[pos + 5:pos + 9])
+                return "jpeg", width, height
+            pos += 2 + length
+        return "jpeg", 0, 0
+    return None, 0, 0
+
+
+# 收集文章正文和全部评论中引用的远程图片地址（保持首次出现的顺序）
+def collect_image_urls(articles):
+    urls = {}
+    for article in articles:
+        fragments = [article.get("content", "")]
+        stack = list(article.get("comments") or [])
+        while stack:
+            comment = stack.pop()
+            fragments.append(comment.get("content", ""))
+            stack.extend(comment.get("children") or [])
+        for fragment in fragments:
+            for tag in IMG_TAG_RE.findall(fragment or ""):
+                src = dict(parse_tag(tag)[1]).get("src") or ""
+                if urlparse(src).scheme in ("http", "https"):
+                    urls.setdefault(src, None)
+    return list(urls)
+
+
+def load_media_index(media_dir=MEDIA_DIR):
+    index_file = os.path.join(media_dir, MEDIA_INDEX_FILE)
+    if not os.path.exists(index_file):
+        return {}
+    try:
+        with open(index_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ 读取图片缓存索引失败: {e}")
+        return {}
+
+
+# 生成缩略图，返回 (文件名, 宽度)；未安装 Pillow、图片不够宽或是 GIF 动图时返回 (None, 0)
+def make_thumbnail(path, kind, width, height, media_dir):
+    if Image is None or kind == "gif" or width <= THUMBNAIL_WIDTH:
+        return None, 0
+    name = f"{os.path.splitext(os.path.basename(path))[0]}-w{THUMBNAIL_WIDTH}{IMAGE_EXTENSIONS[kind]}"
+    thumb_path = os.path.join(media_dir, name)
+    if not os.path.exists(thumb_path):
+        with Image.open(path) as image:
+            image.thumbnail((THUMBNAIL_WIDTH, round(height * THUMBNAIL_WIDTH / width)))
+            image.save(thumb_path, optimize=True)
+    return name, THUMBNAIL_WIDTH
+
+
+# 下载一张图片并按内容哈希保存，返回索引条目；失败时返回 None
+def fetch_image(url, media_dir):
+    import requests  # 只在需要下载时导入
+    try:
+        response = requests.get(url, headers=HEADERS, timeout=MEDIA_TIMEOUT)
+        response.raise_for_status()
+        data = response.content
+    except Exception as e:
+        print(f"❌ 下载图片失败 {url}: {e}")
+        return None
+    kind, width, height = image_info(data)
+    if kind is None or len(data) > MEDIA_MAX_BYTES:
+        print(f"❌ 跳过无法识别或过大的图片 {url}")
+        return None
+    name = hashlib.sha256(data).hexdigest()[:16] + IMAGE_EXTENSIONS[kind]
+    path = os.path.join(media_dir, name)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"  # 多个地址可能同时下载到同一张图片
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    entry = {"file": name, "width": width, "height": height}
+    try:
+        thumb, thumb_width = make_thumbnail(path, kind, width, height, media_dir)
+    except Exception as e:
+        print(f"❌ 生成缩略图失败 {url}: {e}")
+        thumb, thumb_width = None, 0
+    if thumb:
+        entry.update(thumb=thumb, thumb_width=thumb_width)
+    return entry
+
+
+# 并发下载文章中尚未缓存的图片，更新并返回图片索引
+def cache_media(articles, media_dir=MEDIA_DIR, workers=MEDIA_DOWNLOAD_WORKERS):
+    if not os.path.exists(media_dir):
+        os.makedirs(media_dir)
+    index = load_media_index(media_dir)
+    pending = [url for url in collect_image_urls(articles)
+               if url not in index or not os.path.exists(os.path.join(media_dir, index[url]["file"]))]
+    if Image is None and pending:
+        print("❌ 未安装 Pillow，不生成缩略图（pip install pillow）")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for url, entry in zip(pending, executor.map(lambda u: fetch_image(u, media_dir), pending)):
+            if entry:
+                index[url] = entry
+    with open(os.path.join(media_dir, MEDIA_INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+    files = {entry["file"] for entry in index.values()}
+    print(f"✅ 图片缓存完成：本次下载 {len(pending)} 张，共 {len(index)} 个地址，{len(files)} 个文件")
+    return index
+
+
+# 图片缓存中实际被引用的文件路径（原图和缩略图），用于构建清单
+def media_files(media_index, media_dir=MEDIA_DIR):
+    names = set()
+    for entry in media_index.values():
+        names.add(entry["file"])
+        if entry.get("thumb"):
+            names.add(entry["thumb"])
+    return [os.path.join(media_dir, name) for name in sorted(names)
+            if os.path.exists(os.path.join(media_dir, name))]
+
+
+# 改写一个 <img>：已缓存的图片改为本地地址（有缩略图时用 srcset 让浏览器按宽度选择），
+# 并补上 width/height 以预留空间，统一延迟加载、异步解码
+def rewrite_img(tag, media_index, media_prefix):
+    name, attrs = parse_tag(tag)
+    values = dict(attrs)
+    entry = media_index.get(values.get("src") or "")
+    replaced = {"loading": "lazy", "decoding": "async"}
+    dropped = set()
+    if entry:
+        replaced["src"] = f"{media_prefix}{entry['file']}"
+        replaced["data-origin"] = values["src"]
+        if entry.get("thumb"):
+            replaced["src"] = f"{media_prefix}{entry['thumb']}"
+            replaced["srcset"] = (f"{media_prefix}{entry['thumb']} {entry['thumb_width']}w, "
+                                  f"{media_prefix}{entry['file']} {entry['width']}w")
+            replaced["sizes"] = f"(max-width: {THUMBNAIL_WIDTH}px) 100vw, {THUMBNAIL_WIDTH}px"
+        elif "srcset" in values:
+            dropped.add("srcset")  # 原 srcset 指向远程地址，去掉
+        if entry["width"] and entry["height"] and not (values.get("width") and values.get("height")):
+            replaced["width"] = entry["width"]
+            replaced["height"] = entry["height"]
+    attrs = [(key, replaced.pop(key) if key in replaced else value) for key, value in attrs if key not in dropped]
+    attrs.extend(replaced.items())
+    return build_tag(name, attrs)
+
+
+# 把 <iframe> 换成占位按钮，点击后才创建真正的 iframe（原标签保存在 data-iframe 中）
+def rewrite_iframe(tag):
+    name, attrs = parse_tag(IFRAME_OPEN_RE.match(tag).group(0))
+    values = dict(attrs)
+    if "loading" not in values:
+        attrs.append(("loading", "lazy"))
+    iframe = build_tag(name, attrs) + "</iframe>"
+    host = urlparse(values.get("src") or "").netloc or "外部内容"
+    style = ""
+    width, height = values.get("width") or "", values.get("height") or ""
+    if width.isdigit() and height.isdigit() and int(height) > 0:
+        style = f' style="aspect-ratio:{width}/{height}"'
+    return (f'<button type="button" class="iframe-placeholder"{style} data-iframe="{html_lib.escape(iframe)}" '
+            f'onclick="this.outerHTML=this.dataset.iframe">▶ 点击加载 {html_lib.escape(host)}</button>')
+
+
+def rewrite_media_html(fragment, media_index, media_prefix=MEDIA_DIR + "/"):
+    if not fragment or ("<img" not in fragment.lower() and "<iframe" not in fragment.lower()):
+        return fragment
+    fragment = IMG_TAG_RE.sub(lambda m: rewrite_img(m.group(0), media_index, media_prefix), fragment)
+    return IFRAME_RE.sub(lambda m: rewrite_iframe(m.group(0)), fragment)
+
+
+# 页面位于子目录时（如多页面导出的 articles/），给已改写图片中的本地地址加上相对前缀
+def relocate_media_html(fragment, prefix):
+    pattern = re.compile(r'(src="|, |srcset=")' + re.escape(MEDIA_DIR + "/"))
+    return IMG_TAG_RE.sub(lambda m: pattern.sub(lambda a: a.group(1) + prefix + MEDIA_DIR + "/", m.group(0)), fragment)
+
+
+# 返回改写了图片和 iframe 的文章副本（正文和全部评论），不修改原数据
+def localize_article(article, media_index, media_prefix=MEDIA_DIR + "/"):
+    localized = dict(article)
+    if "content" in localized:
+        localized["content"] = rewrite_media_html(article["content"], media_index, media_prefix)
+    comments = []
+    stack = [(article.get("comments") or [], comments)]
+    while stack:
+        source, target = stack.pop()
+        for comment in source:
+            copy = dict(comment)
+            if "content" in copy:
+                copy["content"] = rewrite_media_html(comment["content"], media_index, media_prefix)
+            children = comment.get("children") or []
+            copy["children"] = []
+            target.append(copy)
+            if children:
+                stack.append((children, copy["children"]))
+    if "comments" in localized:
+        localized["comments"] = comments
+    return localized
+
+
+if __name__ == "__main__":
+    import generator
+    cache_media(generator.read_and_sort_data("data"))
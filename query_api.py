@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地 JSON 查询接口（cli.py api）：直接读取 crawler.py 保存的 data 目录，供其他内部工具按需查询，
+不必解析 index.html 或自己遍历 data/pageN/*.json。
+
+    GET /api/articles?page=1&per_page=20            文章列表（分页，顺序与网页一致）
+    GET /api/articles/<id>                          单篇文章（正文，不含评论）
+    GET /api/articles/<id>/comments?cursor=&limit=  评论（按顶层评论分页，每条带完整回复树）
+    GET /api/authors?q=&limit=                      作者查找（按评论数排序）
+    GET /api/authors/<作者>/comments?cursor=&limit=  某作者的全部评论（从新到旧）
+    GET /api/search?q=&type=comment|article&sort=rank|recent&page=
+                                                    全文搜索（SQLite FTS5 索引，见 search_index.py），带摘要
+
+文章 id 为链接中的编号：?p=123 -> p123，?page_id=18 -> page18。
+data 目录的文件变化后（最多 REFRESH_INTERVAL 秒）自动重新建立索引，只重新解析变化的文件，
+全文索引同时增量更新。
+响应按 (数据版本, 请求地址) 缓存，带强 ETag，支持 If-None-Match 返回 304 和 gzip 压缩。
+游标中带有数据版本，数据更新后旧游标返回 409，需要从第一页重新获取。
+"""
+
+import base64
+import collections
+import gzip
+import hashlib
+import json
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, unquote, urlparse, urlsplit
+
+import generator
+import search_index
+from static_server import SiteServer, accepted_encodings
+
+DATA_DIR = "data"
+REFRESH_INTERVAL = 1.0       # 两次检查 data 目录变化的最短间隔（秒）
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+RESPONSE_CACHE_SIZE = 512    # 缓存的响应数
+GZIP_MIN_SIZE = 1024         # 小于此大小的响应不压缩
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def article_key(article_url):
+    query = parse_qs(urlparse(article_url).query)
+    for key, prefix in (("p", "p"), ("page_id", "page")):
+        value = query.get(key, [""])[0]
+        if value.isdigit():
+            return prefix + value
+    return hashlib.md5(article_url.encode("utf-8")).hexdigest()[:12]
+
+
+class Corpus:
+    """
+    data 目录的内存索引。refresh() 发现文件变化时在锁外建立新的 state 再整体替换，
+    重新读取期间（以及读取失败后）其他请求继续使用旧的 state
+    """
+
+    def __init__(self, data_folder=DATA_DIR, db_path=search_index.SEARCH_DB_FILE):
+        self.data_folder = data_folder
+        self.index = search_index.SearchIndex(db_path)
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._article_cache = {}
+        self._snapshot = None
+        self._checked = 0.0
+        self.state = None
+
+    def refresh(self):
+        with self._lock:
+            if self.state is not None and time.monotonic() - self._checked < REFRESH_INTERVAL:
+                return self.state
+            self._checked = time.monotonic()
+        # 已有 state 时不等待正在进行的重新读取；启动时还没有 state，只能等它完成
+        if not self._reload_lock.acquire(blocking=self.state is None):
+            return self.state
+        try:
+            self._reload()
+        except Exception as e:
+            # 文件可能正在被爬虫改写或删除，或个别记录缺少字段：继续使用上一次的索引，_snapshot 不变，下次刷新时重试
+            if self.state is None:
+                raise
+            print(f"❌ 读取数据失败，继续使用上一次的索引: {e!r}")
+        finally:
+            self._reload_lock.release()
+        return self.state
+
+    def _reload(self):
+        snapshot = generator.scan_data_files(self.data_folder)
+        if snapshot == self._snapshot:
+            return
+        start = time.perf_counter()
+        articles, loaded = generator.load_articles_cached(snapshot, self._article_cache)
+        self.index.sync(self.data_folder)
+        version = hashlib.sha256(repr(sorted(snapshot.items())).encode("utf-8")).hexdigest()[:16]
+        state = build_state(articles, version, self.index)
+        with self._lock:
+            self.state, self._snapshot = state, snapshot
+        print(f"✅ 已建立查询索引：{len(articles)} 篇文章，{len(state['comments'])} 条评论"
+              f"（重新读取 {loaded} 个文件，{(time.perf_counter() - start) * 1000:.0f} ms）")
+
+
+def build_state(articles, version, index):
+    """
+    建立查询所需的索引：
+    comments 为全部评论的扁平列表 [(时间戳, 文章序号, 评论ID, 评论)]，authors 中保存其下标；全文搜索使用 index
+    """
+    by_key, comments, authors = {}, [], collections.defaultdict(list)
+    for position, article in enumerate(articles):
+        url = article["article_url"]
+        by_key.setdefault(article_key(url), position)
+        for index_in_article, comment in enumerate(generator.iter_comments(article.get("comments") or [])):
+            ts = generator.to_epoch_ms(comment.get("time_iso"), comment["time"])
+            authors[comment["author"]].append(len(comments))
+            comments.append((ts, position, generator.generate_unique_id(url, index_in_article), comment))
+    newest_first = lambda doc: (-comments[doc][0], doc)
+    for docs in authors.values():
+        docs.sort(key=newest_first)
+    return {"version": version, "articles": articles, "by_key": by_key, "comments": comments,
+            "authors": dict(authors), "index": index}
+
+
+# =================== 数据格式 ===================
+
+def article_summary(article):
+    return {"id": article_key(article["article_url"]), "url": article["article_url"],
+            "title": article.get("title", ""), "time": article.get("article_time", ""),
+            "time_iso": article.get("article_time_iso", ""), "fixed": bool(article.get("fixed")),
+            "comment_count": sum(1 for _ in generator.iter_comments(article.get("comments") or []))}
+
+
+def comment_tree(comment, article_url, index):
+    """
+    带回复树的评论，评论 ID 与网页中一致；返回 (评论, 下一个评论序号)
+    """
+    item = {"id": generator.generate_unique_id(article_url, index), "author": comment["author"],
+            "time": comment["time"], "time_iso": comment.get("time_iso", ""),
+            "highlight": bool(comment.get("highlight")), "content": comment["content"]}
+    index += 1
+    replies = []
+    for child in comment.get("children", []):
+        reply, index = comment_tree(child, article_url, index)
+        replies.append(reply)
+    item["replies"] = replies
+    return item, index
+
+
+def comment_hit(state, doc):
+    ts, position, comment_id, comment = state["comments"][doc]
+    article = state["articles"][position]
+    return {"id": comment_id, "author": comment["author"], "time": comment["time"], "timestamp": ts,
+            "highlight": bool(comment.get("highlight")), "text": generator.html_to_text(comment["content"]),
+            "article": {"id": article_key(article["article_url"]), "title": article.get("title", ""),
+                        "url": article["article_url"]}}
+
+
+# =================== 分页参数 ===================
+
+def int_param(params, name, default, minimum=1, maximum=None):
+    value = params.get(name, [str(default)])[0]
+    if not value.isdigit() or int(value) < minimum:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"参数 {name} 必须是不小于 {minimum} 的整数")
+    return min(int(value), maximum) if maximum else int(value)
+
+
+def encode_cursor(version, offset):
+    return base64.urlsafe_b64encode(f"{version}:{offset}".encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, version):
+    if not cursor:
+        return 0
+    try:
+        cursor_version, offset = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii").split(":")
+        offset = int(offset)
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "无效的游标")
+    if cursor_version != version:
+        raise ApiError(HTTPStatus.CONFLICT, "数据已更新，请从第一页重新获取")
+    return offset
+
+
+def cursor_page(items, params, version):
+    limit = int_param(params, "limit", DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE)
+    offset = decode_cursor(params.get("cursor", [""])[0], version)
+    end = offset + limit
+    return items[offset:end], (encode_cursor(version, end) if end < len(items) else None)
+
+
+# =================== 接口 ===================
+
+def list_articles(state, params):
+    per_page = int_param(params, "per_page", DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE)
+    page = int_param(params, "page", 1)
+    articles = state["articles"]
+    start = (page - 1) * per_page
+    return {"page": page, "per_page": per_page, "total": len(articles),
+            "articles": [article_summary(a) for a in articles[start:start + per_page]]}
+
+
+def find_article(state, key):
+    position = state["by_key"].get(key)
+    if position is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"找不到文章 {key}")
+    return state["articles"][position]
+
+
+def get_article(state, key):
+    article = find_article(state, key)
+    return dict(article_summary(article), content=article.get("content", ""))
+
+
+def get_comments(state, key, params):
+    article = find_article(state, key)
+    threads, index = [], 0
+    for comment in article.get("comments") or []:
+        thread, index = comment_tree(comment, article["article_url"], index)
+        threads.append(thread)
+    page, next_cursor = cursor_page(threads, params, state["version"])
+    return {"article": key, "total_threads": len(threads), "comments": page, "next_cursor": next_cursor}
+
+
+def find_authors(state, params):
+    q = params.get("q", [""])[0].strip().lower()
+    limit = int_param(params, "limit", DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE)
+    matches = sorted(((author, len(docs)) for author, docs in state["authors"].items() if q in author.lower()),
+                     key=lambda item: (-item[1], item[0]))
+    return {"q": q, "total": len(matches), "authors": [{"author": a, "comments": n} for a, n in matches[:limit]]}
+
+
+def author_comments(state, author, params):
+    docs = state["authors"].get(author)
+    if docs is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"找不到作者 {author}")
+    page, next_cursor = cursor_page(docs, params, state["version"])
+    return {"author": author, "total": len(docs), "comments": [comment_hit(state, doc) for doc in page],
+            "next_cursor": next_cursor}
+
+
+def search(state, params):
+    keyword = params.get("q", [""])[0].strip()
+    if not keyword:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "缺少搜索关键词 q")
+    search_type = params.get("type", ["comment"])[0]
+    if search_type not in ("comment", "article"):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "type 必须为 comment 或 article")
+    sort = params.get("sort", ["rank"])[0]
+    if sort not in search_index.SORTS:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "sort 必须为 rank 或 recent")
+    per_page = int_param(params, "per_page", DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE)
+    page = int_param(params, "page", 1)
+    total, results = state["index"].search(keyword, search_type, per_page, (page - 1) * per_page, sort)
+    for result in results:
+        target = result["article"] if search_type == "comment" else result
+        target["id"] = article_key(target["url"])
+    return {"q": keyword, "type": search_type, "sort": sort, "page": page, "per_page": per_page, "total": total,
+            "results": results}
+
+
+def route(state, path, params):
+    parts = [unquote(part) for part in path.strip("/").split("/")]
+    if parts[:1] != ["api"]:
+        raise ApiError(HTTPStatus.NOT_FOUND, "接口不存在")
+    parts = parts[1:]
+    if parts == ["articles"]:
+        return list_articles(state, params)
+    if len(parts) == 2 and parts[0] == "articles":
+        return get_article(state, parts[1])
+    if len(parts) == 3 and parts[0] == "articles" and parts[2] == "comments":
+        return get_comments(state, parts[1], params)
+    if parts == ["authors"]:
+        return find_authors(state, params)
+    if len(parts) == 3 and parts[0] == "authors" and parts[2] == "comments":
+        return author_comments(state, parts[1], params)
+    if parts == ["search"]:
+        return search(state, params)
+    raise ApiError(HTTPStatus.NOT_FOUND, "接口不存在")
+
+
+# =================== HTTP 服务 ===================
+
+class ResponseCache:
+    """
+    按 (数据版本, 请求地址) 缓存已编码的响应：{键: (状态码, JSON, gzip 后的 JSON, ETag)}
+    """
+
+    def __init__(self, size=RESPONSE_CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._items = collections.OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+            return item
+
+    def put(self, key, item):
+        with self._lock:
+            self._items[key] = item
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "YangqiApi/1.0"
+    disable_nagle_algorithm = True
+    corpus = None
+    cache = None
+    quiet = False
+
+    def do_GET(self):
+        self.respond(send_body=True)
+
+    def do_HEAD(self):
+        self.respond(send_body=False)
+
+    def respond(self, send_body):
+        try:
+            item = self.lookup()
+        except Exception as e:
+            # 意外错误（如 FTS 查询出错、数据缺少字段）也返回 JSON，不缓存
+            print(f"❌ 处理请求 {self.path} 出错: {e!r}")
+            body = json.dumps({"error": f"服务器内部错误: {e}"}, ensure_ascii=False).encode("utf-8")
+            item = (HTTPStatus.INTERNAL_SERVER_ERROR, body, None, None)
+        status, body, compressed, etag = item
+        use_gzip = compressed is not None and accepted_encodings(self.headers.get("Accept-Encoding")).get("gzip", 0) > 0
+        if use_gzip:
+            body = compressed
+            etag = etag[:-1] + '-gzip"'
+        if status == HTTPStatus.OK and etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if status == HTTPStatus.OK:
+            self.send_header("ETag", etag)
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def lookup(self):
+        """
+        返回 (状态码, 响应体, gzip 压缩后的响应体, ETag)，相同数据版本和地址的结果缓存在 self.cache 中
+        """
+        state = self.corpus.refresh()
+        # http.server 按 latin-1 解码请求行，还原未经百分号编码的 UTF-8 地址（如直接输入中文的搜索词）
+        try:
+            url = urlsplit(self.path.encode("latin-1").decode("utf-8"))
+        except UnicodeError:
+            url = urlsplit(self.path)
+        key = (state["version"], url.path, url.query)
+        item = self.cache.get(key)
+        if item is None:
+            try:
+                status, payload = HTTPStatus.OK, route(state, url.path, parse_qs(url.query))
+            except ApiError as e:
+                status, payload = e.status, {"error": str(e)}
+            body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            compressed = gzip.compress(body, compresslevel=6, mtime=0) if len(body) >= GZIP_MIN_SIZE else None
+            item = (status, body, compressed, '"' + hashlib.sha256(body).hexdigest()[:32] + '"')
+            self.cache.put(key, item)
+        return item
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(data_folder=DATA_DIR, host="127.0.0.1", port=8001, quiet=False, db_path=search_index.SEARCH_DB_FILE):
+    corpus = Corpus(data_folder, db_path)
+    corpus.refresh()
+    handler = type("DataApiHandler", (ApiHandler,), {"corpus": corpus, "cache": ResponseCache(), "quiet": quiet})
+    return SiteServer((host, port), handler)
+
+
+def serve(data_folder=DATA_DIR, host="127.0.0.1", port=8001, quiet=False, db_path=search_index.SEARCH_DB_FILE):
+    with make_server(data_folder, host, port, quiet, db_path) as httpd:
+        print(f"🔎 查询接口：http://{host}:{httpd.server_address[1]}/api/articles（数据目录 {data_folder}，按 Ctrl+C 退出）")
+        httpd.serve_forever()
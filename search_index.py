@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+服务端全文索引（SQLite FTS5）：为文章正文和全部评论建立索引，供查询接口（query_api.py）和 cli.py search 使用。
+
+- 建索引和查询前都做简繁折叠（逐字转为简体并转小写，长度不变），繁体、简体关键词能互相搜到；
+  未安装 opencc 时只转小写。
+- 三个字及以上的关键词用 trigram 分词的 FTS5 表查询；一两个字的关键词（中文里最常见）
+  trigram 无法索引，改用逐字分词的 FTS5 表做短语查询。两种查询都按 bm25 排序。
+  逐字分词把标点和符号也作为词（CHARS_TOKENIZER），与网页搜索的子串匹配一致：
+  「好人」不会跨过逗号匹配「好，人」，只含标点的关键词（如 " * 「」）按原字符查找。
+- 摘要在原文中截取（折叠不改变长度，匹配位置与原文一致），匹配处用 <mark> 标出。
+- sync() 增量更新：只读取修改时间或大小变化的文件，文章内容摘要未变时不重建
+  （crawler 重新分配页码会改写全部文件，但大多数文章内容不变）。
+"""
+
+import hashlib
+import html as html_lib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+import generator
+
+SEARCH_DB_FILE = "search.db"
+SCHEMA_VERSION = 3           # 2：折叠改为逐字转小写；3：逐字分词保留标点和符号
+TRIGRAM_MIN_LENGTH = 3       # trigram 分词最短可查询长度
+SNIPPET_CONTEXT = 30         # 摘要中匹配处前后保留的字数
+TITLE_WEIGHT = 5.0           # 文章搜索中标题相对正文的 bm25 权重
+SORTS = ("rank", "recent")
+TABLES = ("meta", "files", "articles", "comments", "article_trigram", "article_chars", "comment_trigram",
+          "comment_chars")
+
+# 逐字分词：字母、数字、标点、符号都是词（空白已由 spaced 去掉），不去除变音符号
+CHARS_TOKENIZER = "unicode61 remove_diacritics 0 categories 'L* N* M* P* S* Co'"
+
+SCHEMA = f"""
+CREATE TABLE meta(key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE files(path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER, url TEXT);
+CREATE TABLE articles(id INTEGER PRIMARY KEY, url TEXT UNIQUE, digest TEXT, title TEXT, time TEXT, ts INTEGER,
+                      text TEXT);
+CREATE TABLE comments(id INTEGER PRIMARY KEY, article_id INTEGER, comment_id TEXT, author TEXT, time TEXT,
+                      ts INTEGER, highlight INTEGER, text TEXT);
+CREATE INDEX comments_article ON comments(article_id);
+CREATE VIRTUAL TABLE article_trigram USING fts5(title, body, tokenize='trigram');
+CREATE VIRTUAL TABLE article_chars USING fts5(title, body, tokenize="{CHARS_TOKENIZER}");
+CREATE VIRTUAL TABLE comment_trigram USING fts5(text, tokenize='trigram');
+CREATE VIRTUAL TABLE comment_chars USING fts5(text, tokenize="{CHARS_TOKENIZER}");
+"""
+
+
+# =================== 简繁折叠 ===================
+
+_fold_table = {}
+_fold_lock = threading.Lock()
+
+
+def fold_mode():
+    return "t2s" if generator.opencc is not None else "lower"
+
+
+def fold(text):
+    """
+    逐字转为简体并转小写；每个字只对应一个字，结果与原文等长。
+    小写或简体形式不止一个字的（如 'İ'.lower() 为两个字）保持原样，否则摘要的匹配位置会错开：
+    make_snippet('İİİİ 中医 健康 很好', [fold('健康')]) 应标出「健康」
+    """
+    missing = set(text).difference(_fold_table)
+    if missing:
+        convert = generator.make_converter("t2s") if generator.opencc is not None else None
+        with _fold_lock:
+            for ch in missing:
+                lower = ch.lower()
+                folded = lower if len(lower) == 1 else ch
+                if convert is not None:
+                    simplified = convert(folded)
+                    folded = simplified if len(simplified) == 1 else folded
+                _fold_table[ch] = folded if folded != ch else None
+    return text.translate({ord(ch): folded for ch in set(text) if (folded := _fold_table.get(ch))})
+
+
+def spaced(text):
+    """
+    逐字分词：每个字（空白除外）之间加空格，由 unicode61 分词器（CHARS_TOKENIZER）按字建立索引
+    """
+    return " ".join(ch for ch in text if not ch.isspace())
+
+
+def split_terms(query):
+    return [term for term in fold(query).split() if term]
+
+
+def fts_phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+# =================== 索引 ===================
+
+def article_digest(article):
+    data = [article.get("title", ""), article.get("content", ""), article.get("article_time", ""),
+            article.get("article_time_iso", ""), article.get("comments") or []]
+    return hashlib.sha1(json.dumps(data, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SearchIndex:
+    def __init__(self, db_path=SEARCH_DB_FILE):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._prepare()
+
+    def connection(self):
+        # 每个线程一个连接（查询接口为多线程服务器）；WAL 模式下更新索引时仍可查询
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _prepare(self):
+        conn = self.connection()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        mode = None
+        if version == SCHEMA_VERSION:
+            mode = conn.execute("SELECT value FROM meta WHERE key='fold'").fetchone()
+        if version != SCHEMA_VERSION or mode != (fold_mode(),):
+            # 结构或折叠方式变化（如新装了 opencc）时重建
+            with conn:
+                for name in TABLES:
+                    conn.execute(f"DROP TABLE IF EXISTS {name}")
+                conn.executescript(SCHEMA)
+                conn.execute("INSERT INTO meta VALUES('fold', ?)", (fold_mode(),))
+                conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def _delete_article(self, conn, article_id):
+        comment_ids = [row[0] for row in conn.execute("SELECT id FROM comments WHERE article_id=?", (article_id,))]
+        for table in ("comment_trigram", "comment_chars"):
+            conn.executemany(f"DELETE FROM {table} WHERE rowid=?", ((cid,) for cid in comment_ids))
+        conn.execute("DELETE FROM comments WHERE article_id=?", (article_id,))
+        for table in ("article_trigram", "article_chars"):
+            conn.execute(f"DELETE FROM {table} WHERE rowid=?", (article_id,))
+        conn.execute("DELETE FROM articles WHERE id=?", (article_id,))
+
+    def _insert_article(self, conn, article, digest):
+        url = article["article_url"]
+        title = article.get("title", "")
+        body = generator.html_to_text(article.get("content", ""))
+        cursor = conn.execute("INSERT INTO articles(url, digest, title, time, ts, text) VALUES(?, ?, ?, ?, ?, ?)",
+                              (url, digest, title, article.get("article_time", ""),
+                               generator.to_epoch_ms(article.get("article_time_iso"), article.get("article_time", "")),
+                               body))
+        article_id = cursor.lastrowid
+        folded_title, folded_body = fold(title), fold(body)
+        conn.execute("INSERT INTO article_trigram(rowid, title, body) VALUES(?, ?, ?)",
+                     (article_id, folded_title, folded_body))
+        conn.execute("INSERT INTO article_chars(rowid, title, body) VALUES(?, ?, ?)",
+                     (article_id, spaced(folded_title), spaced(folded_body)))
+        rows = []
+        for index, comment in enumerate(generator.iter_comments(article.get("comments") or [])):
+            text = generator.html_to_text(comment["content"])
+            rows.append((article_id, generator.generate_unique_id(url, index), comment["author"], comment["time"],
+                         generator.to_epoch_ms(comment.get("time_iso"), comment["time"]),
+                         1 if comment.get("highlight") else 0, text))
+        for row in rows:
+            comment_rowid = conn.execute("INSERT INTO comments(article_id, comment_id, author, time, ts, highlight, "
+                                         "text) VALUES(?, ?, ?, ?, ?, ?, ?)", row).lastrowid
+            folded = fold(row[6])
+            conn.execute("INSERT INTO comment_trigram(rowid, text) VALUES(?, ?)", (comment_rowid, folded))
+            conn.execute("INSERT INTO comment_chars(rowid, text) VALUES(?, ?)", (comment_rowid, spaced(folded)))
+        return len(rows)
+
+    def sync(self, data_folder, progress=None):
+        """
+        按 data 目录增量更新索引，返回统计 dict。progress 为可选的进度回调（见 jobs.py）
+        """
+        start = time.perf_counter()
+        snapshot = generator.scan_data_files(data_folder)
+        with self._write_lock:
+            conn = self.connection()
+            known = {path: (mtime, size, url) for path, mtime, size, url in conn.execute("SELECT * FROM files")}
+            changed = [path for path, (_, mtime, size) in snapshot.items() if known.get(path, ())[:2] != (mtime, size)]
+            live_urls = {known[path][2] for path in snapshot if path not in changed}
+            indexed = {url: (article_id, digest) for article_id, url, digest in
+                       conn.execute("SELECT id, url, digest FROM articles")}
+            reindexed = comments = 0
+            with conn:
+                for i, path in enumerate(changed, start=1):
+                    if progress:
+                        progress(i, len(changed), "更新搜索索引")
+                    folder_name, mtime, size = snapshot[path]
+                    try:
+                        article = generator.load_article(folder_name, path)
+                    except (OSError, ValueError) as e:
+                        # 文件可能正在被改写：保留原有索引，files 中的记录不变，下次同步时重试
+                        print(f"❌ 读取 {path} 失败，暂时保留原有的搜索索引: {e}")
+                        if path in known:
+                            live_urls.add(known[path][2])
+                        continue
+                    url = article["article_url"]
+                    digest = article_digest(article)
+                    if url not in live_urls and indexed.get(url, (None, None))[1] != digest:
+                        if url in indexed:
+                            self._delete_article(conn, indexed[url][0])
+                        comments += self._insert_article(conn, article, digest)
+                        indexed[url] = (None, digest)
+                        reindexed += 1
+                    live_urls.add(url)
+                    conn.execute("INSERT OR REPLACE INTO files VALUES(?, ?, ?, ?)", (path, mtime, size, url))
+                conn.executemany("DELETE FROM files WHERE path=?", ((path,) for path in known if path not in snapshot))
+                removed = [article_id for url, (article_id, _) in indexed.items()
+                           if url not in live_urls and article_id is not None]
+                for article_id in removed:
+                    self._delete_article(conn, article_id)
+            stats = {"files": len(snapshot), "changed_files": len(changed), "reindexed_articles": reindexed,
+                     "indexed_comments": comments, "removed_articles": len(removed),
+                     "ms": round((time.perf_counter() - start) * 1000, 1)}
+        if changed or removed:
+            print(f"✅ 搜索索引已更新：{len(changed)} 个文件有变化，重建 {reindexed} 篇文章（{comments} 条评论），"
+                  f"删除 {len(removed)} 篇，用时 {stats['ms']} ms")
+        return stats
+
+    def counts(self):
+        conn = self.connection()
+        return {"articles": conn.execute("SELECT count(*) FROM articles").fetchone()[0],
+                "comments": conn.execute("SELECT count(*) FROM comments").fetchone()[0]}
+
+    # =================== 查询 ===================
+
+    def search(self, query, kind="comment", limit=20, offset=0, sort="rank"):
+        """
+        返回 (命中总数, 结果列表)。多个关键词用空格分隔，需全部出现；
+        sort 为 rank（bm25 相关度，其次按时间从新到旧）或 recent（按时间从新到旧）
+        """
+        terms = split_terms(query)
+        if not terms:
+            return 0, []
+        if all(len(term) >= TRIGRAM_MIN_LENGTH for term in terms):
+            match, suffix = " ".join(fts_phrase(term) for term in terms), "trigram"
+        else:
+            match, suffix = " ".join(fts_phrase(spaced(term)) for term in terms), "chars"
+        conn = self.connection()
+        if kind == "comment":
+            table = f"comment_{suffix}"
+            rank = f"bm25({table})"
+            sql = (f"SELECT c.comment_id, c.author, c.time, c.ts, c.highlight, c.text, a.url, a.title, {rank} "
+                   f"FROM {table} JOIN comments c ON c.id = {table}.rowid JOIN articles a ON a.id = c.article_id "
+                   f"WHERE {table} MATCH ? ORDER BY " + ("c.ts DESC" if sort == "recent" else f"{rank}, c.ts DESC")
+                   + " LIMIT ? OFFSET ?")
+        else:
+            table = f"article_{suffix}"
+            rank = f"bm25({table}, {TITLE_WEIGHT}, 1.0)"
+            sql = (f"SELECT a.url, a.title, a.time, a.ts, a.text, {rank} "
+                   f"FROM {table} JOIN articles a ON a.id = {table}.rowid "
+                   f"WHERE {table} MATCH ? ORDER BY " + ("a.ts DESC" if sort == "recent" else f"{rank}, a.ts DESC")
+                   + " LIMIT ? OFFSET ?")
+        total = conn.execute(f"SELECT count(*) FROM {table} WHERE {table} MATCH ?", (match,)).fetchone()[0]
+        results = []
+        for row in conn.execute(sql, (match, limit, offset)):
+            if kind == "comment":
+                comment_id, author, comment_time, ts, highlight, text, url, title, score = row
+                results.append({"id": comment_id, "author": author, "time": comment_time, "timestamp": ts,
+                                "highlight": bool(highlight), "snippet": make_snippet(text, terms),
+                                "score": round(-score, 4), "article": {"url": url, "title": title}})
+            else:
+                url, title, article_time, ts, text, score = row
+                results.append({"url": url, "title": title, "time": article_time, "timestamp": ts,
+                                "snippet": make_snippet(text, terms), "score": round(-score, 4)})
+        return total, results
+
+
+def make_snippet(text, terms):
+    """
+    在原文中截取第一个匹配处前后 SNIPPET_CONTEXT 个字，匹配的关键词用 <mark> 标出（其余内容已转义）
+    """
+    folded = fold(text)
+    first = min((pos for pos in (folded.find(term) for term in terms) if pos >= 0), default=0)
+    start = max(0, first - SNIPPET_CONTEXT)
+    end = min(len(text), first + SNIPPET_CONTEXT * 2)
+    pattern = re.compile("|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)))
+    out, last = [], start
+    for m in pattern.finditer(folded, start, end):
+        out.append(html_lib.escape(text[last:m.start()]))
+        out.append("<mark>" + html_lib.escape(text[m.start():m.end()]) + "</mark>")
+        last = m.end()
+    out.append(html_lib.escape(text[last:end]))
+    return ("…" if start > 0 else "") + "".join(out) + ("…" if end < len(text) else "")
+
+
+def sync_index(data_folder, db_path=SEARCH_DB_FILE, progress=None):
+    return SearchIndex(db_path).sync(data_folder, progress)
@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+生成结果的目录布局（generator.py、media_cache.py、static_server.py、mailer.py 共用）。
+只含常量、不导入其他模块，内置服务器和发邮件不必为此加载 generator（及 opencc、brotli 等依赖）。
+"""
+
+ASSETS_DIR = "assets"                        # 静态资源目录（相对 index.html），文件名带内容哈希
+MEDIA_DIR = "media"                          # 图片缓存目录（相对 index.html），文件名带内容哈希
+BUILD_MANIFEST_FILE = "build-manifest.json"  # 全部输出文件的哈希清单，供增量部署使用
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内置静态网页服务器（cli.py serve）与简单压测（cli.py loadtest）。
+
+只提供构建清单 build-manifest.json 中列出的生成结果（data 目录、脚本和邮件发送记录等不会被访问到）：
+- 按 Accept-Encoding 直接发送生成时写好的 .br / .gz 预压缩文件，不在请求时压缩；
+- 强 ETag 取自构建清单中的 SHA-256（文件比清单新时改用文件自身的大小和修改时间，见 SiteFiles.etag），
+  支持 If-None-Match / If-Modified-Since 返回 304（带 If-None-Match 时忽略 If-Modified-Since）；
+- 支持单段 Range 请求（If-Range），范围请求总是针对未压缩的原文件；
+- 带哈希的资源（assets/、media/）长期缓存，index.html、sw.js 等每次重新验证；
+- 文件内容用 socket.sendfile 发送（系统支持时零拷贝）。
+重新生成网页后，下一个请求会自动读取新的构建清单。
+"""
+
+import email.utils
+import http.client
+import json
+import mimetypes
+import os
+import posixpath
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from site_layout import ASSETS_DIR, BUILD_MANIFEST_FILE, MEDIA_DIR
+
+IMMUTABLE_DIRS = (ASSETS_DIR + "/", MEDIA_DIR + "/")  # 文件名带内容哈希，内容不会变
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))  # 同等 q 值时优先 brotli
+EXTRA_TYPES = {".js": "text/javascript; charset=utf-8", ".css": "text/css; charset=utf-8",
+               ".html": "text/html; charset=utf-8", ".json": "application/json; charset=utf-8",
+               ".xml": "application/xml; charset=utf-8", ".webp": "image/webp"}
+REQUEST_QUEUE_SIZE = 128  # listen 队列长度（默认 5，并发连接多时新连接会被丢弃后重试，延迟约 1 秒）
+LOADTEST_CONCURRENCY = 16
+LOADTEST_REQUESTS = 2000
+
+
+class SiteFiles:
+    """
+    构建清单的缓存：{相对路径: (sha256, 大小)}，清单文件修改后自动重新读取
+    """
+
+    def __init__(self, directory):
+        self.directory = os.path.abspath(directory)
+        self.manifest_file = os.path.join(self.directory, BUILD_MANIFEST_FILE)
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._files = {}
+
+    def files(self):
+        try:
+            mtime = os.stat(self.manifest_file).st_mtime_ns
+        except OSError:
+            return {}
+        with self._lock:
+            if mtime != self._mtime:
+                try:
+                    with open(self.manifest_file, "r", encoding="utf-8") as f:
+                        entries = json.load(f)["files"]
+                    self._files = {rel: (info["sha256"], info["size"]) for rel, info in entries.items()}
+                    self._mtime = mtime
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"❌ 读取构建清单失败: {e}")
+            return self._files
+
+    def resolve(self, url_path):
+        """
+        把请求路径映射为清单中的相对路径，目录映射到其中的 index.html；找不到时返回 None
+        """
+        rel = posixpath.normpath(unquote(url_path)).lstrip("/")
+        if rel in ("", "."):
+            rel = "index.html"
+        elif url_path.endswith("/"):
+            rel += "/index.html"
+        files = self.files()
+        if rel.endswith((".br", ".gz")) or rel not in files:
+            return None
+        return rel
+
+    def path(self, rel):
+        return os.path.join(self.directory, *rel.split("/"))
+
+    def etag(self, rel, stat):
+        """
+        已打开文件的强 ETag。重新生成网页时先改写文件、最后才写清单，这段时间内文件与清单中的哈希不一致：
+        只有大小相同且修改时间不晚于清单时才使用清单中的 SHA-256，否则用文件自身的 (大小, 修改时间)
+        """
+        with self._lock:
+            entry = self._files.get(rel)
+            manifest_mtime = self._mtime
+        if entry and entry[1] == stat.st_size and manifest_mtime is not None and stat.st_mtime_ns <= manifest_mtime:
+            return f'"{entry[0]}"'
+        return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def content_type(rel):
+    ext = posixpath.splitext(rel)[1].lower()
+    return EXTRA_TYPES.get(ext) or mimetypes.guess_type(rel)[0] or "application/octet-stream"
+
+
+def cache_control(rel):
+    return IMMUTABLE_CACHE if rel.startswith(IMMUTABLE_DIRS) else REVALIDATE_CACHE
+
+
+def accepted_encodings(header):
+    """
+    解析 Accept-Encoding，返回 {编码: q 值}（q=0 表示明确拒绝）
+    """
+    accepted = {}
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def choose_variant(rel, files, accept_header):
+    """
+    选择要发送的文件：返回 (清单中的相对路径, Content-Encoding 或 None)
+    """
+    accepted = accepted_encodings(accept_header)
+    best = None
+    for encoding, suffix in ENCODINGS:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0 and rel + suffix in files and (best is None or q > best[0]):
+            best = (q, rel + suffix, encoding)
+    return (best[1], best[2]) if best else (rel, None)
+
+
+def parse_range(header, size):
+    """
+    解析单段 Range 头，返回 (start, end)（含 end）；不支持的格式返回 None，范围无法满足时返回 False
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, sep, end = header[6:].strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if start:
+            start = int(start)
+            end = min(int(end), size - 1) if end else size - 1
+        elif end:
+            start, end = max(0, size - int(end)), size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+class StaticHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 保持连接，每个响应都带 Content-Length
+    # 响应头和文件内容分两次写出，不关闭 Nagle 算法时会与客户端的延迟确认互相等待（每次约 40ms）
+    disable_nagle_algorithm = True
+    server_version = "YangqiStatic/1.0"
+    site = None
+    quiet = False
+
+    def do_GET(self):
+        self.serve(send_body=True)
+
+    def do_HEAD(self):
+        self.serve(send_body=False)
+
+    def serve(self, send_body):
+        rel = self.site.resolve(urlsplit(self.path).path)
+        if rel is None:
+            self.send_error(HTTPStatus.NOT_FOUND, "Not Found")
+            return
+        files = self.site.files()
+        range_header = self.headers.get("Range")
+        if range_header and not self.range_applies(rel):
+            range_header = None
+        # 范围请求针对原文件，其余请求按 Accept-Encoding 选择预压缩文件
+        if range_header:
+            variant, encoding = rel, None
+        else:
+            variant, encoding = choose_variant(rel, files, self.headers.get("Accept-Encoding"))
+        path = self.site.path(variant)
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "Not Found")
+            return
+        with f:
+            stat = os.fstat(f.fileno())
+            size = stat.st_size
+            etag = self.site.etag(variant, stat)
+            if self.not_modified(etag, stat.st_mtime):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_common_headers(rel, etag, stat.st_mtime, encoding)
+                self.end_headers()
+                return
+
+            status, start, length = HTTPStatus.OK, 0, size
+            byte_range = parse_range(range_header, size) if range_header else None
+            if byte_range is False:
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if byte_range:
+                status, start, length = HTTPStatus.PARTIAL_CONTENT, byte_range[0], byte_range[1] - byte_range[0] + 1
+
+            self.send_response(status)
+            self.send_common_headers(rel, etag, stat.st_mtime, encoding)
+            self.send_header("Content-Type", content_type(rel))
+            if status == HTTPStatus.PARTIAL_CONTENT:
+                self.send_header("Content-Range", f"bytes {start}-{start + length - 1}/{size}")
+            self.send_header("Content-Length", str(length))
+            self.end_headers()
+            if send_body and length:
+                self.wfile.flush()
+                self.connection.sendfile(f, start, length)
+
+    def send_common_headers(self, rel, etag, mtime, encoding):
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", email.utils.formatdate(mtime, usegmt=True))
+        self.send_header("Cache-Control", cache_control(rel))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+
+    def not_modified(self, etag, mtime):
+        # RFC 9110 13.1.3：有 If-None-Match 时只按 ETag 判断，If-Modified-Since（精度只到秒）被忽略
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                return int(mtime) <= email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def range_applies(self, rel):
+        # If-Range 只接受强 ETag：原文件已变化时忽略 Range，返回完整内容
+        if_range = self.headers.get("If-Range")
+        if not if_range:
+            return True
+        try:
+            return if_range.strip() == self.site.etag(rel, os.stat(self.site.path(rel)))
+        except OSError:
+            return False
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+class SiteServer(ThreadingHTTPServer):
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+
+def make_server(directory=".", host="127.0.0.1", port=8000, quiet=False):
+    site = SiteFiles(directory)
+    if not site.files():
+        raise FileNotFoundError(f"未找到构建清单 {site.manifest_file}，请先生成网页")
+    handler = type("SiteHandler", (StaticHandler,), {"site": site, "quiet": quiet})
+    return SiteServer((host, port), handler)
+
+
+def serve(directory=".", host="127.0.0.1", port=8000, quiet=False):
+    with make_server(directory, host, port, quiet) as httpd:
+        print(f"🌐 正在提供 {os.path.abspath(directory)}：http://{host}:{httpd.server_address[1]}/（按 Ctrl+C 退出）")
+        httpd.serve_forever()
+
+
+# =================== 简单压测 ===================
+
+def site_paths(directory):
+    """
+    压测默认请求的路径：构建清单中除预压缩文件外的全部文件
+    """
+    files = SiteFiles(directory).files()
+    return ["/" if rel == "index.html" else "/" + rel for rel in sorted(files) if not rel.endswith((".br", ".gz"))]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else 0.0
+
+
+def load_test(url, paths, concurrency=LOADTEST_CONCURRENCY, requests=LOADTEST_REQUESTS,
+              accept_encoding="br, gzip", revalidate=False):
+    """
+    用 concurrency 个保持连接的客户端循环请求 paths，共 requests 次，返回统计结果。
+    revalidate=True 时带上次响应的 ETag 发条件请求（模拟浏览器重新验证缓存）
+    """
+    parts = urlsplit(url)
+    prefix = parts.path.rstrip("/")
+    counter = iter(range(requests))
+    lock = threading.Lock()
+    latencies, statuses = [], {}
+    total_bytes = [0]
+
+    def worker():
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        etags = {}
+        local_latencies, local_bytes, local_statuses = [], 0, {}
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                break
+            path = prefix + paths[i % len(paths)]
+            headers = {"Accept-Encoding": accept_encoding}
+            if revalidate and path in etags:
+                headers["If-None-Match"] = etags[path]
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                body = response.read()
+                status = response.status
+                if response.getheader("ETag"):
+                    etags[path] = response.getheader("ETag")
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+                body, status = b"", "error"
+            local_latencies.append((time.perf_counter() - start) * 1000)
+            local_bytes += len(body)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        conn.close()
+        with lock:
+            latencies.extend(local_latencies)
+            total_bytes[0] += local_bytes
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(max(1, concurrency))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    return {"requests": len(latencies), "seconds": round(seconds, 3),
+            "requests_per_second": round(len(latencies) / seconds, 1) if seconds else 0.0,
+            "bytes": total_bytes[0], "statuses": {str(k): v for k, v in sorted(statuses.items(), key=str)},
+            "p50_ms": round(percentile(latencies, 50), 2), "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2), "max_ms": round(max(latencies, default=0.0), 2)}
+
+
+def print_load_test(result):
+    print(f"请求 {result['requests']} 次，用时 {result['seconds']} 秒，{result['requests_per_second']} 次/秒，"
+          f"共收到 {result['bytes'] / 1024:.1f}KB")
+    print(f"延迟 p50 {result['p50_ms']} ms，p95 {result['p95_ms']} ms，p99 {result['p99_ms']} ms，"
+          f"最大 {result['max_ms']} ms")
+    print("状态码：" + "，".join(f"{status}×{count}" for status, count in result["statuses"].items()))
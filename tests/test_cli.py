@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+cli 的测试：serve / loadtest 不加载 generator；爬取、更新中被记录后跳过的失败以非零退出码结束
+"""
+
+import os
+import subprocess
+import sys
+
+import cli
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_static_server_does_not_import_generator():
+    code = ("import sys, static_server; "
+            "print(','.join(m for m in ('generator', 'opencc', 'brotli', 'media_cache') if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
+
+
+def test_update_failures_give_non_zero_exit(monkeypatch):
+    monkeypatch.setattr(cli, "run_update", lambda args: {"articles": 3, "failures": ["近期留言"]})
+    assert cli.main(["update"]) == cli.EXIT_FAILED
+    monkeypatch.setattr(cli, "run_update", lambda args: {"articles": 3, "failures": []})
+    assert cli.main(["update"]) == cli.EXIT_OK
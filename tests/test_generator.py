@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+generator.watch_data 的测试：用假的 time.sleep 逐步改动数据，最后以 KeyboardInterrupt 结束监视
+"""
+
+import json
+import time
+
+import generator
+
+
+def write_article(data_dir, name, url, title, comments):
+    page = data_dir / "page1"
+    page.mkdir(parents=True, exist_ok=True)
+    article = {"article_url": url, "title": title, "content": "<p>正文</p>", "article_time": "2025年01月05日 12:00",
+               "page": 1, "order": len(list(page.iterdir())) + 1, "comments": comments}
+    (page / name).write_text(json.dumps(article, ensure_ascii=False), encoding="utf-8")
+
+
+def test_watch_survives_malformed_records(tmp_path, monkeypatch):
+    data_dir = tmp_path / "data"
+    result_file = tmp_path / "site" / "index.html"
+    result_file.parent.mkdir()
+    write_article(data_dir, "1.json", "https://example.com/?p=1", "第一篇", [])
+
+    attempts = []
+    generate_html = generator.generate_html
+
+    def counting_generate_html(articles, *args, **kwargs):
+        attempts.append([a["title"] for a in articles])
+        return generate_html(articles, *args, **kwargs)
+    monkeypatch.setattr(generator, "generate_html", counting_generate_html)
+
+    steps = [
+        # 评论缺少 author（KeyError）
+        lambda: write_article(data_dir, "2.json", "https://example.com/?p=2", "第二篇", [{"time": "2025年01月05日 12:30"}]),
+        # 评论列表中有 null（TypeError）
+        lambda: write_article(data_dir, "3.json", "https://example.com/?p=3", "第三篇", [None]),
+        # 没有新改动：不重试
+        lambda: None,
+        # 修好数据后重新生成
+        lambda: (write_article(data_dir, "2.json", "https://example.com/?p=2", "第二篇", []),
+                 write_article(data_dir, "3.json", "https://example.com/?p=3", "第三篇", None)),
+        lambda: None,
+    ]
+
+    def fake_sleep(seconds):
+        if not steps:
+            raise KeyboardInterrupt
+        steps.pop(0)()
+    monkeypatch.setattr(time, "sleep", fake_sleep)
+
+    generator.watch_data(str(data_dir), str(result_file), poll_interval=0, debounce=0)
+
+    assert not steps, "监视在数据出错后提前退出"
+    assert attempts == [["第一篇"], ["第一篇", "第二篇"], ["第一篇", "第二篇", "第三篇"],
+                        ["第一篇", "第二篇", "第三篇"]]
+    # 最后一次生成成功：页面数据中有第三篇
+    assert any("第三篇" in path.read_text(encoding="utf-8") for path in (result_file.parent / "assets").glob("data.*.js"))
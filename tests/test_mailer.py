@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+mailer.deliver 的测试：用本地最小 SMTP 接收端（不加密、不登录）代替真实邮件服务器
+"""
+
+import email
+import email.policy
+import hashlib
+import json
+import os
+import socketserver
+import threading
+
+import pytest
+
+import mailer
+
+
+class SmtpSink(socketserver.ThreadingTCPServer):
+    """只实现发信所需命令的 SMTP 接收端，sessions 中按连接记录收到的 (收件人, 邮件原文)"""
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SmtpSession)
+        self.sessions = []
+
+
+class SmtpSession(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        messages = []
+        self.server.sessions.append(messages)
+        recipients = []
+        self.reply("220 sink ready")
+        while True:
+            line = self.rfile.readline().decode("utf-8", "replace").strip()
+            command = line[:4].upper()
+            if not line or command == "QUIT":
+                self.reply("221 bye")
+                return
+            if command == "EHLO":
+                self.reply("250-sink")
+                self.reply("250 8BITMIME")
+            elif command == "HELO":
+                self.reply("250 sink")
+            elif command == "MAIL":
+                recipients = []
+                self.reply("250 ok")
+            elif command == "RCPT":
+                recipients.append(line.split(":", 1)[1].strip(" <>"))
+                self.reply("250 ok")
+            elif command == "DATA":
+                self.reply("354 end with .")
+                lines = []
+                while (data := self.rfile.readline()) not in (b".\r\n", b""):
+                    lines.append(data)
+                messages.append((recipients, b"".join(lines)))
+                self.reply("250 queued")
+            else:
+                self.reply("250 ok")
+
+
+@pytest.fixture
+def smtp_sink():
+    server = SmtpSink()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def write_site(base_dir, content):
+    import generator
+    with open(os.path.join(base_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(content)
+    manifest = {"files": {"index.html": {"sha256": hashlib.sha256(content.encode()).hexdigest()}}}
+    with open(os.path.join(base_dir, generator.BUILD_MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    return os.path.join(base_dir, "index.html")
+
+
+def make_cfg(server, site_file, mode="site"):
+    cfg = {"smtp_server": "127.0.0.1", "port": str(server.server_address[1]), "sender": "site@example.com",
+           "password": "", "recipient": "a@example.com, b@example.com", "file": site_file,
+           "subject": "网页更新", "mode": mode, "security": "none"}
+    assert mailer.validate_config(cfg) == []
+    return cfg
+
+
+def test_site_mode_one_session_and_skip_sent(smtp_sink, tmp_path):
+    cfg = make_cfg(smtp_sink, write_site(tmp_path, "<html>v1</html>"))
+
+    summary = mailer.deliver(cfg)
+    assert (summary["sent"], summary["skipped"], summary["failed"]) == (2, 0, 0)
+    assert len(smtp_sink.sessions) == 1
+    assert [rcpt for rcpt, _ in smtp_sink.sessions[0]] == [["a@example.com"], ["b@example.com"]]
+    with open(tmp_path / mailer.EMAIL_STATE_FILE, encoding="utf-8") as f:
+        assert set(json.load(f)["site"]) == {"a@example.com", "b@example.com"}
+
+    # 网页没有变化：两个收件人都跳过，不连接服务器
+    summary = mailer.deliver(cfg)
+    assert (summary["sent"], summary["skipped"]) == (0, 2)
+    assert len(smtp_sink.sessions) == 1
+
+    # 新增收件人只发给他一人
+    cfg["recipient"] += ", c@example.com"
+    summary = mailer.deliver(cfg)
+    assert (summary["sent"], summary["skipped"]) == (1, 2)
+    assert [rcpt for rcpt, _ in smtp_sink.sessions[1]] == [["c@example.com"]]
+
+
+def write_article(data_dir, url, title, article_time, comments):
+    page = data_dir / "page1"
+    page.mkdir(parents=True, exist_ok=True)
+    name = f"{len(list(page.iterdir())) + 1}.json"
+    article = {"article_url": url, "title": title, "content": "", "article_time": article_time,
+               "page": 1, "order": len(list(page.iterdir())) + 1, "comments": comments}
+    (page / name).write_text(json.dumps(article, ensure_ascii=False), encoding="utf-8")
+
+
+def answer(author, time_text, content):
+    return {"author": author, "time": time_text, "content": content, "highlight": True, "children": []}
+
+
+def test_digest_keeps_items_from_the_same_minute(smtp_sink, tmp_path, monkeypatch):
+    monkeypatch.setattr(mailer, "DIGEST_FIRST_DAYS", 36500)
+    data_dir = tmp_path / "data"
+    write_article(data_dir, "https://example.com/?p=1", "第一篇", "2025年01月05日 12:00",
+                  [answer("andy", "2025年01月05日 12:30", "第一条答疑")])
+    cfg = make_cfg(smtp_sink, write_site(tmp_path, "<html></html>"), mode="digest")
+    cfg["recipient"] = "a@example.com"
+
+    assert mailer.deliver(cfg, data_folder=str(data_dir))["sent"] == 1
+    # 同一分钟又有一条答疑和一篇文章：下一次摘要只包含这两条新内容
+    write_article(data_dir, "https://example.com/?p=2", "第二篇", "2025年01月05日 12:00",
+                  [answer("andy", "2025年01月05日 12:30", "第二条答疑")])
+    assert mailer.deliver(cfg, data_folder=str(data_dir))["sent"] == 1
+    message = email.message_from_bytes(smtp_sink.sessions[-1][0][1], policy=email.policy.default)
+    assert "1 篇新文章，1 条答疑" in message["Subject"]
+    text = message.get_body(("plain",)).get_content()
+    assert "第二篇" in text and "第二条答疑" in text
+    assert "第一篇" not in text and "第一条答疑" not in text
+
+    # 没有新内容时跳过
+    assert mailer.deliver(cfg, data_folder=str(data_dir))["skipped"] == 1
+    assert len(smtp_sink.sessions) == 2
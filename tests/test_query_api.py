@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+query_api 的测试：数据读取失败时继续使用旧索引，意外错误返回 JSON 500
+"""
+
+import http.client
+import json
+import threading
+
+import pytest
+
+import query_api
+
+
+def write_article(data_dir, name, url, comments):
+    page = data_dir / "page1"
+    page.mkdir(parents=True, exist_ok=True)
+    article = {"article_url": url, "title": "标题", "content": "<p>正文</p>", "article_time": "2025年01月05日 12:00",
+               "page": 1, "order": 1, "comments": comments}
+    (page / name).write_text(json.dumps(article, ensure_ascii=False), encoding="utf-8")
+
+
+def comment(author="andy"):
+    return {"author": author, "time": "2025年01月05日 12:30", "content": "<p>评论</p>", "children": []}
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    monkeypatch.setattr(query_api, "REFRESH_INTERVAL", 0)
+    write_article(tmp_path / "data", "1.json", "https://example.com/?p=1", [comment()])
+    corpus = query_api.Corpus(str(tmp_path / "data"), str(tmp_path / "search.db"))
+    corpus.refresh()
+    return corpus
+
+
+@pytest.mark.parametrize("content", ['{"article_url": "https://exa', "MISSING_AUTHOR"])
+def test_refresh_keeps_previous_state_on_bad_file(corpus, tmp_path, content):
+    state = corpus.refresh()
+    if content == "MISSING_AUTHOR":
+        write_article(tmp_path / "data", "2.json", "https://example.com/?p=2", [{"time": "2025年01月05日 12:30"}])
+    else:
+        (tmp_path / "data" / "page1" / "2.json").write_text(content, encoding="utf-8")
+    assert corpus.refresh() is state
+    assert corpus.refresh() is state
+
+    # 文件写完整后下一次刷新重新读取
+    write_article(tmp_path / "data", "2.json", "https://example.com/?p=2", [comment()])
+    assert len(corpus.refresh()["articles"]) == 2
+
+
+def get(server, path):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=10)
+    conn.request("GET", path)
+    response = conn.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def test_unexpected_error_returns_json_500_and_is_not_cached(corpus, monkeypatch):
+    handler = type("TestHandler", (query_api.ApiHandler,),
+                   {"corpus": corpus, "cache": query_api.ResponseCache(), "quiet": True})
+    server = query_api.SiteServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        route = query_api.route
+
+        def failing_route(*args):
+            raise RuntimeError("boom")
+        monkeypatch.setattr(query_api, "route", failing_route)
+        status, payload = get(server, "/api/articles")
+        assert status == 500 and "boom" in payload["error"]
+
+        monkeypatch.setattr(query_api, "route", route)
+        status, payload = get(server, "/api/articles")
+        assert status == 200 and payload["articles"][0]["url"] == "https://example.com/?p=1"
+    finally:
+        server.shutdown()
+        server.server_close()
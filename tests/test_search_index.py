@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+search_index 的测试：短关键词不跨标点匹配，只含标点 / FTS 语法字符的关键词按原字符查找，摘要标记位置正确
+"""
+
+import json
+
+import pytest
+
+import search_index
+
+COMMENTS = [
+    "这是好人",
+    "说得好，人要知足",
+    "很好。人生如此",
+    '他说"早睡"最好',
+    "NEAR(x) OR y * z",
+    "中医 健康",
+]
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    base = tmp_path_factory.mktemp("search")
+    page = base / "data" / "page1"
+    page.mkdir(parents=True)
+    article = {"article_url": "https://example.com/?p=1", "title": "标题", "content": "<p>正文</p>",
+               "article_time": "2025年01月05日 12:00", "page": 1, "order": 1,
+               "comments": [{"author": "andy", "time": "2025年01月05日 12:30", "content": f"<p>{text}</p>",
+                             "children": []} for text in COMMENTS]}
+    (page / "1.json").write_text(json.dumps(article, ensure_ascii=False), encoding="utf-8")
+    index = search_index.SearchIndex(str(base / "search.db"))
+    index.sync(str(base / "data"))
+    return index
+
+
+def found(index, query):
+    total, results = index.search(query, limit=50)
+    texts = sorted(result["snippet"].replace("<mark>", "").replace("</mark>", "") for result in results)
+    assert total == len(texts)
+    return texts
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("好人", ["这是好人"]),                       # 两个字：不跨逗号、句号匹配
+    ("好，人", ["说得好，人要知足"]),               # 含标点的三个字：trigram
+    ("，", ["说得好，人要知足"]),
+    ("好。", ["很好。人生如此"]),
+    ("健康", ["中医 健康"]),
+    ("医健", ["中医 健康"]),                       # 与网页搜索一致：忽略空白
+])
+def test_short_queries_do_not_span_punctuation(index, query, expected):
+    assert found(index, query) == expected
+
+
+@pytest.mark.parametrize("query, expected", [
+    ('"', ['他说&quot;早睡&quot;最好']),
+    ('""', []),
+    ("*", ["NEAR(x) OR y * z"]),
+    ("NEAR(", ["NEAR(x) OR y * z"]),
+    ("OR", ["NEAR(x) OR y * z"]),
+    ("or y", ["NEAR(x) OR y * z"]),
+    ("(", ["NEAR(x) OR y * z"]),
+    ("-", []),
+    ("   ", []),
+])
+def test_punctuation_and_fts_syntax_are_literal(index, query, expected):
+    assert found(index, query) == expected
+
+
+def test_snippet_marks_match_after_multi_char_lowercase():
+    snippet = search_index.make_snippet("İİİİ 中医 健康 很好 其他内容", [search_index.fold("健康")])
+    assert "<mark>健康</mark>" in snippet
+    assert len(search_index.fold("İ臺灣ABC")) == len("İ臺灣ABC")
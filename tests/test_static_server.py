@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+static_server 的测试：重新生成网页期间不用旧 ETag 发送新内容；有 If-None-Match 时忽略 If-Modified-Since
+"""
+
+import email.utils
+import hashlib
+import http.client
+import json
+import os
+import threading
+
+import pytest
+
+import static_server
+from site_layout import BUILD_MANIFEST_FILE
+
+
+def write_manifest(site_dir, names):
+    files = {}
+    for name in names:
+        data = (site_dir / name).read_bytes()
+        files[name] = {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data)}
+    (site_dir / BUILD_MANIFEST_FILE).write_text(json.dumps({"files": files}), encoding="utf-8")
+    return files
+
+
+@pytest.fixture
+def site(tmp_path):
+    (tmp_path / "index.html").write_text("<html>v1</html>", encoding="utf-8")
+    files = write_manifest(tmp_path, ["index.html"])
+    # 文件早于清单（与生成网页时的写入顺序一致）
+    manifest_mtime = os.stat(tmp_path / BUILD_MANIFEST_FILE).st_mtime_ns
+    os.utime(tmp_path / "index.html", ns=(manifest_mtime - 10**9, manifest_mtime - 10**9))
+    server = static_server.make_server(str(tmp_path), "127.0.0.1", 0, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, tmp_path, files
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path="/", headers=None):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=10)
+    conn.request("GET", path, headers=headers or {})
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response, body
+
+
+def test_etag_follows_bytes_while_manifest_is_stale(site):
+    server, site_dir, files = site
+    response, body = get(server)
+    assert response.getheader("ETag") == f'"{files["index.html"]["sha256"]}"'
+
+    # 网页已改写（大小相同）但清单还没写：ETag 不能沿用清单中的旧哈希
+    (site_dir / "index.html").write_text("<html>v2</html>", encoding="utf-8")
+    manifest_mtime = os.stat(site_dir / BUILD_MANIFEST_FILE).st_mtime_ns
+    os.utime(site_dir / "index.html", ns=(manifest_mtime + 10**9, manifest_mtime + 10**9))
+    response, body = get(server)
+    assert body == b"<html>v2</html>"
+    stale_etag = response.getheader("ETag")
+    assert stale_etag != f'"{files["index.html"]["sha256"]}"'
+    assert get(server, headers={"If-None-Match": f'"{files["index.html"]["sha256"]}"'})[0].status == 200
+
+    # 清单写好后改用新内容的哈希
+    os.utime(site_dir / "index.html", ns=(manifest_mtime - 10**9, manifest_mtime - 10**9))
+    files = write_manifest(site_dir, ["index.html"])
+    response, body = get(server)
+    assert response.getheader("ETag") == f'"{files["index.html"]["sha256"]}"'
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since(site):
+    server, _, files = site
+    etag = f'"{files["index.html"]["sha256"]}"'
+    future = email.utils.formatdate(4102444800, usegmt=True)   # 2100 年
+    past = email.utils.formatdate(0, usegmt=True)
+
+    assert get(server, headers={"If-Modified-Since": future})[0].status == 304
+    assert get(server, headers={"If-Modified-Since": past})[0].status == 200
+    assert get(server, headers={"If-None-Match": etag, "If-Modified-Since": past})[0].status == 304
+    # ETag 不匹配时即使 If-Modified-Since 表示未修改也返回完整内容
+    response, body = get(server, headers={"If-None-Match": '"other"', "If-Modified-Since": future})
+    assert response.status == 200 and body == b"<html>v1</html>"